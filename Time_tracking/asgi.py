@@ -2,6 +2,11 @@
 ASGI config for Time_tracking project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The live counter event stream (``/events/``) is a long-lived async response and
+must be served through this entry point (e.g. ``uvicorn Time_tracking.asgi:application``);
+under WSGI every open stream would hold a worker thread. The dashboard, summary
+and task-status views are async as well; under WSGI they still work, but each
+request pays for its own event loop (``manage.py benchmark_views`` compares both).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -91,6 +91,7 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 'social_django.context_processors.backends',
                 'social_django.context_processors.login_redirect',
+                'time_tracking_or.context_processors.realtime',
             ],
         },
     },
@@ -126,6 +127,7 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASS', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
     }
 }
 
@@ -240,15 +242,36 @@ GUEST_ACCOUNT_RETENTION_DAYS = int(os.getenv('GUEST_ACCOUNT_RETENTION_DAYS', '10
 _guest_cleanup_hour = int(os.getenv('GUEST_CLEANUP_HOUR', '3'))
 _guest_cleanup_minute = int(os.getenv('GUEST_CLEANUP_MINUTE', '0'))
 GUEST_COUNTER_LIMIT = int(os.getenv('GUEST_COUNTER_LIMIT', '2'))
+# Очистка гостей: размер пачки (одна короткая транзакция) и бюджет времени одного запуска (с)
+GUEST_CLEANUP_BATCH_SIZE = int(os.getenv('GUEST_CLEANUP_BATCH_SIZE', '500'))
+GUEST_CLEANUP_TIME_BUDGET = int(os.getenv('GUEST_CLEANUP_TIME_BUDGET', '300'))
+# Гость создается лениво — только при первом действии из этого списка (имена URL)
+GUEST_WRITE_URL_NAMES = ('counter_create', 'counter_start', 'interval_import', 'project_rating', 'send_feedback')
+# Пути, на которых гостевая логика не выполняется вовсе (статика, медиа, sitemap, боты)
+GUEST_EXCLUDED_PATH_PREFIXES = (STATIC_URL, MEDIA_URL, '/sitemap', '/robots.txt', '/favicon.ico', '/health', '/admin/')
+# Кеш соответствия хеш IP -> id гостя (в том числе отрицательного ответа)
+GUEST_LOOKUP_CACHE_TIMEOUT = int(os.getenv('GUEST_LOOKUP_CACHE_TIMEOUT', '3600'))
 
 CELERY_BEAT_SCHEDULE = {
     'cleanup-stale-guests': {
         'task': 'accounts.tasks.cleanup_stale_guests',
         'schedule': crontab(hour=str(_guest_cleanup_hour), minute=str(_guest_cleanup_minute))
 
-    }
+    },
+    'reconcile-project-rating-stats': {
+        'task': 'time_tracking_or.tasks.reconcile_project_rating_stats',
+        'schedule': crontab(minute='15'),
+    },
+    # Страховка: разбирает очередь пересчета итогов, если отложенная задача не была поставлена
+    'recompute-dirty-summaries': {
+        'task': 'time_tracking_or.tasks.recompute_dirty_summaries_task',
+        'schedule': crontab(minute='*/5'),
+    },
 }
 
+# Задержка (с) перед пересчетом отмеченных дней: серия правок укладывается в один пересчет
+SUMMARY_RECOMPUTE_DELAY = int(os.getenv('SUMMARY_RECOMPUTE_DELAY', '5'))
+
 CELERY_ENABLE_UTC = True
 CELERY_TIMEZONE = "UTC"
 
@@ -363,6 +386,30 @@ except Exception as _cache_exc:  # noqa: BLE001
         }
     }
 
+# Живые события счетчиков (SSE). Поток держит соединение открытым, поэтому включается явно
+# и только при запуске через ASGI (uvicorn/daphne): под WSGI каждая вкладка заняла бы воркер навсегда.
+REALTIME_EVENTS_ENABLED = os.getenv('REALTIME_EVENTS_ENABLED', 'False') == 'True'
+# Без REALTIME_REDIS_URL шина работает в пределах одного процесса.
+REALTIME_REDIS_URL = os.getenv('REALTIME_REDIS_URL', '')
+REALTIME_HEARTBEAT_SECONDS = int(os.getenv('REALTIME_HEARTBEAT_SECONDS', '15'))
+
+# Async-вью (дашборд, сводка) выполняют независимые запросы параллельно, каждый в своем соединении с БД.
+# Выключено по умолчанию: при CONN_MAX_AGE=0 каждый рендер открывает несколько новых соединений,
+# включайте вместе с DB_CONN_MAX_AGE > 0 или пулом соединений (pgbouncer)
+ASYNC_PARALLEL_QUERIES = os.getenv('ASYNC_PARALLEL_QUERIES', 'False') == 'True'
+
+# Время жизни кеша вычисляемой части дашборда (инвалидация — по версии данных пользователя)
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '300'))
+
+# Сторона квадратной уменьшенной копии аватара (px), рендерится задачей Celery
+AVATAR_THUMBNAIL_SIZE = int(os.getenv('AVATAR_THUMBNAIL_SIZE', '96'))
+
+# Кеш данных профиля для навбара (сбрасывается при сохранении профиля и пользователя)
+PROFILE_CACHE_TIMEOUT = int(os.getenv('PROFILE_CACHE_TIMEOUT', '3600'))
+
+# Время жизни закешированных страниц sitemap (сбрасываются и раньше — при записи интервалов месяца)
+SITEMAP_CACHE_TIMEOUT = int(os.getenv('SITEMAP_CACHE_TIMEOUT', '3600'))
+
 # Опционально включить site-wide кеш через middleware (по умолчанию выключено).
 # Чтобы включить — выставьте ENABLE_SITE_CACHE=True в .env.
 if os.getenv('ENABLE_SITE_CACHE', 'False') == 'True':
@@ -30,6 +30,9 @@ CACHES = {
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Запросы async-вью — в общем потоке, чтобы они видели транзакцию теста (параллельный режим — в отдельном тесте)
+ASYNC_PARALLEL_QUERIES = False
+
 # Почта в памяти
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 
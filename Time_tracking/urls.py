@@ -1,7 +1,6 @@
 """Root URL configuration exposing admin, app routes, and sitemap."""
 
-from django.contrib.sitemaps.views import sitemap
-from time_tracking_or.sitemaps import TimeIntervalSitemap
+from time_tracking_or.sitemaps import sitemap_index, sitemap_section
 from django.urls import re_path
 from django.contrib import admin
 from django.urls import path, include
@@ -9,15 +8,12 @@ from django.views.generic import TemplateView
 from django.conf.urls.static import static
 from django.conf import settings
 
-sitemaps = {
-    'TimeInterval': TimeIntervalSitemap,
-}
-
 urlpatterns = [
                   path('admin/', admin.site.urls),
                   path('', include('accounts.urls')),
                   path('', include("time_tracking_or.urls")),
-                  path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+                  path('sitemap.xml', sitemap_index, name='sitemap_index'),
+                  path('sitemap-<str:section>.xml', sitemap_section, name='sitemap_section'),
                   # path('auth/', include('rest_framework_social_oauth2.urls', namespace='rest_framework_social_oauth2')),
                   # path('social/', include('social_django.urls', namespace='social')),
                   # path('auth/', include('social_django.urls', namespace='social')),
@@ -0,0 +1,78 @@
+"""Small square renditions of profile avatars.
+
+The original upload stays in ``Profile.avatar``; a background task renders a
+fixed-size WebP and JPEG copy next to it and records their storage paths in
+``Profile.avatar_renditions`` together with the name of the source file, so
+a rendition is never served for an avatar it was not made from.
+"""
+
+import hashlib
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+AVATAR_THUMBNAIL_SIZE = getattr(settings, 'AVATAR_THUMBNAIL_SIZE', 96)
+RENDITION_FORMATS = (('webp', 'WEBP'), ('jpeg', 'JPEG'))
+RENDITION_DIR = 'images/avatars/thumbs'
+
+
+def needs_renditions(profile):
+    """Return True if the profile's current avatar has no matching renditions."""
+    name = profile.avatar.name if profile.avatar else ''
+    if not name or 'default' in name:
+        return False
+    return (profile.avatar_renditions or {}).get('source') != name
+
+
+def rendition_url(profile, kind):
+    """Return the URL of the ``kind`` ('webp' or 'jpeg') rendition or None."""
+    renditions = profile.avatar_renditions or {}
+    if not profile.avatar or renditions.get('source') != profile.avatar.name or not renditions.get(kind):
+        return None
+    return default_storage.url(renditions[kind])
+
+
+def _square(image, size):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Прозрачный фон на белом, иначе JPEG получит черные поля
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    return ImageOps.fit(image.convert('RGB'), (size, size), Image.Resampling.LANCZOS)
+
+
+def render_avatar_renditions(profile, size=AVATAR_THUMBNAIL_SIZE):
+    """Render and store the renditions of ``profile.avatar``; return the new mapping."""
+    source_name = profile.avatar.name
+    with profile.avatar.open('rb') as source:
+        data = source.read()
+    with Image.open(BytesIO(data)) as image:
+        thumbnail = _square(image, size)
+
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    renditions = {'source': source_name, 'size': size}
+    for kind, pil_format in RENDITION_FORMATS:
+        buffer = BytesIO()
+        thumbnail.save(buffer, pil_format, quality=85)
+        extension = 'jpg' if kind == 'jpeg' else kind
+        path = f'{RENDITION_DIR}/{profile.user_id}-{digest}-{size}.{extension}'
+        if default_storage.exists(path):
+            default_storage.delete(path)
+        renditions[kind] = default_storage.save(path, ContentFile(buffer.getvalue()))
+
+    # Старые рендеры другого исходника больше не нужны
+    for kind, _pil_format in RENDITION_FORMATS:
+        old_path = (profile.avatar_renditions or {}).get(kind)
+        if old_path and old_path != renditions[kind]:
+            try:
+                default_storage.delete(old_path)
+            except OSError:
+                logger.warning('Could not delete old avatar rendition %s', old_path)
+    return renditions
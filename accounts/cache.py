@@ -0,0 +1,27 @@
+"""Cross-request cache of the navbar profile data (profile, avatar URL, initial).
+
+The navbar renders ``user_profile`` on every page. Its result is cached per
+user and dropped whenever the profile or the user changes: ``Profile.save``
+(which every avatar upload goes through) and the user/profile signals.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+PROFILE_CACHE_TIMEOUT = getattr(settings, 'PROFILE_CACHE_TIMEOUT', 3600)
+
+
+def profile_cache_key(user_id):
+    """Return the cache key of the navbar profile data of ``user_id``."""
+    return f'tt:user-profile:{user_id}'
+
+
+def invalidate_profile_cache(user_id):
+    """Drop the cached navbar profile data of ``user_id`` now and after commit."""
+    if user_id is None:
+        return
+    key = profile_cache_key(user_id)
+    cache.delete(key)
+    # Параллельный запрос мог успеть закешировать данные до коммита
+    transaction.on_commit(lambda: cache.delete(key))
@@ -1,15 +1,31 @@
-"""Middleware providing guest auto-login based on client IP."""
+"""Middleware providing guest auto-login based on client IP.
+
+Guests are provisioned lazily: a read-only request from a new visitor only
+puts an ``is_guest`` marker into the session, and the guest ``User`` row is
+created on the first write action (creating a counter, starting a timer,
+importing intervals). Static/media files, the sitemap and bots are skipped
+entirely, and the IP-hash to user-id lookup is cached, so crawler traffic
+never touches the users table.
+"""
 
 from __future__ import annotations
 
 import hashlib
+import re
 from typing import Optional
 
+from django.conf import settings
 from django.contrib.auth import get_user_model, login
+from django.core.cache import cache
 from django.db import transaction
 from django.http import HttpRequest
+from django.urls import Resolver404, resolve
 from django.utils.deprecation import MiddlewareMixin
 
+GUEST_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+BOT_USER_AGENT = re.compile(r"bot|crawl|spider|slurp|curl|wget|monitor|uptime|headless", re.IGNORECASE)
+
 
 def _client_ip(request: HttpRequest) -> Optional[str]:
     """Extract client IP from request headers."""
@@ -19,12 +35,23 @@ def _client_ip(request: HttpRequest) -> Optional[str]:
     return request.META.get("REMOTE_ADDR")
 
 
+def guest_username(client_ip: str) -> str:
+    """Return the guest username derived from the client IP hash."""
+    return f"guest_{hashlib.sha256(client_ip.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _lookup_cache_key(username: str) -> str:
+    return f"guest:lookup:{username}"
+
+
 class GuestIPAuthenticationMiddleware(MiddlewareMixin):
     """Authenticate anonymous visitors as guest users linked to their IP."""
 
     session_flag = "guest_user_id"
 
     def process_request(self, request: HttpRequest) -> None:  # noqa: D401
+        if self._is_excluded(request):
+            return
         if getattr(request, "user", None) and request.user.is_authenticated:
             return
 
@@ -32,19 +59,69 @@ class GuestIPAuthenticationMiddleware(MiddlewareMixin):
         if not client_ip:
             return
 
-        guest_user = self._get_or_create_guest(client_ip)
-        backend = "django.contrib.auth.backends.ModelBackend"
-        guest_user.backend = backend
-        login(request, guest_user, backend=backend)
+        username = guest_username(client_ip)
+        guest_user = self._get_guest(username)
+        keep_csrf = False
+        if guest_user is None and self._is_write_action(request):
+            guest_user = self._create_guest(username)
+            # Форма уже отправлена со старым CSRF-токеном — тихий вход гостя не должен его ротировать
+            keep_csrf = True
+
+        if guest_user is None:
+            # Гость еще не нужен: только отметка в сессии, без записи в таблицу пользователей
+            if not request.session.get("is_guest"):
+                request.session["is_guest"] = True
+                request.session["guest_ip"] = client_ip
+            return
+
+        csrf_cookie = request.META.get("CSRF_COOKIE")
+        guest_user.backend = GUEST_BACKEND
+        login(request, guest_user, backend=GUEST_BACKEND)
+        if keep_csrf and csrf_cookie:
+            request.META["CSRF_COOKIE"] = csrf_cookie
         request.session["is_guest"] = True
         request.session["guest_ip"] = client_ip
         request.session[self.session_flag] = guest_user.id
 
-    def _get_or_create_guest(self, client_ip: str):
+    def _is_excluded(self, request: HttpRequest) -> bool:
+        """Return True for requests that must never create or look up guests."""
+        prefixes = getattr(settings, "GUEST_EXCLUDED_PATH_PREFIXES", ())
+        if request.path_info.startswith(tuple(prefixes)):
+            return True
+        return bool(BOT_USER_AGENT.search(request.META.get("HTTP_USER_AGENT", "")))
+
+    def _is_write_action(self, request: HttpRequest) -> bool:
+        """Return True if the request is one of the actions that need a real guest user."""
+        if request.method in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            return False
+        try:
+            url_name = resolve(request.path_info).url_name
+        except Resolver404:
+            return False
+        return url_name in getattr(settings, "GUEST_WRITE_URL_NAMES", ())
+
+    def _get_guest(self, username: str):
+        """Return the existing guest for ``username`` or None, caching the id lookup."""
+        user_model = get_user_model()
+        cache_key = _lookup_cache_key(username)
+        guest_id = cache.get(cache_key)
+        if guest_id is None:
+            guest_id = (
+                user_model.objects.filter(username=username).values_list("pk", flat=True).first() or 0
+            )
+            cache.set(cache_key, guest_id, settings.GUEST_LOOKUP_CACHE_TIMEOUT)
+        if not guest_id:
+            return None
+        try:
+            return user_model.objects.get(pk=guest_id)
+        except user_model.DoesNotExist:
+            # Гостя удалила очистка устаревших аккаунтов
+            cache.delete(cache_key)
+            return None
+
+    def _create_guest(self, username: str):
         """Create (or reuse) a guest account keyed by IP hash."""
         user_model = get_user_model()
-        suffix = hashlib.sha256(client_ip.encode("utf-8")).hexdigest()[:12]
-        username = f"guest_{suffix}"
         with transaction.atomic():
             guest_user, created = user_model.objects.get_or_create(
                 username=username,
@@ -56,4 +133,5 @@ class GuestIPAuthenticationMiddleware(MiddlewareMixin):
             if created:
                 guest_user.set_unusable_password()
                 guest_user.save(update_fields=["password"])
+        cache.set(_lookup_cache_key(username), guest_user.pk, settings.GUEST_LOOKUP_CACHE_TIMEOUT)
         return guest_user
@@ -4,6 +4,8 @@ from django.core.validators import FileExtensionValidator
 from django.urls import reverse
 from services.utils import unique_slugify
 
+from .cache import invalidate_profile_cache
+
 
 class Profile(models.Model):
     """Stores additional display information for an authenticated user."""
@@ -16,6 +18,8 @@ class Profile(models.Model):
         blank=True,
         validators=[FileExtensionValidator(allowed_extensions=('png', 'jpg', 'jpeg', 'dmg'))])
     bio = models.TextField('О себе', blank=True, null=True)
+    # Пути уменьшенных копий аватара (webp/jpeg) и имя исходника, из которого они сделаны
+    avatar_renditions = models.JSONField('Уменьшенные копии аватара', default=dict, blank=True)
 
     class Meta:
         """Order profiles by user and provide readable admin names."""
@@ -28,6 +32,8 @@ class Profile(models.Model):
         if not self.slug:
             self.slug = unique_slugify(self, self.user.username, self.slug)
         super().save(*args, **kwargs)
+        # Навбар кеширует профиль и URL аватара — сбрасываем при любом сохранении (в т.ч. загрузке аватара)
+        invalidate_profile_cache(self.user_id)
 
     def __str__(self):
         """Return username for admin representations."""
@@ -1,14 +1,22 @@
-"""Signal handlers for provisioning profiles and sending welcome emails."""
+"""Signal handlers for provisioning profiles, welcome emails and guest sessions."""
 
-from django.db.models.signals import post_save
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
 from django.dispatch import receiver
 from services.utils import unique_slugify
+from .avatars import needs_renditions
+from .cache import invalidate_profile_cache
 from .models import Profile
-from .tasks import send_welcome_email
+from .tasks import generate_avatar_renditions, send_welcome_email
 
 GUEST_PREFIX = "guest_"
 
+logger = logging.getLogger(__name__)
+
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):  # noqa: D401
@@ -39,3 +47,34 @@ def create_user_profile(sender, instance, created, **kwargs):  # noqa: D401
         subject = instance.first_name or 'Добро пожаловать'
         message = f'Добро пожаловать {instance.username}'
         send_welcome_email.delay(subject, message, to_email)
+
+
+@receiver(user_logged_in)
+def drop_guest_session_marker(sender, request, user, **kwargs):
+    """Forget the guest markers once a real account signs in (any login path, VK ID included)."""
+    if request is None or user.username.startswith(GUEST_PREFIX):
+        return
+    for key in ("is_guest", "guest_ip"):
+        request.session.pop(key, None)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Profile)
+def drop_cached_profile(sender, instance, **kwargs):
+    """Forget the cached navbar data when the user's name or the profile changes."""
+    invalidate_profile_cache(instance.pk if sender is User else instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+def queue_avatar_renditions(sender, instance, **kwargs):
+    """Render the small avatar copies in the background once a new avatar is saved."""
+    if needs_renditions(instance):
+        profile_id = instance.pk
+
+        def queue_renditions():
+            try:
+                generate_avatar_renditions.delay(profile_id)
+            except Exception as exc:  # брокер недоступен — сохранение профиля не должно падать
+                logger.warning("Avatar renditions not queued for profile %s: %s", profile_id, exc)
+
+        transaction.on_commit(queue_renditions)
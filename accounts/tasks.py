@@ -1,16 +1,34 @@
 """Celery tasks triggered by account lifecycle events."""
 
+import logging
+import time
 from datetime import timedelta
 
+import requests
 from celery import shared_task
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.core.mail import send_mail
+from django.db import transaction
 from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
+from PIL import Image
 
 from time_tracking_or.models import TimeCounter
 
+from .avatars import needs_renditions, render_avatar_renditions
+from .cache import invalidate_profile_cache
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+# Последний обработанный pk гостя: следующий запуск продолжит с него
+GUEST_CLEANUP_CHECKPOINT_KEY = 'guest:cleanup:checkpoint'
+# Через сколько секунд продолжить очистку, если не уложились в бюджет времени
+GUEST_CLEANUP_RESUME_DELAY = 60
+
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
 def send_welcome_email(self, subject, message, to_email):
@@ -26,16 +44,15 @@ def send_welcome_email(self, subject, message, to_email):
     )
 
 
-@shared_task
-def cleanup_stale_guests():
-    """Delete guest accounts without активных данных по истечении срока хранения."""
+def stale_guests_queryset():
+    """Return guests past the retention period that never created a counter."""
     retention_days = getattr(settings, "GUEST_ACCOUNT_RETENTION_DAYS", 14)
     cutoff = timezone.now() - timedelta(days=retention_days)
 
     user_model = get_user_model()
     counters_subquery = TimeCounter.objects.filter(user=OuterRef("pk"))
 
-    stale_users = (
+    return (
         user_model.objects.filter(username__startswith="guest_")
         .filter(date_joined__lt=cutoff)
         .filter(Q(last_login__lt=cutoff) | Q(last_login__isnull=True))
@@ -43,9 +60,93 @@ def cleanup_stale_guests():
         .filter(has_counters=False)
     )
 
-    if not stale_users.exists():
-        return 0
 
-    deleted_count = stale_users.count()
-    stale_users.delete()
+@shared_task
+def cleanup_stale_guests():
+    """Delete guest accounts without активных данных по истечении срока хранения.
+
+    Guests are removed in pk-ordered batches, each in its own short
+    transaction. The last processed pk is kept as a checkpoint; when the time
+    budget runs out the task re-queues itself and resumes from it.
+    """
+    batch_size = settings.GUEST_CLEANUP_BATCH_SIZE
+    user_label = get_user_model()._meta.label
+    budget = settings.GUEST_CLEANUP_TIME_BUDGET
+    started = time.monotonic()
+    resumed_from = last_pk = cache.get(GUEST_CLEANUP_CHECKPOINT_KEY) or 0
+    deleted_count = batches = 0
+    finished = False
+
+    while True:
+        stale_users = stale_guests_queryset()
+        batch_ids = list(
+            stale_users.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not batch_ids:
+            finished = True
+            break
+        with transaction.atomic():
+            # Повторная проверка: гость мог завести счетчик между выборкой и удалением
+            _total, deleted_by_model = stale_users.filter(pk__in=batch_ids).delete()
+        deleted_count += deleted_by_model.get(user_label, 0)
+        batches += 1
+        last_pk = batch_ids[-1]
+        cache.set(GUEST_CLEANUP_CHECKPOINT_KEY, last_pk, None)
+        if time.monotonic() - started >= budget:
+            break
+
+    if finished:
+        cache.delete(GUEST_CLEANUP_CHECKPOINT_KEY)
+    logger.info(
+        "Stale guest cleanup: deleted=%s batches=%s elapsed=%.1fs resumed_from=%s finished=%s",
+        deleted_count,
+        batches,
+        time.monotonic() - started,
+        resumed_from,
+        finished,
+    )
+    if not finished:
+        cleanup_stale_guests.apply_async(countdown=GUEST_CLEANUP_RESUME_DELAY)
     return deleted_count
+
+
+@shared_task
+def generate_avatar_renditions(profile_id):
+    """Render the small WebP/JPEG copies of a profile's avatar."""
+    profile = Profile.objects.filter(pk=profile_id).first()
+    if profile is None or not needs_renditions(profile):
+        return None
+    try:
+        renditions = render_avatar_renditions(profile)
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:  # битый или огромный файл, недоступное хранилище
+        logger.warning('Avatar renditions failed for profile %s: %s', profile_id, exc)
+        return None
+    # Пока шел рендер, аватар могли сменить — тогда запись не применится, новый рендер уже в очереди
+    updated = Profile.objects.filter(pk=profile_id, avatar=renditions['source']).update(
+        avatar_renditions=renditions,
+    )
+    if updated:
+        invalidate_profile_cache(profile.user_id)
+    return renditions if updated else None
+
+
+@shared_task(bind=True, autoretry_for=(requests.RequestException,), retry_backoff=True, max_retries=3)
+def fetch_remote_avatar(self, user_id, avatar_url):
+    """Download an avatar from the identity provider and attach it to the profile."""
+    profile, _ = Profile.objects.get_or_create(user_id=user_id)
+    # Не перекачиваем, если у профиля уже не аватар по умолчанию
+    if profile.avatar and 'default' not in str(profile.avatar.name):
+        return False
+    response = requests.get(avatar_url, timeout=5)
+    content_type = response.headers.get('Content-Type', '')
+    is_image = 'image/' in content_type or avatar_url.lower().endswith(('.jpg', '.jpeg', '.png'))
+    if response.status_code != 200 or not response.content or not is_image:
+        return False
+    ext = '.jpg'
+    for cand in ('.png', '.jpeg', '.jpg'):
+        if avatar_url.lower().endswith(cand):
+            ext = cand
+            break
+    # save=True вызывает Profile.save: кеш навбара сбрасывается, рендер копий ставится в очередь
+    profile.avatar.save(f'vkid_{user_id}{ext}', ContentFile(response.content), save=True)
+    return True
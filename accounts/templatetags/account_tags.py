@@ -1,33 +1,53 @@
 from django import template
+from django.core.cache import cache
 
+from accounts.avatars import rendition_url
+from accounts.cache import PROFILE_CACHE_TIMEOUT, profile_cache_key
 from accounts.models import Profile
 
 register = template.Library()
 
 
-@register.simple_tag
-def user_profile(user):
-    """Возвращает словарь с профилем и безопасным URL аватара."""
-    if not user or not getattr(user, 'is_authenticated', False):
-        return {'profile': None, 'avatar_url': None, 'initial': 'U'}
-    try:
-        profile = user.profile
-    except Profile.DoesNotExist:  # pragma: no cover - защита от отсутствия профиля
-        profile = None
+def _load_user_profile(user):
+    """Собирает профиль, URL аватара и инициал пользователя (один запрос к БД)."""
+    profile = Profile.objects.filter(user_id=user.pk).first()
 
     avatar_url = None
+    avatar_webp_url = None
     if profile:
         avatar_field = getattr(profile, 'avatar', None)
         if avatar_field:
-            try:
-                avatar_url = avatar_field.url
-            except (ValueError, AttributeError):  # файл отсутствует или storage не настроен
-                avatar_url = None
+            # Навбару хватает маленькой копии; пока ее нет — отдаем оригинал
+            avatar_webp_url = rendition_url(profile, 'webp')
+            avatar_url = rendition_url(profile, 'jpeg')
+            if avatar_url is None:
+                try:
+                    avatar_url = avatar_field.url
+                except (ValueError, AttributeError):  # файл отсутствует или storage не настроен
+                    avatar_url = None
 
     initial = (user.get_full_name() or user.username or '').strip()[:1].upper() or 'U'
 
     return {
         'profile': profile,
         'avatar_url': avatar_url,
+        'avatar_webp_url': avatar_webp_url,
         'initial': initial,
     }
+
+
+@register.simple_tag
+def user_profile(user):
+    """Возвращает словарь с профилем и безопасным URL аватара."""
+    if not user or not getattr(user, 'is_authenticated', False):
+        return {'profile': None, 'avatar_url': None, 'avatar_webp_url': None, 'initial': 'U'}
+    # Навбар вызывает тег дважды за рендер: запоминаем результат на объекте пользователя запроса
+    data = getattr(user, '_user_profile_tag', None)
+    if data is None:
+        key = profile_cache_key(user.pk)
+        data = cache.get(key)
+        if data is None:
+            data = _load_user_profile(user)
+            cache.set(key, data, PROFILE_CACHE_TIMEOUT)
+        user._user_profile_tag = data
+    return data
@@ -14,6 +14,7 @@ from django.urls import reverse_lazy
 from django.contrib.messages.views import SuccessMessageMixin
 from django.contrib.auth.views import LoginView, LogoutView
 from .forms import UserLoginForm, UserRegisterForm, UserUpdateForm, ProfileUpdateForm, CustomPasswordChangeForm
+from .tasks import fetch_remote_avatar
 import requests
 from django.conf import settings
 from django.http import JsonResponse
@@ -240,7 +241,6 @@ def vkid_token(request):
     Дополнительно: сохраняем имя, email и аватар пользователя (если доступны).
     """
     import json
-    from django.core.files.base import ContentFile
     from django.db import transaction
 
     def _apply_user_info(user, user_info: dict):
@@ -285,19 +285,17 @@ def vkid_token(request):
             # Не перекачиваем, если уже не default
             if profile.avatar and 'default' not in str(profile.avatar.name):
                 return
-            try:
-                r = requests.get(avatar_url, timeout=5)
-                ct = r.headers.get('Content-Type', '') if hasattr(r, 'headers') else ''
-                if r.status_code == 200 and r.content and ('image/' in ct or avatar_url.lower().endswith(('.jpg', '.jpeg', '.png'))):
-                    ext = '.jpg'
-                    for cand in ('.png', '.jpeg', '.jpg'):
-                        if avatar_url.lower().endswith(cand):
-                            ext = cand
-                            break
-                    profile.avatar.save(f'vkid_{user.pk}{ext}', ContentFile(r.content), save=True)
-            except Exception as e:
-                # Лог — не падаем из-за аватара
-                logger.warning('VKID AVATAR DOWNLOAD ERROR: %s', e)
+            # Скачивание идет в фоне и не задерживает ответ на вход
+            user_id = user.pk
+
+            def queue_download():
+                try:
+                    fetch_remote_avatar.delay(user_id, avatar_url)
+                except Exception as e:
+                    # Лог — не падаем из-за аватара
+                    logger.warning('VKID AVATAR DOWNLOAD ERROR: %s', e)
+
+            transaction.on_commit(queue_download)
 
     try:
         if request.method == 'GET':
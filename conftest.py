@@ -14,6 +14,14 @@ def _email_backend(settings, monkeypatch):
     monkeypatch.setattr('accounts.signals.send_welcome_email.delay', _noop, raising=False)
     return settings
 
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    # Locmem-кеш живет между тестами, а id пользователей в SQLite переиспользуются
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
 @pytest.fixture
 def user(db):
     return User.objects.create_user(username='tester', password='pass12345', email='tester@example.com')
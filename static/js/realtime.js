@@ -1,9 +1,43 @@
-function updateRealTime() {
-    const now = new Date(); // Получаем текущее время
-    const formattedTime = now.toLocaleTimeString(); // Форматируем время в "чч:мм:сс"
-    document.getElementById('current-time').textContent = formattedTime; // Записываем в элемент
-}
+(function () {
+    // Часы на странице (если есть элемент #current-time)
+    const clock = document.getElementById('current-time');
+    if (clock) {
+        const updateRealTime = () => {
+            clock.textContent = new Date().toLocaleTimeString(); // "чч:мм:сс"
+        };
+        setInterval(updateRealTime, 1000);
+        updateRealTime();
+    }
 
-// Запускаем обновление каждые 1000 мс (1 секунда)
-setInterval(updateRealTime, 1000);
-updateRealTime(); // Отображение времени при загрузке страницы
+    // Живые события счетчиков (SSE): старт/пауза/стоп/правка в других вкладках и устройствах
+    const eventsUrl = document.body.dataset.eventsUrl;
+    if (!eventsUrl || !window.EventSource) {
+        return;
+    }
+
+    // Идентификатор вкладки: свои действия она уже отрисовала по HTMX-ответу
+    const clientId = Math.random().toString(36).slice(2);
+    document.body.addEventListener('htmx:configRequest', (event) => {
+        event.detail.headers['X-Client-Id'] = clientId;
+    });
+
+    let refreshTimer = null;
+    const source = new EventSource(eventsUrl);
+    source.onmessage = (message) => {
+        let data;
+        try {
+            data = JSON.parse(message.data);
+        } catch (error) {
+            return;
+        }
+        if (data.origin === clientId) {
+            return;
+        }
+        document.body.dispatchEvent(new CustomEvent('counter-event', { detail: data }));
+        // Несколько событий подряд — одна перерисовка дашборда
+        if (document.getElementById('dashboard-root') && window.htmx) {
+            clearTimeout(refreshTimer);
+            refreshTimer = setTimeout(() => htmx.trigger(document.body, 'refresh-dashboard'), 300);
+        }
+    };
+})();
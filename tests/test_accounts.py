@@ -2,6 +2,7 @@ from datetime import timedelta
 
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.utils import timezone
@@ -12,7 +13,7 @@ from accounts.forms import (
     UserRegisterForm,
     UserUpdateForm,
 )
-from accounts.tasks import cleanup_stale_guests
+from accounts.tasks import GUEST_CLEANUP_CHECKPOINT_KEY, cleanup_stale_guests
 from accounts.validators import validate_latin_characters
 from time_tracking_or.models import TimeCounter
 
@@ -175,3 +176,27 @@ def test_cleanup_stale_guests(settings):
     assert not User.objects.filter(username='guest_stale').exists()
     assert User.objects.filter(username='guest_active').exists()
     assert User.objects.filter(username='guest_keep').exists()
+
+
+@pytest.mark.django_db
+def test_cleanup_stale_guests_resumes_from_checkpoint(settings, monkeypatch):
+    settings.GUEST_ACCOUNT_RETENTION_DAYS = 7
+    settings.GUEST_CLEANUP_BATCH_SIZE = 2
+    settings.GUEST_CLEANUP_TIME_BUDGET = 0
+    old = timezone.now() - timedelta(days=8)
+    for number in range(5):
+        User.objects.create_user(username=f'guest_{number}', date_joined=old, last_login=old)
+    requeued = []
+    monkeypatch.setattr(cleanup_stale_guests, 'apply_async', lambda **kwargs: requeued.append(kwargs))
+
+    # Бюджет исчерпан после первой пачки — задача запомнила позицию и поставила продолжение
+    assert cleanup_stale_guests() == 2
+    assert User.objects.filter(username__startswith='guest_').count() == 3
+    assert cache.get(GUEST_CLEANUP_CHECKPOINT_KEY) is not None
+    assert len(requeued) == 1
+
+    settings.GUEST_CLEANUP_TIME_BUDGET = 300
+    assert cleanup_stale_guests() == 3
+    assert not User.objects.filter(username__startswith='guest_').exists()
+    assert cache.get(GUEST_CLEANUP_CHECKPOINT_KEY) is None
+    assert len(requeued) == 1
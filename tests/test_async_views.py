@@ -0,0 +1,150 @@
+import asyncio
+import threading
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.management import call_command
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from time_tracking_or.concurrency import gather_queries
+from time_tracking_or.management.commands.benchmark_views import percentile
+from time_tracking_or.models import TimeInterval
+from time_tracking_or.summaries import (
+    recalculate_counter_summary,
+    recalculate_daily_summary,
+)
+from time_tracking_or.views import (
+    CheckTaskStatusView,
+    CounterSummaryView,
+    TimeCounterListView,
+)
+
+
+def test_hot_views_are_async():
+    assert TimeCounterListView.view_is_async
+    assert CounterSummaryView.view_is_async
+    assert CheckTaskStatusView.view_is_async
+
+
+@pytest.mark.parametrize('parallel', [True, False])
+def test_gather_queries_keeps_order(settings, parallel):
+    settings.ASYNC_PARALLEL_QUERIES = parallel
+    threads = []
+
+    def make(value):
+        def func():
+            threads.append(threading.get_ident())
+            return value
+        return func
+
+    results = asyncio.run(gather_queries(make(1), make(2), make(3)))
+    assert list(results) == [1, 2, 3]
+    assert len(threads) == 3
+
+
+def test_dashboard_renders_counters_and_totals(auth_client, counter):
+    response = auth_client.get(reverse('home'))
+    assert response.status_code == 200
+    assert counter.name in response.content.decode()
+    assert response.context['counter_total'] == 1
+    assert list(response.context['counters']) == [counter]
+
+
+def test_dashboard_welcome_for_anonymous():
+    request = AsyncRequestFactory().get('/')
+    request.user = AnonymousUser()
+    request.session = SessionStore()
+
+    async def auser():
+        return request.user
+
+    request.auser = auser
+    response = asyncio.run(TimeCounterListView.as_view()(request))
+    assert response.status_code == 200
+    assert reverse('login') in response.content.decode()
+
+
+def test_summary_totals(auth_client, counter, user):
+    today = timezone.localdate()
+    TimeInterval.objects.create(
+        counter=counter,
+        user=user,
+        day=today,
+        start_time=timezone.datetime(2024, 1, 1, 9, 0).time(),
+        end_time=timezone.datetime(2024, 1, 1, 10, 30).time(),
+    )
+    # Сводка читает итоги, а не интервалы
+    recalculate_daily_summary(user, today)
+    recalculate_counter_summary(counter.id, today)
+    response = auth_client.get(reverse('counter_summary'))
+    assert response.status_code == 200
+    assert response.context['summary_total'] == timedelta(hours=1, minutes=30)
+    assert [row['counter__name'] for row in response.context['per_counter']] == [counter.name]
+    assert [row['day'] for row in response.context['per_day']] == [today]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_summary_with_parallel_queries(settings, auth_client, counter, user):
+    # Запросы идут в отдельных потоках и соединениях — данные должны быть закоммичены
+    settings.ASYNC_PARALLEL_QUERIES = True
+    today = timezone.localdate()
+    TimeInterval.objects.create(
+        counter=counter,
+        user=user,
+        day=today,
+        start_time=timezone.datetime(2024, 1, 1, 9, 0).time(),
+        end_time=timezone.datetime(2024, 1, 1, 10, 0).time(),
+    )
+    recalculate_daily_summary(user, today)
+    recalculate_counter_summary(counter.id, today)
+    response = auth_client.get(reverse('counter_summary'))
+    assert response.status_code == 200
+    assert response.context['summary_total'] == timedelta(hours=1)
+    assert [row['counter__name'] for row in response.context['per_counter']] == [counter.name]
+    assert [row['day'] for row in response.context['per_day']] == [today]
+    assert auth_client.get(reverse('home')).context['counter_total'] == 1
+
+
+def test_summary_requires_login(client):
+    request = AsyncRequestFactory().get(reverse('counter_summary'))
+    request.user = AnonymousUser()
+    request.session = SessionStore()
+
+    async def auser():
+        return request.user
+
+    request.auser = auser
+    response = asyncio.run(CounterSummaryView.as_view()(request))
+    assert response.status_code == 302
+
+
+def test_task_status_json(auth_client, monkeypatch):
+    monkeypatch.setattr(
+        CheckTaskStatusView,
+        'get_status_data',
+        lambda self, task_id: ({'task_id': task_id, 'success': None}, 200),
+    )
+    response = auth_client.get(reverse('task_status', args=['abc']))
+    assert response.status_code == 200
+    assert response.json() == {'task_id': 'abc', 'success': None}
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_views_reports_both_stacks(user, counter, interval):
+    out = StringIO()
+    call_command('benchmark_views', '--requests', '2', '--concurrency', '1', '--path', '/', stdout=out)
+    lines = out.getvalue().splitlines()
+    assert any(line.startswith('wsgi') for line in lines)
+    assert any(line.startswith('asgi') for line in lines)
@@ -0,0 +1,142 @@
+from io import BytesIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from PIL import Image
+
+from accounts import tasks as account_tasks
+from accounts.avatars import needs_renditions
+from accounts.models import Profile
+from accounts.templatetags.account_tags import user_profile
+
+
+def _png(size=(300, 200), color=(200, 30, 30, 255)):
+    buffer = BytesIO()
+    Image.new('RGBA', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_avatar_upload_renders_small_copies(user, media_root, django_capture_on_commit_callbacks):
+    profile = user.profile
+    with django_capture_on_commit_callbacks(execute=True):
+        profile.avatar.save('upload.png', ContentFile(_png()), save=True)
+
+    profile.refresh_from_db()
+    renditions = profile.avatar_renditions
+    assert renditions['source'] == profile.avatar.name
+    assert not needs_renditions(profile)
+    for kind, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+        with default_storage.open(renditions[kind]) as stored, Image.open(stored) as image:
+            assert image.format == pil_format
+            assert image.size == (96, 96)
+
+
+@pytest.mark.django_db
+def test_user_profile_serves_rendition_once_ready(user, media_root, django_capture_on_commit_callbacks):
+    profile = user.profile
+    profile.avatar.save('upload.png', ContentFile(_png()), save=True)
+    # Рендер еще не выполнен — отдается оригинал
+    data = user_profile(User.objects.get(pk=user.pk))
+    assert data['avatar_url'].endswith('upload.png')
+    assert data['avatar_webp_url'] is None
+
+    account_tasks.generate_avatar_renditions(profile.pk)
+    data = user_profile(User.objects.get(pk=user.pk))
+    assert data['avatar_url'].endswith('-96.jpg')
+    assert data['avatar_webp_url'].endswith('-96.webp')
+
+
+@pytest.mark.django_db
+def test_stale_renditions_not_served(user, media_root):
+    profile = user.profile
+    profile.avatar.save('first.png', ContentFile(_png()), save=True)
+    account_tasks.generate_avatar_renditions(profile.pk)
+    profile.refresh_from_db()
+    profile.avatar.save('second.png', ContentFile(_png(color=(0, 0, 255, 255))), save=True)
+    assert needs_renditions(profile)
+    assert user_profile(User.objects.get(pk=user.pk))['avatar_url'].endswith('second.png')
+
+
+@pytest.mark.django_db
+def test_broken_avatar_does_not_fail_task(user, media_root):
+    profile = user.profile
+    profile.avatar.save('broken.png', ContentFile(b'not an image'), save=True)
+    assert account_tasks.generate_avatar_renditions(profile.pk) is None
+    profile.refresh_from_db()
+    assert profile.avatar_renditions == {}
+
+
+@pytest.mark.django_db
+def test_fetch_remote_avatar_attaches_file(user, media_root, monkeypatch):
+    class Resp:
+        status_code = 200
+        headers = {'Content-Type': 'image/png'}
+        content = _png()
+
+    monkeypatch.setattr(account_tasks.requests, 'get', lambda url, timeout=None: Resp())
+    assert account_tasks.fetch_remote_avatar(user.pk, 'https://vk.example/a.png') is True
+    profile = Profile.objects.get(user=user)
+    assert profile.avatar.name.endswith('.png')
+    assert 'vkid_' in profile.avatar.name
+    # Повторно не скачиваем поверх собственного аватара
+    assert account_tasks.fetch_remote_avatar(user.pk, 'https://vk.example/a.png') is False
+
+
+@pytest.mark.django_db
+def test_vkid_login_queues_avatar_download(client, monkeypatch, django_capture_on_commit_callbacks):
+    class Resp:
+        status_code = 200
+        text = 'raw'
+
+        def __init__(self, data):
+            self._data = data
+
+        def json(self):
+            return self._data
+
+    monkeypatch.setattr('accounts.views.requests.post', lambda url, data=None, headers=None: Resp({'access_token': 'abc'}))
+    monkeypatch.setattr(
+        'accounts.views.requests.get',
+        lambda url, headers=None: Resp({'sub': '777', 'name': 'VK User', 'avatar': 'https://vk.example/a.jpg'}),
+    )
+    queued = []
+    monkeypatch.setattr(account_tasks.fetch_remote_avatar, 'delay', lambda *args: queued.append(args))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.get(reverse('vkid_callback'), {'code': 'code123', 'device_id': 'dev1'})
+
+    assert response.json()['success'] is True
+    assert len(queued) == 1
+    assert queued[0][1] == 'https://vk.example/a.jpg'
+
+
+@pytest.mark.django_db
+def test_decompression_bomb_does_not_fail_task(user, media_root, monkeypatch):
+    profile = user.profile
+    profile.avatar.save('huge.png', ContentFile(_png()), save=True)
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 10)
+    assert account_tasks.generate_avatar_renditions(profile.pk) is None
+    profile.refresh_from_db()
+    assert profile.avatar_renditions == {}
+
+
+@pytest.mark.django_db
+def test_profile_save_survives_broker_outage(user, media_root, monkeypatch, django_capture_on_commit_callbacks):
+    def broker_down(*args):
+        raise ConnectionError('broker down')
+
+    monkeypatch.setattr(account_tasks.generate_avatar_renditions, 'delay', broker_down)
+    profile = user.profile
+    with django_capture_on_commit_callbacks(execute=True):
+        profile.avatar.save('upload.png', ContentFile(_png()), save=True)
+    assert Profile.objects.get(pk=profile.pk).avatar.name.endswith('upload.png')
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from time_tracking_or.cache import get_data_version
+from time_tracking_or.imports import import_intervals
+from time_tracking_or.models import TimeCounter
+
+
+def _stats_queries(ctx):
+    return [q for q in ctx.captured_queries if 'time_tracking_or_counterdailysummary' in q['sql']]
+
+
+@pytest.mark.django_db
+def test_repeated_dashboard_load_hits_cache(auth_client, counter):
+    auth_client.get(reverse('home'))
+    with CaptureQueriesContext(connection) as ctx:
+        resp = auth_client.get(reverse('home'))
+    assert _stats_queries(ctx) == []
+    assert resp.context['counter_total'] == 1
+
+
+@pytest.mark.django_db
+def test_interval_write_invalidates_dashboard(auth_client, counter):
+    auth_client.get(reverse('home'))
+    auth_client.post(reverse('counter_manual_interval', args=[counter.id]), {
+        'day': timezone.localdate().isoformat(), 'start_time': '11:00', 'end_time': '12:00',
+    })
+    resp = auth_client.get(reverse('home'))
+    assert resp.context['overall_total'] == timedelta(hours=1)
+
+
+@pytest.mark.django_db
+def test_start_invalidates_running_state(auth_client, counter):
+    auth_client.get(reverse('home'))
+    auth_client.post(reverse('counter_start', args=[counter.id]))
+    resp = auth_client.get(reverse('home'))
+    assert resp.context['active_counter_id'] == counter.id
+
+
+@pytest.mark.django_db
+def test_counter_changes_bump_only_owner_version(user, other_user, counter):
+    own = get_data_version(user.pk)
+    foreign = get_data_version(other_user.pk)
+    counter.name = 'Renamed'
+    counter.save()
+    assert get_data_version(user.pk) != own
+    assert get_data_version(other_user.pk) == foreign
+    TimeCounter.objects.filter(pk=counter.pk).delete()
+    assert get_data_version(other_user.pk) == foreign
+
+
+@pytest.mark.django_db
+def test_bulk_import_bumps_version(user, counter):
+    before = get_data_version(user.pk)
+    import_intervals(user, [{'day': '2024-01-01', 'start_time': '09:00', 'end_time': '10:00'}], counter=counter)
+    assert get_data_version(user.pk) != before
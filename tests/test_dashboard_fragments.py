@@ -0,0 +1,54 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from time_tracking_or.models import CounterDailySummary, TimeCounter
+
+
+def _fragment_post(client, name, counter, **extra):
+    data = {'fragment': 'card', 'date': timezone.localdate().isoformat(), 'next': '/', **extra}
+    return client.post(reverse(name, args=[counter.id]), data, HTTP_HX_REQUEST='true')
+
+
+@pytest.mark.django_db
+def test_start_returns_card_and_oob_pieces(auth_client, counter, user):
+    other = TimeCounter.objects.create(user=user, name='Study', color='#000000')
+    resp = _fragment_post(auth_client, 'counter_start', counter)
+    html = resp.content.decode('utf-8')
+    assert html.lstrip().startswith(f'<div id="counter-card-{counter.id}"')
+    assert 'id="dashboard-root"' not in html
+    assert 'id="dashboard-total" hx-swap-oob="true"' in html
+    assert 'id="dashboard-day-stats" hx-swap-oob="true"' in html
+    assert 'id="dashboard-chart" hx-swap-oob="true"' in html
+    # У соседней карточки «Старт» блокируется, пока идет другой счетчик
+    assert f'id="counter-start-{other.id}" hx-swap-oob="true"' in html
+    assert 'disabled' in html.split(f'id="counter-start-{other.id}"')[1].split('</button>')[0]
+    assert 'data-interval-timer' in html
+
+
+@pytest.mark.django_db
+def test_stop_fragment_reflects_closed_interval(auth_client, counter):
+    _fragment_post(auth_client, 'counter_start', counter)
+    summary = CounterDailySummary.objects.filter(counter=counter)
+    resp = _fragment_post(auth_client, 'counter_stop', counter)
+    html = resp.content.decode('utf-8')
+    assert summary.get().interval_count == 1
+    assert '1 интервал(ов) сегодня' in html
+    assert 'data-interval-timer' not in html
+
+
+@pytest.mark.django_db
+def test_fragment_is_smaller_than_full_dashboard(auth_client, counter, user):
+    for index in range(5):
+        TimeCounter.objects.create(user=user, name=f'Extra {index}', color='#123456')
+    full = auth_client.post(reverse('counter_start', args=[counter.id]), HTTP_HX_REQUEST='true')
+    auth_client.post(reverse('counter_stop', args=[counter.id]))
+    fragment = _fragment_post(auth_client, 'counter_start', counter)
+    assert len(fragment.content) < len(full.content)
+
+
+@pytest.mark.django_db
+def test_dashboard_cards_post_in_fragment_mode(auth_client, counter):
+    html = auth_client.get(reverse('home')).content.decode('utf-8')
+    assert f'hx-target="#counter-card-{counter.id}"' in html
+    assert 'name="fragment" value="card"' in html
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+
+from time_tracking_or import events
+from time_tracking_or.events import InProcessBus
+from time_tracking_or.views import CounterEventStreamView
+
+
+class RecordingBus:
+    def __init__(self):
+        self.sent = []
+
+    def publish(self, user_id, message):
+        self.sent.append((user_id, json.loads(message)))
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    recorder = RecordingBus()
+    monkeypatch.setattr(events, '_bus', recorder)
+    return recorder
+
+
+def test_in_process_bus_delivers_and_unsubscribes():
+    bus = InProcessBus()
+
+    async def scenario():
+        stream = bus.listen(7, heartbeat=5)
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        bus.publish(7, 'hello')
+        bus.publish(8, 'other user')
+        assert await pending == 'hello'
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    assert 7 not in bus._listeners
+
+
+def test_in_process_bus_heartbeat():
+    async def scenario():
+        stream = InProcessBus().listen(1, heartbeat=0.01)
+        try:
+            return await stream.__anext__()
+        finally:
+            await stream.aclose()
+
+    assert asyncio.run(scenario()) is None
+
+
+@pytest.mark.django_db
+def test_actions_publish_events_after_commit(auth_client, counter, user, bus, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(reverse('counter_start', args=[counter.id]), HTTP_X_CLIENT_ID='tab-1')
+        auth_client.post(reverse('counter_pause', args=[counter.id]))
+        auth_client.post(reverse('counter_start', args=[counter.id]))
+        auth_client.post(reverse('counter_stop', args=[counter.id]))
+    assert [event['type'] for _user_id, event in bus.sent] == ['start', 'pause', 'start', 'stop']
+    assert {user_id for user_id, _event in bus.sent} == {user.pk}
+    assert bus.sent[0][1]['counter_id'] == counter.id
+    assert bus.sent[0][1]['origin'] == 'tab-1'
+
+
+@pytest.mark.django_db
+def test_rejected_start_publishes_nothing(auth_client, counter, bus, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(reverse('counter_stop', args=[counter.id]))
+    assert bus.sent == []
+
+
+def _stream_request(user):
+    request = AsyncRequestFactory().get(reverse('counter_events'))
+
+    async def auser():
+        return user
+
+    request.auser = auser
+    return request
+
+
+@pytest.fixture
+def realtime_enabled(settings):
+    settings.REALTIME_EVENTS_ENABLED = True
+
+
+@pytest.mark.django_db
+def test_events_url_rendered_only_when_enabled(auth_client, settings):
+    settings.REALTIME_EVENTS_ENABLED = False
+    assert 'data-events-url' not in auth_client.get(reverse('counter_summary')).content.decode()
+    settings.REALTIME_EVENTS_ENABLED = True
+    content = auth_client.get(reverse('counter_summary')).content.decode()
+    assert f'data-events-url="{reverse("counter_events")}"' in content
+
+
+@pytest.mark.django_db
+def test_event_stream_disabled_by_default(user, settings):
+    settings.REALTIME_EVENTS_ENABLED = False
+    with pytest.raises(Http404):
+        asyncio.run(CounterEventStreamView.as_view()(_stream_request(user)))
+
+
+def test_event_stream_requires_login(realtime_enabled):
+    response = asyncio.run(CounterEventStreamView.as_view()(_stream_request(AnonymousUser())))
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_event_stream_response(user, realtime_enabled):
+    request = _stream_request(user)
+
+    async def scenario():
+        response = await CounterEventStreamView.as_view()(request)
+        first = await response.streaming_content.__anext__()
+        await response.streaming_content.aclose()
+        return response, first
+
+    response, first = asyncio.run(scenario())
+    assert response['Content-Type'] == 'text/event-stream'
+    assert response['Cache-Control'] == 'no-cache'
+    assert first == b'retry: 5000\n\n'
@@ -0,0 +1,78 @@
+import asyncio
+import json
+from datetime import date, time, timedelta
+
+import pytest
+from django.http import StreamingHttpResponse
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from time_tracking_or.exports import export_intervals_response
+from time_tracking_or.models import TimeCounter, TimeInterval
+
+
+def _body(resp):
+    return b''.join(resp.streaming_content).decode('utf-8')
+
+
+@pytest.mark.django_db
+def test_history_export_csv_honours_filters(auth_client, counter, user):
+    today = timezone.localdate()
+    TimeInterval.objects.create(counter=counter, user=user, day=today, start_time=time(9), end_time=time(10))
+    TimeInterval.objects.create(counter=counter, user=user, day=today - timedelta(days=10), start_time=time(9), end_time=time(9, 30))
+    url = reverse('counter_history_export', args=[counter.id])
+    resp = auth_client.get(url, {'format': 'csv', 'start': (today - timedelta(days=1)).isoformat()})
+    assert isinstance(resp, StreamingHttpResponse)
+    assert resp['Content-Disposition'].endswith('-history.csv"')
+    lines = _body(resp).strip().splitlines()
+    assert lines[0] == 'counter,day,start_time,end_time,duration_seconds'
+    assert lines[1:] == [f'Work,{today.isoformat()},09:00:00,10:00:00,3600']
+
+
+@pytest.mark.django_db
+def test_history_export_json(auth_client, counter, user):
+    TimeInterval.objects.create(counter=counter, user=user, start_time=time(9))
+    resp = auth_client.get(reverse('counter_history_export', args=[counter.id]), {'format': 'json'})
+    data = json.loads(_body(resp))
+    assert data == [{
+        'counter': 'Work', 'day': timezone.localdate().isoformat(),
+        'start_time': '09:00:00', 'end_time': None, 'duration_seconds': None,
+    }]
+
+
+@pytest.mark.django_db
+def test_history_export_is_owner_only(auth_client, other_user):
+    foreign = TimeCounter.objects.create(user=other_user, name='Foreign')
+    resp = auth_client.get(reverse('counter_history_export', args=[foreign.id]))
+    assert resp.status_code == 404
+
+
+@pytest.mark.django_db
+def test_summary_export_covers_period(auth_client, counter, user):
+    today = timezone.localdate()
+    other = TimeCounter.objects.create(user=user, name='Study', color='#000000')
+    TimeInterval.objects.create(counter=counter, user=user, day=today, start_time=time(9), end_time=time(10))
+    TimeInterval.objects.create(counter=other, user=user, day=today - timedelta(days=3), start_time=time(9), end_time=time(11))
+    TimeInterval.objects.create(counter=other, user=user, day=today - timedelta(days=30), start_time=time(9), end_time=time(11))
+    resp = auth_client.get(reverse('counter_summary_export'), {'format': 'json', 'period': 'week'})
+    data = json.loads(_body(resp))
+    assert [(row['counter'], row['duration_seconds']) for row in data] == [('Study', 7200), ('Work', 3600)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_streams_async_under_asgi(counter, user):
+    TimeInterval.objects.create(counter=counter, user=user, day=date(2024, 3, 6), start_time=time(9), end_time=time(10))
+    request = AsyncRequestFactory().get('/export/', {'format': 'json'})
+    resp = export_intervals_response(request, TimeInterval.objects.filter(user=user), 'history')
+    # Асинхронный поток: ASGI отдает строки по мере чтения, а не собирает список целиком
+    assert resp.is_async
+
+    async def collect():
+        return b''.join([chunk async for chunk in resp])
+
+    data = json.loads(asyncio.run(collect()).decode('utf-8'))
+    assert data == [{
+        'counter': 'Work', 'day': '2024-03-06',
+        'start_time': '09:00:00', 'end_time': '10:00:00', 'duration_seconds': 3600,
+    }]
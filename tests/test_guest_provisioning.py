@@ -0,0 +1,121 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.middleware import guest_username
+from time_tracking_or.models import ProjectRating, TimeCounter
+
+User = get_user_model()
+
+GUEST_IP = '203.0.113.7'
+
+
+@pytest.fixture
+def guest_client(client):
+    client.defaults['REMOTE_ADDR'] = GUEST_IP
+    return client
+
+
+@pytest.mark.django_db
+def test_read_only_visit_marks_session_without_user(guest_client):
+    response = guest_client.get(reverse('home'))
+    assert response.status_code == 200
+    assert 'time_tracking_main/counter_dashboard.html' in [t.name for t in response.templates]
+    assert guest_client.session['is_guest'] is True
+    assert not User.objects.filter(username=guest_username(GUEST_IP)).exists()
+    assert guest_client.get(reverse('counter_summary')).status_code == 200
+    assert guest_client.get(reverse('counter_create')).status_code == 200
+    assert not User.objects.filter(username__startswith='guest_').exists()
+
+
+@pytest.mark.django_db
+def test_first_write_action_creates_guest(guest_client):
+    guest_client.get(reverse('home'))
+    response = guest_client.post(reverse('counter_create'), {'name': 'Чтение', 'color': '#123456'})
+    assert response.status_code == 302
+    guest = User.objects.get(username=guest_username(GUEST_IP))
+    assert not guest.has_usable_password()
+    assert TimeCounter.objects.filter(user=guest, name='Чтение').exists()
+    assert guest_client.session['guest_user_id'] == guest.pk
+
+
+@pytest.mark.django_db
+def test_returning_guest_is_logged_in_on_read(client):
+    guest = User.objects.create_user(username=guest_username(GUEST_IP))
+    client.defaults['REMOTE_ADDR'] = GUEST_IP
+    response = client.get(reverse('home'))
+    assert response.wsgi_request.user == guest
+
+
+@pytest.mark.django_db
+def test_bots_and_excluded_paths_skip_users_table(client, django_assert_num_queries):
+    client.defaults['REMOTE_ADDR'] = GUEST_IP
+    with django_assert_num_queries(0):
+        client.get('/robots.txt')
+        client.get('/static/css/site.css')
+    client.get(reverse('home'), HTTP_USER_AGENT='Mozilla/5.0 (compatible; Googlebot/2.1)')
+    assert 'is_guest' not in client.session
+    assert not User.objects.filter(username__startswith='guest_').exists()
+
+
+@pytest.mark.django_db
+def test_guest_lookup_is_cached(guest_client):
+    guest_client.get(reverse('home'))
+    with CaptureQueriesContext(connection) as ctx:
+        guest_client.get(reverse('home'))
+    assert not [q['sql'] for q in ctx.captured_queries if 'auth_user' in q['sql']]
+
+
+@pytest.mark.django_db
+def test_pending_guest_can_rate_project(guest_client):
+    guest_client.get(reverse('home'))
+    response = guest_client.post(reverse('project_rating'), {'rating': 'like'}, HTTP_HX_REQUEST='true')
+    assert response.status_code == 200
+    guest = User.objects.get(username=guest_username(GUEST_IP))
+    assert ProjectRating.objects.get(user=guest).rating == 'like'
+
+
+@pytest.mark.django_db
+def test_first_write_keeps_csrf_token_valid():
+    client = Client(enforce_csrf_checks=True, REMOTE_ADDR=GUEST_IP)
+    client.get(reverse('home'))
+    token = client.cookies['csrftoken'].value
+    response = client.post(
+        reverse('project_rating'),
+        {'rating': 'dislike'},
+        HTTP_HX_REQUEST='true',
+        HTTP_X_CSRFTOKEN=token,
+    )
+    assert response.status_code == 200
+    guest = User.objects.get(username=guest_username(GUEST_IP))
+    assert ProjectRating.objects.get(user=guest).rating == 'dislike'
+
+
+@pytest.mark.django_db
+def test_vkid_login_after_browsing_as_guest_drops_guest_mode(guest_client, monkeypatch):
+    class Resp:
+        status_code = 200
+        text = 'raw'
+
+        def __init__(self, data):
+            self._data = data
+
+        def json(self):
+            return self._data
+
+    monkeypatch.setattr('accounts.views.requests.post', lambda url, data=None, headers=None: Resp({'access_token': 'abc'}))
+    monkeypatch.setattr('accounts.views.requests.get', lambda url, headers=None: Resp({'sub': '777', 'name': 'VK User'}))
+    guest_client.get(reverse('home'))
+    assert guest_client.session['is_guest'] is True
+
+    response = guest_client.get(reverse('vkid_callback'), {'code': 'code123', 'device_id': 'dev1'})
+    assert response.json()['success'] is True
+
+    assert 'is_guest' not in guest_client.session
+    assert 'guest_ip' not in guest_client.session
+    response = guest_client.get(reverse('counter_summary'))
+    assert response.context['guest_mode'] is False
+    assert response.wsgi_request.user.username == 'vkid_777'
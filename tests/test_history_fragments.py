@@ -0,0 +1,48 @@
+from datetime import time
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from time_tracking_or.models import TimeInterval
+
+ROW_TEMPLATE = 'time_tracking_main/partials/history_interval_row.html'
+
+
+def _row_renders(resp):
+    return [t.name for t in resp.templates].count(ROW_TEMPLATE)
+
+
+@pytest.mark.django_db
+def test_history_hx_renders_table_once_and_caches_rows(auth_client, counter, user):
+    for hour in range(5):
+        TimeInterval.objects.create(counter=counter, user=user, start_time=time(hour), end_time=time(hour, 30))
+    url = reverse('counter_pause', args=[counter.id])
+    first = auth_client.post(url, {'history': '1'}, HTTP_HX_REQUEST='true')
+    html = first.content.decode('utf-8')
+    assert [t.name for t in first.templates].count('time_tracking_main/partials/history_table.html') == 1
+    assert _row_renders(first) == 5
+    assert html.count('class="history-row"') == 5
+    assert '<div id="history-intervals" hx-swap-oob="true"' in html
+
+    second = auth_client.post(url, {'history': '1'}, HTTP_HX_REQUEST='true')
+    assert _row_renders(second) == 0
+    assert second.content.decode('utf-8').count('class="history-row"') == 5
+
+
+@pytest.mark.django_db
+def test_edited_row_is_not_served_from_cache(auth_client, counter, user):
+    interval = TimeInterval.objects.create(
+        counter=counter, user=user, day=timezone.localdate(), start_time=time(9), end_time=time(10),
+    )
+    auth_client.get(reverse('counter_history', args=[counter.id]))
+    resp = auth_client.post(
+        reverse('interval_update', args=[interval.id]),
+        {'day': interval.day.isoformat(), 'start_time': '09:00', 'end_time': '11:15', 'num': '1'},
+        HTTP_HX_REQUEST='true',
+    )
+    html = resp.content.decode('utf-8')
+    assert '11:15' in html
+    assert 'id="history-stats" hx-swap-oob="true"' in html
+    page = auth_client.get(reverse('counter_history', args=[counter.id])).content.decode('utf-8')
+    assert '11:15' in page
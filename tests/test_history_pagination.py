@@ -0,0 +1,75 @@
+from datetime import time, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from time_tracking_or.models import TimeInterval
+from time_tracking_or.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def history(counter, user):
+    today = timezone.localdate()
+    return [
+        TimeInterval.objects.create(
+            counter=counter, user=user, day=today - timedelta(days=i % 4),
+            start_time=time(9), end_time=time(10),
+        )
+        for i in range(25)
+    ]
+
+
+@pytest.mark.django_db
+def test_cursor_pages_cover_history_without_count(auth_client, counter, history):
+    url = reverse('counter_history', args=[counter.id])
+    with CaptureQueriesContext(connection) as ctx:
+        resp = auth_client.get(url)
+    assert not any('COUNT(*)' in q['sql'] for q in ctx.captured_queries)
+    seen = [i.id for i in resp.context['intervals']]
+    assert resp.context['start_number'] == 1
+    cursor = resp.context['next_cursor']
+    while cursor:
+        resp = auth_client.get(url, {'cursor': cursor}, HTTP_HX_REQUEST='true')
+        assert resp.templates[0].name == 'time_tracking_main/partials/history_rows.html'
+        assert resp.context['start_number'] == len(seen) + 1
+        seen.extend(i.id for i in resp.context['intervals'])
+        cursor = resp.context['next_cursor']
+    expected = list(
+        TimeInterval.objects.filter(counter=counter).order_by('-day', '-date_create', '-id').values_list('id', flat=True)
+    )
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_numbered_pages_on_demand(auth_client, counter, history):
+    resp = auth_client.get(reverse('counter_history', args=[counter.id]), {'page': 3})
+    assert resp.context['page_obj'].number == 3
+    assert resp.context['paginator'].count == 25
+    assert len(resp.context['intervals']) == 5
+
+
+@pytest.mark.django_db
+def test_malformed_cursor_starts_from_top(auth_client, counter, history):
+    resp = auth_client.get(reverse('counter_history', args=[counter.id]), {'cursor': 'garbage'})
+    assert resp.status_code == 200
+    assert resp.context['start_number'] == 1
+
+
+@pytest.mark.django_db
+def test_cursor_round_trip(interval):
+    day, created, pk, shown = decode_cursor(encode_cursor(interval, 10))
+    assert (day, created, pk, shown) == (interval.day, interval.date_create, interval.pk, 10)
+
+
+@pytest.mark.django_db
+def test_load_more_skips_range_aggregates(auth_client, counter, history):
+    url = reverse('counter_history', args=[counter.id])
+    cursor = auth_client.get(url).context['next_cursor']
+    with CaptureQueriesContext(connection) as ctx:
+        resp = auth_client.get(url, {'cursor': cursor}, HTTP_HX_REQUEST='true')
+    assert resp.templates[0].name == 'time_tracking_main/partials/history_rows.html'
+    assert 'total_duration' not in resp.context
+    assert not any('SUM(' in q['sql'] or 'COUNT(' in q['sql'] for q in ctx.captured_queries)
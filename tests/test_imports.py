@@ -0,0 +1,112 @@
+import json
+from datetime import date, timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from time_tracking_or.imports import import_intervals
+from time_tracking_or.models import (
+    CounterDailySummary,
+    DailySummary,
+    TimeCounter,
+    TimeInterval,
+)
+
+
+@pytest.mark.django_db
+def test_import_creates_intervals_and_rebuilds_summaries(user, counter, django_capture_on_commit_callbacks):
+    rows = [
+        {'counter': 'Work', 'day': '2024-01-02', 'start_time': '09:00', 'end_time': '10:30'},
+        {'counter': 'Study', 'day': '2024-01-02', 'start_time': '23:00', 'end_time': '01:00'},
+        {'counter': 'Work', 'day': '2024-01-03', 'start_time': '09:00', 'end_time': '09:15'},
+    ]
+    with django_capture_on_commit_callbacks(execute=True):
+        result = import_intervals(user, rows)
+    assert result == (3, [])
+    study = TimeCounter.objects.get(user=user, name='Study')
+    assert TimeInterval.objects.get(counter=study).duration == timedelta(hours=2)
+    day = DailySummary.objects.get(user=user, date=date(2024, 1, 2))
+    assert (day.interval_count, day.total_time) == (2, timedelta(hours=3, minutes=30))
+    assert CounterDailySummary.objects.get(counter=counter, date=date(2024, 1, 3)).total_time == timedelta(minutes=15)
+
+
+@pytest.mark.django_db
+def test_import_skips_invalid_rows(user, counter):
+    rows = [
+        {'day': '2024-01-02', 'start_time': '09:00', 'end_time': '10:00'},
+        {'day': 'bad', 'start_time': '09:00', 'end_time': '10:00'},
+        {'day': '2024-01-02', 'start_time': '09:00', 'end_time': ''},
+    ]
+    result = import_intervals(user, rows, counter=counter)
+    assert result.created == 1
+    assert [number for number, _error in result.errors] == [2, 3]
+
+
+@pytest.mark.django_db
+def test_import_batches_inserts(user, counter, django_capture_on_commit_callbacks):
+    rows = [
+        {'day': '2024-01-01', 'start_time': '09:00', 'end_time': '09:01'}
+        for _ in range(25)
+    ]
+    with django_capture_on_commit_callbacks(execute=True), CaptureQueriesContext(connection) as ctx:
+        import_intervals(user, rows, counter=counter, batch_size=10)
+    inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "time_tracking_or_timeinterval"')]
+    assert len(inserts) == 3
+    assert DailySummary.objects.get(user=user, date=date(2024, 1, 1)).interval_count == 25
+
+
+@pytest.mark.django_db
+def test_import_view_accepts_csv_upload(auth_client, counter):
+    content = 'counter,day,start_time,end_time,duration_seconds\nWork,2024-02-01,08:00:00,09:00:00,3600\n'
+    upload = SimpleUploadedFile('intervals.csv', content.encode('utf-8'), content_type='text/csv')
+    resp = auth_client.post(reverse('counter_import', args=[counter.id]), {'file': upload})
+    assert resp.status_code == 302
+    assert TimeInterval.objects.filter(counter=counter, day=date(2024, 2, 1)).count() == 1
+
+
+@pytest.mark.django_db
+def test_import_view_rejects_broken_json(auth_client):
+    upload = SimpleUploadedFile('intervals.json', b'{not json', content_type='application/json')
+    resp = auth_client.post(reverse('interval_import'), {'file': upload})
+    assert resp.status_code == 200
+    assert resp.context['form'].errors['file']
+
+
+@pytest.mark.django_db
+def test_import_intervals_command(tmp_path, user, counter):
+    path = tmp_path / 'intervals.json'
+    path.write_text(json.dumps([{'counter': 'Work', 'day': '2024-03-01', 'start_time': '10:00', 'end_time': '11:00'}]))
+    out = StringIO()
+    call_command('import_intervals', str(path), user=user.username, stdout=out)
+    assert 'Импортировано интервалов: 1' in out.getvalue()
+    assert TimeInterval.objects.filter(counter=counter, day=date(2024, 3, 1)).exists()
+
+
+@pytest.mark.django_db
+def test_import_rejects_too_long_counter_name(user):
+    rows = [{'counter': 'x' * 256, 'day': '2024-01-02', 'start_time': '09:00', 'end_time': '10:00'}]
+    result = import_intervals(user, rows)
+    assert result.created == 0
+    assert result.errors[0][0] == 1
+    assert not TimeCounter.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+def test_guest_import_respects_counter_limit(client, settings):
+    settings.GUEST_COUNTER_LIMIT = 2
+    client.defaults['REMOTE_ADDR'] = '203.0.113.50'
+    content = 'counter,day,start_time,end_time\n' + ''.join(
+        f'Counter {number},2024-02-01,08:00:00,09:00:00\n' for number in range(5)
+    )
+    upload = SimpleUploadedFile('intervals.csv', content.encode('utf-8'), content_type='text/csv')
+    resp = client.post(reverse('interval_import'), {'file': upload})
+    assert resp.status_code == 302
+    guest = User.objects.get(username__startswith='guest_')
+    assert TimeCounter.objects.filter(user=guest).count() == 2
+    assert TimeInterval.objects.filter(user=guest).count() == 2
@@ -64,6 +64,10 @@ def test_sitemap_interval(client, user, counter):
     ti = TimeInterval.objects.create(counter=counter, user=user, day=timezone.localdate(), start_time=time(9), end_time=time(9,30))
     resp = client.get('/sitemap.xml')
     assert resp.status_code == 200
+    section = f'/sitemap-{ti.day:%Y-%m}.xml'
+    assert section in resp.content.decode('utf-8')
+    resp = client.get(section)
+    assert resp.status_code == 200
     assert ti.get_absolute_url() in resp.content.decode('utf-8')
 
 @pytest.mark.django_db
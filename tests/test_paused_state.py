@@ -0,0 +1,41 @@
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from time_tracking_or.models import TimeCounter
+
+
+def _post(client, name, counter):
+    return client.post(reverse(name, args=[counter.id]), {'next': '/'})
+
+
+@pytest.mark.django_db
+def test_pause_is_stored_on_counter_not_session(auth_client, counter):
+    _post(auth_client, 'counter_start', counter)
+    _post(auth_client, 'counter_pause', counter)
+    counter.refresh_from_db()
+    assert counter.is_paused
+    assert counter.active_interval_id is None
+    assert 'paused_counters' not in auth_client.session
+
+
+@pytest.mark.django_db
+def test_start_and_stop_clear_pause(auth_client, counter):
+    _post(auth_client, 'counter_start', counter)
+    _post(auth_client, 'counter_pause', counter)
+    _post(auth_client, 'counter_start', counter)
+    assert not TimeCounter.objects.get(pk=counter.pk).is_paused
+    _post(auth_client, 'counter_pause', counter)
+    _post(auth_client, 'counter_start', counter)
+    _post(auth_client, 'counter_stop', counter)
+    assert not TimeCounter.objects.get(pk=counter.pk).is_paused
+
+
+@pytest.mark.django_db
+def test_paused_state_is_shared_between_devices(auth_client, counter, user):
+    _post(auth_client, 'counter_start', counter)
+    _post(auth_client, 'counter_pause', counter)
+    other_device = Client()
+    other_device.force_login(user)
+    response = other_device.get(reverse('home'))
+    assert response.context['paused_counters'] == [counter.id]
@@ -0,0 +1,39 @@
+from datetime import time, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from time_tracking_or.management.commands.explain_hot_queries import is_sequential_scan
+from time_tracking_or.models import TimeCounter, TimeInterval
+
+
+@pytest.mark.django_db
+def test_explain_hot_queries_uses_indexes(user, counter):
+    other = TimeCounter.objects.create(user=user, name='Study', color='#000000')
+    today = timezone.localdate()
+    for offset in range(5):
+        for c in (counter, other):
+            TimeInterval.objects.create(
+                counter=c, user=user, day=today - timedelta(days=offset),
+                start_time=time(9), end_time=time(10),
+            )
+    TimeInterval.objects.create(counter=counter, user=user, day=today, start_time=time(11))
+    out = StringIO()
+    call_command('explain_hot_queries', '--user', user.username, stdout=out)
+    output = out.getvalue()
+    assert 'TimeCounterListView' in output
+    assert 'CounterHistoryView' in output
+    assert 'CounterSummaryView' in output
+    assert 'Полных сканирований таблицы интервалов нет.' in output
+
+
+@pytest.mark.parametrize('line,expected', [
+    ('SCAN time_tracking_or_timeinterval', True),
+    ('SEARCH time_tracking_or_timeinterval USING INDEX interval_user_day_idx (user_id=? AND day=?)', False),
+    ('SCAN time_tracking_or_timeinterval USING INDEX interval_counter_recent_idx', False),
+    ('SCAN time_tracking_or_timecounter', False),
+])
+def test_is_sequential_scan_sqlite(line, expected):
+    assert is_sequential_scan(line, 'time_tracking_or_timeinterval') is expected
@@ -0,0 +1,47 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from time_tracking_or.models import ProjectRating, ProjectRatingStats
+from time_tracking_or.ratings import get_rating_stats, reconcile_rating_stats
+from time_tracking_or.tasks import reconcile_project_rating_stats
+
+
+@pytest.mark.django_db
+def test_vote_and_flip_shift_totals(auth_client):
+    reconcile_rating_stats()
+    auth_client.post(reverse('project_rating'), {'rating': 'like'})
+    assert get_rating_stats() == {'total_likes': 1, 'total_dislikes': 0, 'total_ratings': 1}
+    auth_client.post(reverse('project_rating'), {'rating': 'dislike'})
+    assert get_rating_stats() == {'total_likes': 0, 'total_dislikes': 1, 'total_ratings': 1}
+    auth_client.post(reverse('project_rating'), {'rating': 'dislike'})
+    assert get_rating_stats()['total_dislikes'] == 1
+
+
+@pytest.mark.django_db
+def test_deleting_voter_releases_vote(auth_client, user):
+    auth_client.post(reverse('project_rating'), {'rating': 'like'})
+    user.delete()
+    assert get_rating_stats()['total_ratings'] == 0
+
+
+@pytest.mark.django_db
+def test_reconcile_task_fixes_drift(user, other_user):
+    ProjectRating.objects.create(user=user, rating='like')
+    ProjectRating.objects.create(user=other_user, rating='dislike')
+    ProjectRatingStats.objects.update_or_create(pk=1, defaults={'likes': 7, 'dislikes': 0})
+    reconcile_project_rating_stats()
+    assert get_rating_stats() == {'total_likes': 1, 'total_dislikes': 1, 'total_ratings': 2}
+
+
+@pytest.mark.django_db
+def test_dashboard_reads_stats_without_aggregate(auth_client):
+    reconcile_rating_stats()
+    for index in range(3):
+        voter = User.objects.create_user(username=f'voter{index}', password='x')
+        ProjectRating.objects.create(user=voter, rating='like')
+    with CaptureQueriesContext(connection) as ctx:
+        auth_client.get(reverse('home'))
+    assert not [q for q in ctx.captured_queries if 'COUNT' in q['sql'] and 'projectrating"' in q['sql']]
@@ -0,0 +1,147 @@
+import multiprocessing
+from datetime import date, time, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from time_tracking_or.management.commands.verify_summaries import split_user_ids
+from time_tracking_or.models import (
+    CounterDailySummary,
+    CounterMonthlySummary,
+    CounterWeeklySummary,
+    DailySummary,
+    TimeCounter,
+    TimeInterval,
+)
+from time_tracking_or.rebuild import rebuild_summaries
+from time_tracking_or.tasks import rebuild_summaries_task
+
+DAY = date(2024, 3, 6)
+
+
+def _log(counter, day, hours=1):
+    TimeInterval.objects.create(
+        counter=counter, user=counter.user, day=day, start_time=time(9), end_time=time(9 + hours),
+    )
+
+
+def _daily(user):
+    return dict(DailySummary.objects.filter(user=user).values_list('date', 'total_time'))
+
+
+@pytest.mark.django_db
+def test_rebuild_writes_all_rollups_and_drops_stale(counter, user):
+    _log(counter, DAY, 2)
+    _log(counter, DAY)
+    _log(counter, DAY + timedelta(days=30))
+    DailySummary.objects.create(user=user, date=DAY, interval_count=9, total_time=timedelta(hours=9))
+    DailySummary.objects.create(user=user, date=DAY - timedelta(days=1), interval_count=1, total_time=timedelta(1))
+    CounterWeeklySummary.objects.create(counter=counter, user=user, period_start=date(2020, 1, 6), interval_count=1)
+
+    stats = rebuild_summaries()
+
+    assert stats['users_done'] == 1
+    assert _daily(user) == {DAY: timedelta(hours=3), DAY + timedelta(days=30): timedelta(hours=1)}
+    assert CounterDailySummary.objects.get(counter=counter, date=DAY).interval_count == 2
+    assert CounterMonthlySummary.objects.get(counter=counter, period_start=date(2024, 3, 1)).total_time == timedelta(hours=3)
+    assert CounterMonthlySummary.objects.get(counter=counter, period_start=date(2024, 4, 1)).interval_count == 1
+    assert CounterWeeklySummary.objects.get(counter=counter, period_start=date(2024, 3, 4)).interval_count == 2
+    assert not CounterWeeklySummary.objects.filter(period_start=date(2020, 1, 6)).exists()
+    assert stats['deleted_rows'] == 2
+
+
+@pytest.mark.django_db
+def test_rebuild_is_limited_to_range_and_users(counter, user, other_user):
+    other_counter = TimeCounter.objects.create(user=other_user, name='Other')
+    _log(counter, DAY)
+    _log(counter, DAY + timedelta(days=10))
+    _log(other_counter, DAY)
+
+    rebuild_summaries(start=DAY, end=DAY + timedelta(days=1), user_ids=[user.pk])
+
+    assert _daily(user) == {DAY: timedelta(hours=1)}
+    assert not DailySummary.objects.filter(user=other_user).exists()
+    # Месяц пересчитан целиком по суточным строкам — день вне диапазона еще не перестроен
+    assert CounterMonthlySummary.objects.get(counter=counter).interval_count == 1
+
+
+@pytest.mark.django_db
+def test_rebuild_groups_per_chunk(counter, user, other_user):
+    other_counter = TimeCounter.objects.create(user=other_user, name='Other')
+    for offset in range(20):
+        _log(counter, DAY + timedelta(days=offset))
+        _log(other_counter, DAY + timedelta(days=offset))
+    progress = []
+    with CaptureQueriesContext(connection) as ctx:
+        rebuild_summaries(chunk_size=1, progress=progress.append)
+    interval_reads = [q['sql'] for q in ctx.captured_queries if 'GROUP BY' in q['sql'] and 'timeinterval' in q['sql']]
+    # Один GROUP BY (user, day) и один (counter, day) на пачку
+    assert len(interval_reads) == 4
+    assert [item['users_done'] for item in progress] == [1, 2]
+    assert DailySummary.objects.count() == 40
+
+
+@pytest.mark.django_db
+def test_rebuild_command_and_task(counter, user):
+    _log(counter, DAY)
+    out = StringIO()
+    call_command('rebuild_summaries', '--user', user.username, '--start', DAY.isoformat(), stdout=out)
+    assert 'Готово' in out.getvalue()
+    assert _daily(user) == {DAY: timedelta(hours=1)}
+
+    DailySummary.objects.all().delete()
+    result = rebuild_summaries_task.delay(DAY.isoformat(), None, [user.pk]).get()
+    assert result['success'] is True
+    assert _daily(user) == {DAY: timedelta(hours=1)}
+
+
+def test_split_user_ids_covers_space():
+    ranges = split_user_ids(3, 12, 4)
+    assert ranges == [(3, 6), (6, 9), (9, 11), (11, 13)]
+    assert split_user_ids(5, 5, 8) == [(5, 6)]
+
+
+@pytest.mark.django_db
+def test_verify_summaries_reports_and_fixes(counter, user, other_user):
+    _log(counter, DAY)
+    rebuild_summaries()
+    DailySummary.objects.filter(user=user, date=DAY).update(interval_count=5)
+    DailySummary.objects.create(user=other_user, date=DAY, interval_count=1, total_time=timedelta(hours=1))
+
+    out = StringIO()
+    with pytest.raises(CommandError, match='Найдено расхождений: 2'):
+        call_command('verify_summaries', '--workers', '1', stdout=out)
+    assert f'user={user.pk} {DAY:%Y-%m-%d}' in out.getvalue()
+
+    call_command('verify_summaries', '--workers', '1', '--fix', stdout=StringIO())
+    assert _daily(user) == {DAY: timedelta(hours=1)}
+    assert not DailySummary.objects.filter(user=other_user).exists()
+    out = StringIO()
+    call_command('verify_summaries', '--workers', '1', stdout=out)
+    assert 'Расхождений нет' in out.getvalue()
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork',
+    reason='тестовая БД в памяти видна только процессам, созданным через fork',
+)
+@pytest.mark.django_db(transaction=True)
+def test_verify_summaries_in_worker_processes(counter, user, other_user):
+    other_counter = TimeCounter.objects.create(user=other_user, name='Other')
+    _log(counter, DAY)
+    _log(other_counter, DAY)
+    rebuild_summaries()
+    DailySummary.objects.filter(user=user, date=DAY).update(interval_count=5)
+
+    out = StringIO()
+    with pytest.raises(CommandError, match='Найдено расхождений: 1.*процессов: 2'):
+        call_command('verify_summaries', '--workers', '2', stdout=out)
+    assert f'user={user.pk} {DAY:%Y-%m-%d}' in out.getvalue()
+
+    out = StringIO()
+    call_command('verify_summaries', '--workers', '2', '--fix', stdout=out)
+    assert 'Исправлено расхождений: 1' in out.getvalue()
+    assert DailySummary.objects.get(user=user, date=DAY).interval_count == 1
@@ -0,0 +1,110 @@
+from datetime import time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from time_tracking_or.models import TimeCounter, TimeInterval
+
+
+@pytest.mark.django_db
+def test_start_and_stop_maintain_active_interval(auth_client, counter):
+    auth_client.post(reverse('counter_start', args=[counter.id]))
+    counter.refresh_from_db()
+    interval = TimeInterval.objects.get(counter=counter, end_time__isnull=True)
+    assert counter.active_interval_id == interval.id
+    assert counter.is_running
+    auth_client.post(reverse('counter_stop', args=[counter.id]))
+    counter.refresh_from_db()
+    assert counter.active_interval_id is None
+    assert not counter.is_running
+
+
+@pytest.mark.django_db
+def test_pause_clears_active_interval(auth_client, counter):
+    auth_client.post(reverse('counter_start', args=[counter.id]))
+    auth_client.post(reverse('counter_pause', args=[counter.id]))
+    counter.refresh_from_db()
+    assert counter.active_interval_id is None
+
+
+@pytest.mark.django_db
+def test_is_running_issues_no_queries(counter):
+    counter = TimeCounter.objects.get(pk=counter.pk)
+    with CaptureQueriesContext(connection) as ctx:
+        assert counter.is_running is False
+    assert len(ctx.captured_queries) == 0
+
+
+@pytest.mark.django_db
+def test_dashboard_reads_running_state_from_counter(auth_client, counter):
+    auth_client.post(reverse('counter_start', args=[counter.id]))
+    resp = auth_client.get(reverse('home'))
+    assert resp.context['active_counter_id'] == counter.id
+    assert resp.context['counter_stats'][counter.id]['active_interval'] is not None
+
+
+@pytest.mark.django_db
+def test_stop_falls_back_when_pointer_is_stale(auth_client, counter, user):
+    TimeInterval.objects.create(counter=counter, user=user, start_time=time(9))
+    auth_client.post(reverse('counter_stop', args=[counter.id]))
+    assert not TimeInterval.objects.filter(counter=counter, end_time__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_repair_running_state_command(counter, user):
+    open_interval = TimeInterval.objects.create(counter=counter, user=user, start_time=time(9))
+    other = TimeCounter.objects.create(user=user, name='Stale', color='#000000')
+    closed = TimeInterval.objects.create(counter=other, user=user, start_time=time(8), end_time=time(9))
+    TimeCounter.objects.filter(pk=other.pk).update(active_interval=closed)
+
+    out = StringIO()
+    call_command('repair_running_state', '--dry-run', stdout=out)
+    assert 'Найдено расхождений: 2' in out.getvalue()
+    counter.refresh_from_db()
+    assert counter.active_interval_id is None
+
+    call_command('repair_running_state', stdout=StringIO())
+    counter.refresh_from_db()
+    other.refresh_from_db()
+    assert counter.active_interval_id == open_interval.id
+    assert other.active_interval_id is None
+
+
+@pytest.mark.django_db
+def test_database_allows_one_open_interval_per_user(counter, user):
+    from django.db import IntegrityError, transaction
+    other = TimeCounter.objects.create(user=user, name='Second', color='#000000')
+    TimeInterval.objects.create(counter=counter, user=user, start_time=time(9))
+    with pytest.raises(IntegrityError), transaction.atomic():
+        TimeInterval.objects.create(counter=other, user=user, start_time=time(10))
+
+
+@pytest.mark.django_db
+def test_start_translates_constraint_violation(auth_client, counter, user):
+    from django.contrib.messages import get_messages
+    other = TimeCounter.objects.create(user=user, name='Second', color='#000000')
+    # Открытый интервал без денормализованного указателя — как при гонке двух вкладок
+    TimeInterval.objects.create(counter=counter, user=user, start_time=time(9))
+
+    resp = auth_client.post(reverse('counter_start', args=[other.id]))
+    assert [str(m) for m in get_messages(resp.wsgi_request)] == [
+        'Невозможно делать два дела одновременно. Завершите текущий счетчик.'
+    ]
+    resp = auth_client.post(reverse('counter_start', args=[counter.id]))
+    assert [str(m) for m in get_messages(resp.wsgi_request)][-1] == 'Счетчик уже запущен.'
+    assert TimeInterval.objects.filter(user=user, end_time__isnull=True).count() == 1
+
+
+@pytest.mark.django_db
+def test_start_happy_path_query_budget(auth_client, counter):
+    with CaptureQueriesContext(connection) as ctx:
+        auth_client.post(reverse('counter_start', args=[counter.id]))
+    interval_selects = [
+        q['sql'] for q in ctx.captured_queries
+        if q['sql'].startswith('SELECT') and 'FROM "time_tracking_or_timeinterval"' in q['sql']
+    ]
+    assert interval_selects == []
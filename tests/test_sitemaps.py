@@ -0,0 +1,55 @@
+from datetime import date, time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from time_tracking_or.models import TimeInterval
+from time_tracking_or.sitemaps import IntervalSitemaps
+
+
+def _interval(counter, user, day):
+    return TimeInterval.objects.create(
+        counter=counter, user=user, day=day, start_time=time(9), end_time=time(10),
+    )
+
+
+@pytest.mark.django_db
+def test_index_has_one_section_per_month_with_intervals(client, counter, user):
+    _interval(counter, user, date(2026, 1, 15))
+    _interval(counter, user, date(2026, 3, 2))
+    assert list(IntervalSitemaps()) == ['2026-01', '2026-03']
+    html = client.get('/sitemap.xml').content.decode('utf-8')
+    assert '/sitemap-2026-01.xml' in html
+    assert '/sitemap-2026-03.xml' in html
+    # Месяц без интервалов не попадает в индекс
+    assert '/sitemap-2026-02.xml' not in html
+
+
+@pytest.mark.django_db
+def test_section_lists_only_its_month(client, counter, user):
+    january = _interval(counter, user, date(2026, 1, 31))
+    february = _interval(counter, user, date(2026, 2, 1))
+    html = client.get('/sitemap-2026-01.xml').content.decode('utf-8')
+    assert january.get_absolute_url() in html
+    assert february.get_absolute_url() not in html
+
+
+@pytest.mark.django_db
+def test_invalid_section_is_404(client):
+    assert client.get('/sitemap-2026-13.xml').status_code == 404
+    assert client.get('/sitemap-latest.xml').status_code == 404
+
+
+@pytest.mark.django_db
+def test_section_is_cached_until_interval_write(client, counter, user):
+    first = _interval(counter, user, date(2026, 1, 10))
+    client.get('/sitemap-2026-01.xml')
+    with CaptureQueriesContext(connection) as ctx:
+        cached = client.get('/sitemap-2026-01.xml')
+    assert not [q for q in ctx.captured_queries if 'time_tracking_or_timeinterval' in q['sql']]
+    assert first.get_absolute_url() in cached.content.decode('utf-8')
+
+    second = _interval(counter, user, date(2026, 1, 11))
+    html = client.get('/sitemap-2026-01.xml').content.decode('utf-8')
+    assert second.get_absolute_url() in html
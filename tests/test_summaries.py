@@ -0,0 +1,299 @@
+from datetime import date, time, timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from time_tracking_or import summaries, tasks as summary_tasks
+from time_tracking_or.models import (
+    CounterDailySummary,
+    CounterMonthlySummary,
+    CounterWeeklySummary,
+    DailySummary,
+    DirtySummaryDay,
+    TimeCounter,
+    TimeInterval,
+)
+from time_tracking_or.summaries import (
+    apply_daily_summary_delta,
+    counter_totals_for_range,
+    interval_contribution,
+    mark_summaries_dirty,
+    plan_range,
+    recalculate_counter_summary,
+    recalculate_daily_summary,
+    update_summaries_for_interval,
+)
+
+
+def _summary(user, day):
+    return DailySummary.objects.filter(user=user, date=day).values_list('interval_count', 'total_time').first()
+
+
+@pytest.mark.django_db
+def test_delta_creates_updates_and_removes_row(user):
+    day = timezone.localdate()
+    apply_daily_summary_delta(user.id, day, timedelta(hours=1), 1)
+    apply_daily_summary_delta(user.id, day, timedelta(minutes=30), 1)
+    assert _summary(user, day) == (2, timedelta(hours=1, minutes=30))
+    apply_daily_summary_delta(user.id, day, -timedelta(hours=1), -1)
+    assert _summary(user, day) == (1, timedelta(minutes=30))
+    apply_daily_summary_delta(user.id, day, -timedelta(minutes=30), -1)
+    assert _summary(user, day) is None
+
+
+@pytest.mark.django_db
+def test_negative_delta_on_missing_row_repairs_from_intervals(user, interval, django_capture_on_commit_callbacks):
+    day = interval.day
+    DailySummary.objects.filter(user=user).delete()
+    with django_capture_on_commit_callbacks(execute=True):
+        apply_daily_summary_delta(user.id, day, -timedelta(minutes=5), -1)
+    assert _summary(user, day) == (1, timedelta(hours=1, minutes=30))
+
+
+@pytest.mark.django_db
+def test_moving_interval_to_other_day(user, interval):
+    today = interval.day
+    recalculate_daily_summary(user, today)
+    before = interval_contribution(interval)
+    interval.day = today - timedelta(days=1)
+    interval.save()
+    update_summaries_for_interval(before, interval_contribution(interval))
+    assert _summary(user, today) is None
+    assert _summary(user, interval.day) == (1, timedelta(hours=1, minutes=30))
+
+
+@pytest.mark.django_db
+def test_open_interval_does_not_contribute(counter, user):
+    ti = TimeInterval.objects.create(counter=counter, user=user, start_time=time(9))
+    assert interval_contribution(ti) is None
+
+
+@pytest.mark.django_db
+def test_stop_applies_delta_without_aggregate(auth_client, counter, user):
+    day = timezone.localdate()
+    for hour in range(8):
+        TimeInterval.objects.create(counter=counter, user=user, day=day, start_time=time(hour), end_time=time(hour, 30))
+    recalculate_daily_summary(user, day)
+    auth_client.post(reverse('counter_start', args=[counter.id]))
+    with CaptureQueriesContext(connection) as ctx:
+        auth_client.post(reverse('counter_stop', args=[counter.id]))
+    summary_sql = [q['sql'] for q in ctx.captured_queries if 'dailysummary' in q['sql']]
+    assert summary_sql and not any('SUM(' in sql for sql in summary_sql)
+    count, total = _summary(user, day)
+    assert count == 9
+    recalculate_daily_summary(user, day)
+    assert _summary(user, day) == (count, total)
+
+
+@pytest.mark.django_db
+def test_edit_and_delete_keep_summary_consistent(auth_client, counter, user, interval):
+    day = interval.day
+    recalculate_daily_summary(user, day)
+    auth_client.post(reverse('interval_update', args=[interval.id]), {
+        'day': day.isoformat(), 'start_time': '09:00', 'end_time': '09:15',
+    })
+    assert _summary(user, day) == (1, timedelta(minutes=15))
+    auth_client.post(reverse('interval_delete', args=[interval.id]))
+    assert _summary(user, day) is None
+
+
+@pytest.mark.django_db
+def test_counter_rollup_follows_interval_writes(auth_client, counter, user):
+    from time_tracking_or.models import CounterDailySummary
+    day = timezone.localdate()
+    auth_client.post(reverse('counter_manual_interval', args=[counter.id]), {
+        'day': day.isoformat(), 'start_time': '09:00', 'end_time': '10:00',
+    })
+    rollup = CounterDailySummary.objects.get(counter=counter, date=day)
+    assert (rollup.user_id, rollup.interval_count, rollup.total_time) == (user.id, 1, timedelta(hours=1))
+    interval = TimeInterval.objects.get(counter=counter)
+    auth_client.post(reverse('interval_delete', args=[interval.id]))
+    assert not CounterDailySummary.objects.filter(counter=counter).exists()
+
+
+@pytest.mark.django_db
+def test_dashboard_reads_totals_from_counter_rollup(auth_client, counter, user):
+    day = timezone.localdate()
+    auth_client.post(reverse('counter_manual_interval', args=[counter.id]), {
+        'day': day.isoformat(), 'start_time': '09:00', 'end_time': '10:30',
+    })
+    with CaptureQueriesContext(connection) as ctx:
+        resp = auth_client.get(reverse('home'))
+    assert resp.context['counter_stats'][counter.id]['total_duration'] == timedelta(hours=1, minutes=30)
+    assert resp.context['chart_values'] == [1.5]
+    assert not any('SUM(' in q['sql'] for q in ctx.captured_queries if 'timeinterval' in q['sql'])
+
+
+def test_plan_range_prefers_months_then_weeks():
+    # 2024-01-15 — понедельник; январь неполный, февраль и март целые
+    plan = plan_range(date(2024, 1, 15), date(2024, 3, 31))
+    assert plan.months == [date(2024, 2, 1), date(2024, 3, 1)]
+    assert plan.weeks == [date(2024, 1, 15), date(2024, 1, 22)]
+    assert plan.days == [(date(2024, 1, 29), date(2024, 1, 31))]
+
+
+def test_plan_range_covers_every_day_once():
+    start, end = date(2023, 11, 3), date(2025, 2, 17)
+    plan = plan_range(start, end)
+    covered = []
+    for first in plan.months:
+        day = first
+        while day.month == first.month:
+            covered.append(day)
+            day += timedelta(days=1)
+    for monday in plan.weeks:
+        covered.extend(monday + timedelta(days=offset) for offset in range(7))
+    for first, last in plan.days:
+        covered.extend(first + timedelta(days=offset) for offset in range((last - first).days + 1))
+    assert sorted(covered) == [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    assert len(plan.months) + len(plan.weeks) + len(plan.days) < 25
+
+
+@pytest.mark.django_db
+def test_period_rollups_follow_interval_writes(auth_client, counter, user):
+    day = timezone.localdate()
+    for start, end in (('09:00', '10:00'), ('11:00', '11:30')):
+        auth_client.post(reverse('counter_manual_interval', args=[counter.id]), {
+            'day': day.isoformat(), 'start_time': start, 'end_time': end,
+        })
+    week = CounterWeeklySummary.objects.get(counter=counter)
+    month = CounterMonthlySummary.objects.get(counter=counter)
+    assert week.period_start == day - timedelta(days=day.weekday())
+    assert month.period_start == day.replace(day=1)
+    assert (week.interval_count, week.total_time) == (2, timedelta(hours=1, minutes=30))
+    assert (month.interval_count, month.total_time) == (2, timedelta(hours=1, minutes=30))
+    for interval in TimeInterval.objects.filter(counter=counter):
+        auth_client.post(reverse('interval_delete', args=[interval.id]))
+    assert not CounterWeeklySummary.objects.exists()
+    assert not CounterMonthlySummary.objects.exists()
+
+
+@pytest.mark.django_db
+def test_range_totals_match_raw_intervals(counter, user):
+    days = [date(2024, 1, 30), date(2024, 2, 5), date(2024, 2, 14), date(2024, 3, 3), date(2024, 4, 2)]
+    for day in days:
+        TimeInterval.objects.create(counter=counter, user=user, day=day, start_time=time(9), end_time=time(10))
+        recalculate_counter_summary(counter.id, day)
+    totals = counter_totals_for_range(user.id, date(2024, 1, 29), date(2024, 3, 31))
+    assert len(totals) == 1
+    assert totals[0]['counter__name'] == counter.name
+    assert (totals[0]['interval_count'], totals[0]['total']) == (4, timedelta(hours=4))
+
+
+@pytest.mark.django_db
+def test_summary_page_reads_rollups(auth_client, counter, user):
+    auth_client.post(reverse('counter_manual_interval', args=[counter.id]), {
+        'day': timezone.localdate().isoformat(), 'start_time': '09:00', 'end_time': '10:30',
+    })
+    with CaptureQueriesContext(connection) as ctx:
+        resp = auth_client.get(reverse('counter_summary'), {'period': 'custom', 'start': '2020-01-01'})
+    assert resp.context['summary_total'] == timedelta(hours=1, minutes=30)
+    assert [row['total'] for row in resp.context['per_day']] == [timedelta(hours=1, minutes=30)]
+    assert not any('timeinterval' in q['sql'] for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_deleted_counter_leaves_summary_page(auth_client, counter, user, django_capture_on_commit_callbacks):
+    other = TimeCounter.objects.create(user=user, name='Other')
+    day = timezone.localdate().isoformat()
+    auth_client.post(reverse('counter_manual_interval', args=[counter.id]), {
+        'day': day, 'start_time': '09:00', 'end_time': '10:30',
+    })
+    auth_client.post(reverse('counter_manual_interval', args=[other.id]), {
+        'day': day, 'start_time': '11:00', 'end_time': '11:20',
+    })
+
+    with CaptureQueriesContext(connection) as ctx, django_capture_on_commit_callbacks() as callbacks:
+        auth_client.post(reverse('counter_delete', args=[counter.id]))
+    # Запрос только ставит дни в очередь — итоги не правятся построчно
+    assert not any(q['sql'].startswith('UPDATE') and 'dailysummary' in q['sql'] for q in ctx.captured_queries)
+    assert DirtySummaryDay.objects.filter(user=user).exists()
+    for callback in callbacks:
+        callback()
+
+    resp = auth_client.get(reverse('counter_summary'), {'period': 'custom', 'start': '2020-01-01'})
+    assert resp.context['summary_total'] == timedelta(minutes=20)
+    assert [row['total'] for row in resp.context['per_day']] == [timedelta(minutes=20)]
+    assert _summary(user, timezone.localdate()) == (1, timedelta(minutes=20))
+    assert not DirtySummaryDay.objects.exists()
+
+
+@pytest.mark.django_db
+def test_burst_of_marks_schedules_one_recompute(user, interval, monkeypatch, django_capture_on_commit_callbacks):
+    scheduled = []
+    monkeypatch.setattr(
+        summary_tasks.recompute_dirty_summaries_task,
+        'apply_async',
+        lambda **kwargs: scheduled.append(kwargs),
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        mark_summaries_dirty([(user.id, interval.day), (user.id, interval.day)])
+    with django_capture_on_commit_callbacks(execute=True):
+        mark_summaries_dirty([(user.id, interval.day)])
+    assert DirtySummaryDay.objects.count() == 1
+    assert len(scheduled) == 1
+    assert scheduled[0]['countdown'] > 0
+
+    summary_tasks.recompute_dirty_summaries_task()
+    assert not DirtySummaryDay.objects.exists()
+    assert _summary(user, interval.day) == (1, timedelta(hours=1, minutes=30))
+    assert CounterDailySummary.objects.get(counter=interval.counter, date=interval.day).interval_count == 1
+
+
+@pytest.mark.django_db
+def test_failed_recompute_keeps_mark(user, interval, monkeypatch):
+    other_day = interval.day + timedelta(days=1)
+    DirtySummaryDay.objects.create(user=user, date=interval.day)
+    DirtySummaryDay.objects.create(user=user, date=other_day)
+    real_recalculate = summaries.recalculate_user_day
+
+    def flaky(user_id, day):
+        if day == interval.day:
+            raise RuntimeError('db gone')
+        real_recalculate(user_id, day)
+
+    monkeypatch.setattr(summaries, 'recalculate_user_day', flaky)
+    assert summaries.recompute_dirty_summaries() == 1
+    assert list(DirtySummaryDay.objects.values_list('date', flat=True)) == [interval.day]
+
+    monkeypatch.setattr(summaries, 'recalculate_user_day', real_recalculate)
+    assert summaries.recompute_dirty_summaries() == 1
+    assert not DirtySummaryDay.objects.exists()
+    assert _summary(user, interval.day) == (1, timedelta(hours=1, minutes=30))
+
+
+@pytest.mark.django_db
+def test_recompute_skips_while_other_drain_runs(user, interval):
+    DirtySummaryDay.objects.create(user=user, date=interval.day)
+    cache.add(summaries.RECOMPUTE_LOCK_KEY, True)
+    assert summaries.recompute_dirty_summaries() == 0
+    assert DirtySummaryDay.objects.exists()
+
+    cache.delete(summaries.RECOMPUTE_LOCK_KEY)
+    assert summaries.recompute_dirty_summaries() == 1
+    assert not DirtySummaryDay.objects.exists()
+
+
+@pytest.mark.django_db
+def test_drift_repair_leaves_request_path(auth_client, counter, user, interval):
+    day = interval.day
+    # Итога нет — удаление не может применить отрицательную дельту
+    with CaptureQueriesContext(connection) as ctx:
+        auth_client.post(reverse('interval_delete', args=[interval.id]))
+    assert not any('SUM(' in q['sql'] for q in ctx.captured_queries)
+    assert DirtySummaryDay.objects.filter(user=user, date=day).exists()
+
+
+@pytest.mark.django_db
+def test_manual_interval_requires_end_time(auth_client, counter, user):
+    auth_client.post(reverse('counter_start', args=[counter.id]))
+    response = auth_client.post(reverse('counter_manual_interval', args=[counter.id]), {
+        'day': timezone.localdate().isoformat(), 'start_time': '09:00', 'end_time': '',
+    })
+    assert response.status_code == 200
+    assert 'end_time' in response.context['form'].errors
+    assert TimeInterval.objects.filter(counter=counter).count() == 1
@@ -18,6 +18,27 @@ def test_user_profile_initial(user):
     assert data['profile'] == user.profile
     assert data['initial'] == 'T'
 
+@pytest.mark.django_db
+def test_user_profile_cached_between_requests(user, django_assert_num_queries):
+    data = user_profile(user)
+    # Новый объект пользователя — как в следующем запросе: профиль берется из кеша
+    fresh = User.objects.get(pk=user.pk)
+    with django_assert_num_queries(0):
+        assert user_profile(fresh)['profile'] == data['profile']
+        assert user_profile(fresh) is user_profile(fresh)
+
+@pytest.mark.django_db
+def test_user_profile_invalidated_on_profile_and_user_save(user):
+    user_profile(user)
+    profile = user.profile
+    profile.bio = 'Новая биография'
+    profile.save()
+    assert user_profile(User.objects.get(pk=user.pk))['profile'].bio == 'Новая биография'
+    renamed = User.objects.get(pk=user.pk)
+    renamed.first_name = 'Юлия'
+    renamed.save()
+    assert user_profile(User.objects.get(pk=user.pk))['initial'] == 'Ю'
+
 @pytest.mark.parametrize('sequence,pos,expected', [([1,2,3],1,2), ('abc',2,'c'), (None,0,None)])
 def test_chart_index(sequence,pos,expected):
     assert chart_tags.index(sequence,pos) == expected
@@ -78,3 +99,15 @@ def test_get_summary_filters(user, django_assert_num_queries):
 @pytest.mark.parametrize('val', [None, datetime.now()])
 def test_ru_date_no_error(val):
     custom_filters.ru_date(val)
+
+@pytest.mark.django_db
+def test_summary_filters_query_one_row_for_querysets(user, django_assert_num_queries):
+    from time_tracking_or.models import DailySummary
+    start = datetime(2026, 1, 1).date()
+    for offset in range(0, 30, 3):
+        DailySummary.objects.create(user=user, date=start + timedelta(days=offset), interval_count=offset)
+    qs = DailySummary.objects.filter(user=user)
+    with django_assert_num_queries(2) as ctx:
+        assert custom_filters.get_summary_interval_count(qs, start + timedelta(days=3)) == 3
+        assert custom_filters.get_summary_interval_count(qs, start + timedelta(days=4)) == 'Нет данных'
+    assert all('LIMIT 1' in q['sql'] for q in ctx.captured_queries)
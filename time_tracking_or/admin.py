@@ -2,7 +2,15 @@
 
 from django.contrib import admin
 
-from .models import DailySummary, ProjectRating, TimeCounter, TimeInterval
+from .models import (
+    CounterDailySummary,
+    CounterMonthlySummary,
+    CounterWeeklySummary,
+    DailySummary,
+    ProjectRating,
+    TimeCounter,
+    TimeInterval,
+)
 
 
 @admin.register(TimeCounter)
@@ -25,6 +33,22 @@ class DailySummaryAdmin(admin.ModelAdmin):
     list_display = ('user', 'date', 'interval_count', 'total_time', 'date_create')
 
 
+@admin.register(CounterDailySummary)
+class CounterDailySummaryAdmin(admin.ModelAdmin):
+    """Inspect per-counter daily rollups used by the dashboard."""
+    list_display = ('counter', 'user', 'date', 'interval_count', 'total_time')
+    list_filter = ('date',)
+    search_fields = ('counter__name', 'user__username')
+
+
+@admin.register(CounterWeeklySummary, CounterMonthlySummary)
+class CounterPeriodSummaryAdmin(admin.ModelAdmin):
+    """Inspect weekly and monthly per-counter rollups used by the summary page."""
+    list_display = ('counter', 'user', 'period_start', 'interval_count', 'total_time')
+    list_filter = ('period_start',)
+    search_fields = ('counter__name', 'user__username')
+
+
 @admin.register(ProjectRating)
 class ProjectRatingAdmin(admin.ModelAdmin):
     """Manage project ratings and feedback."""
@@ -4,6 +4,10 @@ from django.apps import AppConfig
 
 
 class TimeTrackingOrConfig(AppConfig):
-    """Load time-tracking app defaults."""
+    """Load time-tracking app defaults and wire up cache invalidation."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'time_tracking_or'
+
+    def ready(self):
+        """Import signal handlers to register them with Django."""
+        import time_tracking_or.signals
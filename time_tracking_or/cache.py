@@ -0,0 +1,74 @@
+"""Data versions for caching computed dashboard context and sitemap pages.
+
+Every cached payload is keyed by the current version of the data it was built
+from: the user's data version for the dashboard, the month's version for a
+sitemap section. Writes to counters or intervals bump the version (signals,
+plus explicit calls from bulk paths that skip signals), so stale entries are
+never read again and simply expire.
+"""
+
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+SITEMAP_CACHE_TIMEOUT = getattr(settings, 'SITEMAP_CACHE_TIMEOUT', 3600)
+
+
+def _version_key(user_id):
+    return f'tt:data-version:{user_id}'
+
+
+def _sitemap_version_key(section):
+    return f'tt:sitemap-version:{section}'
+
+
+def _current_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Случайный токен: после вытеснения ключа старые записи не оживут
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    cache.set(key, uuid4().hex, None)
+    transaction.on_commit(lambda: cache.set(key, uuid4().hex, None))
+
+
+def get_data_version(user_id):
+    """Return the current data version token of ``user_id``."""
+    return _current_version(_version_key(user_id))
+
+
+def bump_data_version(user_id):
+    """Invalidate all cached payloads of ``user_id``.
+
+    The version is bumped right away and once more after the surrounding
+    transaction commits, so a concurrent request that read pre-commit data
+    cannot keep it cached under the new version.
+    """
+    if user_id is None:
+        return
+    _bump(_version_key(user_id))
+
+
+def dashboard_cache_key(user_id, selected_date):
+    """Return the cache key of the dashboard context for one day."""
+    return f'tt:dashboard:{user_id}:{get_data_version(user_id)}:{selected_date.isoformat()}'
+
+
+def get_sitemap_version(section):
+    """Return the version token of a sitemap section (``YYYY-MM``) or of ``'index'``."""
+    return _current_version(_sitemap_version_key(section))
+
+
+def bump_sitemap_version(day):
+    """Invalidate the cached sitemap month of ``day`` and the sitemap index."""
+    if day is None:
+        return
+    _bump(_sitemap_version_key(f'{day:%Y-%m}'))
+    _bump(_sitemap_version_key('index'))
@@ -0,0 +1,43 @@
+"""Running independent blocking queries of one async view concurrently.
+
+Django's async ORM methods (``aget``, ``acount``...) are wrappers around the
+sync ORM executed on a single shared thread, so awaiting several of them with
+``asyncio.gather`` still runs them one after another. To really overlap the
+dashboard queries each one is sent to its own worker thread, and therefore its
+own database connection. Worker threads outlive the request, so each call
+ends with ``close_old_connections()``: it closes the connection when
+``CONN_MAX_AGE`` is 0 or has expired and otherwise keeps it open in that
+thread for the next call.
+
+The parallel mode is opt-in (``ASYNC_PARALLEL_QUERIES = True``): with
+``CONN_MAX_AGE = 0`` every render opens a fresh connection per query, so it
+only pays off with persistent connections or a connection pooler. By default
+the calls run on the shared thread, see the same connection and transaction,
+and behave like the sync views.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def _with_own_connection(func):
+    def run():
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            # Поток из пула живет дольше запроса: просроченное по CONN_MAX_AGE соединение закрываем сами
+            close_old_connections()
+    return run
+
+
+async def gather_queries(*funcs):
+    """Run the blocking callables ``funcs`` and return their results in order."""
+    if not getattr(settings, 'ASYNC_PARALLEL_QUERIES', False):
+        return [await sync_to_async(func)() for func in funcs]
+    return await asyncio.gather(
+        *(sync_to_async(_with_own_connection(func), thread_sensitive=False)() for func in funcs)
+    )
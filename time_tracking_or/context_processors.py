@@ -0,0 +1,8 @@
+"""Template context shared by every page."""
+
+from django.conf import settings
+
+
+def realtime(request):
+    """Tell the base template whether to open the live counter event stream."""
+    return {'realtime_events_enabled': settings.REALTIME_EVENTS_ENABLED}
@@ -0,0 +1,133 @@
+"""Per-user live events (start/pause/stop/edit) for the Server-Sent Events stream.
+
+Counter action views publish small JSON events after their transaction
+commits; every open tab of the same user listens on ``/events/`` and refreshes
+only when something actually changed. Without ``REALTIME_REDIS_URL`` the bus is
+in-process (enough for a single ASGI worker); with it events go through Redis
+pub/sub and reach every worker and device.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', 15)
+
+
+def _channel(user_id):
+    return f'tt:events:{user_id}'
+
+
+class InProcessBus:
+    """Fan-out of events to listeners living in the same process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = defaultdict(set)
+
+    def publish(self, user_id, message):
+        """Deliver ``message`` to every listener of ``user_id``."""
+        with self._lock:
+            listeners = list(self._listeners.get(user_id, ()))
+        for loop, queue in listeners:
+            try:
+                # Публикация идет из потока sync-вью, очередь живет в event loop слушателя
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # Цикл событий уже закрыт — слушатель отвалился
+                pass
+
+    async def listen(self, user_id, heartbeat=HEARTBEAT_SECONDS):
+        """Yield messages for ``user_id``; ``None`` after ``heartbeat`` idle seconds."""
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._listeners[user_id].add(entry)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(entry[1].get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._listeners[user_id].discard(entry)
+                if not self._listeners[user_id]:
+                    del self._listeners[user_id]
+
+
+class RedisBus:
+    """Events through Redis pub/sub, shared by all workers."""
+
+    def __init__(self, url):
+        self.url = url
+        self._client = None
+
+    def publish(self, user_id, message):
+        """Publish ``message`` on the user's channel."""
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(_channel(user_id), message)
+
+    async def listen(self, user_id, heartbeat=HEARTBEAT_SECONDS):
+        """Yield messages for ``user_id``; ``None`` after ``heartbeat`` idle seconds."""
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(_channel(user_id))
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                yield message['data'].decode('utf-8') if message else None
+        finally:
+            await pubsub.unsubscribe(_channel(user_id))
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_bus = None
+
+
+def get_bus():
+    """Return the configured event bus (created on first use)."""
+    global _bus
+    if _bus is None:
+        redis_url = getattr(settings, 'REALTIME_REDIS_URL', '')
+        _bus = RedisBus(redis_url) if redis_url else InProcessBus()
+    return _bus
+
+
+def publish_event(user_id, event_type, request=None, **payload):
+    """Queue an event for ``user_id`` to be sent once the current transaction commits."""
+    message = {'type': event_type, **payload}
+    if request is not None:
+        # Вкладка-инициатор уже получила свой HTMX-ответ и пропустит событие
+        message['origin'] = request.headers.get('X-Client-Id', '')
+    data = json.dumps(message)
+
+    def send():
+        try:
+            get_bus().publish(user_id, data)
+        except Exception:  # noqa: BLE001 - живые события не должны ломать запись
+            logger.warning('Realtime event was not published', exc_info=True)
+
+    transaction.on_commit(send)
+
+
+async def sse_stream(user_id):
+    """Format bus messages of ``user_id`` as a ``text/event-stream`` body."""
+    yield 'retry: 5000\n\n'
+    async for message in get_bus().listen(user_id):
+        if message is None:
+            yield ': ping\n\n'
+        else:
+            yield f'data: {message}\n\n'
@@ -37,6 +37,9 @@ class TimeIntervalFormEdit(ModelForm):
             self.fields['break_duration'].label = 'Перерыв'
         if self.instance and self.instance.pk:
             self.fields['day'].widget = forms.HiddenInput()
+        # Открытый интервал бывает только у запущенного таймера (старт/стоп), вручную — только завершенный
+        if not (self.instance.pk and self.instance.end_time is None):
+            self.fields['end_time'].required = True
 
     def clean(self):
         """Validate that the end time is not before the start time."""
@@ -57,3 +60,20 @@ class TimeIntervalFormEdit(ModelForm):
                 from django.core.exceptions import ValidationError
                 raise ValidationError('Время окончания не может быть раньше времени начала!')
         return cleaned_data
+
+
+class IntervalImportForm(forms.Form):
+    """Upload a CSV or JSON file with intervals to import."""
+    file = forms.FileField(
+        label='Файл',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.json'}),
+    )
+
+    def clean_file(self):
+        """Detect the format from the file extension."""
+        upload = self.cleaned_data['file']
+        extension = upload.name.rsplit('.', 1)[-1].lower()
+        if extension not in ('csv', 'json'):
+            raise forms.ValidationError('Поддерживаются только файлы .csv и .json')
+        self.import_format = extension
+        return upload
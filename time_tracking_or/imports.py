@@ -0,0 +1,119 @@
+"""Bulk import of intervals from CSV or JSON.
+
+Rows use the same columns as the export (``counter``, ``day``, ``start_time``,
+``end_time``; ``duration_seconds`` is ignored and recomputed). Each row is
+validated as it is read, valid intervals are written with ``bulk_create`` in
+batches, and every touched day is queued once for a background summary
+recomputation instead of being re-aggregated per interval inside the request.
+"""
+
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import date, time
+
+from django.db import transaction
+
+from .cache import bump_data_version, bump_sitemap_version
+from .models import TimeCounter, TimeInterval, interval_duration
+from .summaries import mark_summaries_dirty
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ('csv', 'json')
+
+COUNTER_NAME_MAX_LENGTH = TimeCounter._meta.get_field('name').max_length
+
+ImportResult = namedtuple('ImportResult', 'created errors')
+
+
+class ImportRowError(ValueError):
+    """Raised for a row that cannot be turned into an interval."""
+
+
+def read_rows(stream, import_format):
+    """Yield row dicts from a binary or text ``stream`` in the given format."""
+    if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)) or hasattr(stream, 'chunks'):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if import_format == 'json':
+        data = json.load(stream)
+        if not isinstance(data, list):
+            raise ImportRowError('Ожидается JSON-массив объектов.')
+        yield from data
+    else:
+        yield from csv.DictReader(stream)
+
+
+def _parse_row(row):
+    """Return ``(counter_name, day, start_time, end_time)`` for a raw row."""
+    if not isinstance(row, dict):
+        raise ImportRowError('строка должна быть объектом')
+    try:
+        day = date.fromisoformat(str(row.get('day') or '').strip())
+    except ValueError:
+        raise ImportRowError('некорректная дата') from None
+    try:
+        start = time.fromisoformat(str(row.get('start_time') or '').strip())
+        end = time.fromisoformat(str(row.get('end_time') or '').strip())
+    except ValueError:
+        raise ImportRowError('некорректное время старта или стопа') from None
+    name = str(row.get('counter') or '').strip()
+    if len(name) > COUNTER_NAME_MAX_LENGTH:
+        raise ImportRowError(f'название счетчика длиннее {COUNTER_NAME_MAX_LENGTH} символов')
+    return name, day, start, end
+
+
+def import_intervals(user, rows, counter=None, batch_size=IMPORT_BATCH_SIZE, counter_limit=None):
+    """Import ``rows`` for ``user`` and return an ``ImportResult``.
+
+    With ``counter`` every row goes to that counter; otherwise rows are matched
+    to the user's counters by name and missing counters are created, but never
+    more than ``counter_limit`` counters in total (``None`` — no limit). Invalid
+    rows are skipped and reported as ``(row_number, message)`` pairs.
+    """
+    counters = {c.name: c for c in TimeCounter.objects.filter(user=user)}
+    errors = []
+    batch = []
+    touched = set()
+    created = 0
+
+    with transaction.atomic():
+        for number, row in enumerate(rows, start=1):
+            try:
+                name, day, start, end = _parse_row(row)
+                target = counter
+                if target is None:
+                    if not name:
+                        raise ImportRowError('не указан счетчик')
+                    target = counters.get(name)
+                    if target is None:
+                        if counter_limit is not None and len(counters) >= counter_limit:
+                            raise ImportRowError('достигнут лимит счетчиков для гостя')
+                        target = counters[name] = TimeCounter.objects.create(user=user, name=name)
+            except ImportRowError as exc:
+                errors.append((number, str(exc)))
+                continue
+            # bulk_create не вызывает save(), поэтому длительность считаем здесь
+            batch.append(TimeInterval(
+                counter=target,
+                user=user,
+                day=day,
+                start_time=start,
+                end_time=end,
+                duration=interval_duration(start, end),
+            ))
+            touched.add((target.pk, day))
+            if len(batch) >= batch_size:
+                created += len(TimeInterval.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(TimeInterval.objects.bulk_create(batch))
+
+        mark_summaries_dirty((user.pk, day) for _counter_id, day in touched)
+        # bulk_create не шлет сигналы — сбрасываем кеш пользователя явно
+        if touched:
+            bump_data_version(user.pk)
+        for month in {day.replace(day=1) for _counter_id, day in touched}:
+            bump_sitemap_version(month)
+
+    return ImportResult(created, errors)
@@ -0,0 +1,146 @@
+"""Compare p50/p99 latency of the hot pages under WSGI and ASGI.
+
+By default both handler stacks are driven in-process: the WSGI side through
+Django's sync request handler from a pool of threads, the ASGI side through the
+async handler with the same number of concurrent tasks. This measures the cost
+of running the async dashboard/summary views under each protocol without
+starting any servers.
+
+With ``--target NAME=URL`` (repeatable) the same paths are requested over HTTP
+from real deployments instead, e.g. gunicorn on one port and uvicorn on
+another; ``--cookie`` passes the session cookie of a logged-in user.
+"""
+
+import asyncio
+import math
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from time_tracking_or.management.helpers import busiest_user, resolve_user
+
+DEFAULT_PATHS = ('/', '/summary/?period=month')
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of ``values`` (``fraction`` in 0..1)."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает задержки p50/p99 дашборда и сводки под WSGI и ASGI при конкурентной нагрузке.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='username или id пользователя (по умолчанию — самый активный)')
+        parser.add_argument('--path', action='append', dest='paths', help='путь страницы (можно несколько раз)')
+        parser.add_argument('--requests', type=int, default=200, help='запросов на каждый путь')
+        parser.add_argument('--concurrency', type=int, default=20, help='одновременных запросов')
+        parser.add_argument(
+            '--target',
+            action='append',
+            default=[],
+            help='NAME=URL развернутого сервера, например wsgi=http://127.0.0.1:8000',
+        )
+        parser.add_argument('--cookie', default='', help='заголовок Cookie для запросов к --target')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests и --concurrency должны быть положительными.')
+        paths = options['paths'] or list(DEFAULT_PATHS)
+
+        if options['target']:
+            runners = [self._http_runner(target, options['cookie']) for target in options['target']]
+            self._report(runners, paths, options)
+            return
+
+        user = resolve_user(options['user']) if options.get('user') else busiest_user(
+            'В базе нет интервалов — нечего измерять.'
+        )
+        client = Client()
+        client.force_login(user)
+        try:
+            # Тестовые клиенты ходят на хост testserver
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                self._report([('wsgi', self._wsgi_runner(client)), ('asgi', self._asgi_runner(client))], paths, options)
+        finally:
+            client.logout()
+
+    def _report(self, runners, paths, options):
+        self.stdout.write(f'{"стек":<8}{"путь":<28}{"p50, мс":>10}{"p99, мс":>10}{"rps":>10}{"ошибок":>8}')
+        for name, run in runners:
+            for path in paths:
+                started = time.perf_counter()
+                results = run(path, options['requests'], options['concurrency'])
+                elapsed = time.perf_counter() - started
+                latencies = [latency for latency, _ok in results]
+                errors = sum(1 for _latency, ok in results if not ok)
+                self.stdout.write(
+                    f'{name:<8}{path:<28}'
+                    f'{percentile(latencies, 0.5) * 1000:>10.1f}'
+                    f'{percentile(latencies, 0.99) * 1000:>10.1f}'
+                    f'{len(results) / elapsed:>10.1f}'
+                    f'{errors:>8}'
+                )
+
+    @staticmethod
+    def _timed_threads(request, total, concurrency):
+        """Call ``request()`` ``total`` times from ``concurrency`` threads."""
+        def one(_number):
+            started = time.perf_counter()
+            ok = request()
+            return time.perf_counter() - started, ok
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(one, range(total)))
+
+    def _wsgi_runner(self, client):
+        def run(path, total, concurrency):
+            def request():
+                worker = Client()
+                worker.cookies = client.cookies
+                return worker.get(path, secure=True).status_code == 200
+            return self._timed_threads(request, total, concurrency)
+        return run
+
+    def _asgi_runner(self, client):
+        async def run_async(path, total, concurrency):
+            semaphore = asyncio.Semaphore(concurrency)
+            worker = AsyncClient()
+            worker.cookies = client.cookies
+
+            async def one():
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await worker.get(path, secure=True)
+                    return time.perf_counter() - started, response.status_code == 200
+
+            return await asyncio.gather(*(one() for _number in range(total)))
+
+        def run(path, total, concurrency):
+            return asyncio.run(run_async(path, total, concurrency))
+        return run
+
+    def _http_runner(self, target, cookie):
+        name, sep, base_url = target.partition('=')
+        if not sep or not base_url:
+            raise CommandError(f'Ожидается NAME=URL, получено: {target}')
+        headers = {'Cookie': cookie} if cookie else {}
+
+        def run(path, total, concurrency):
+            def request():
+                req = urllib.request.Request(base_url.rstrip('/') + path, headers=headers)
+                try:
+                    with urllib.request.urlopen(req, timeout=30) as response:
+                        response.read()
+                        return response.status == 200
+                except (urllib.error.URLError, OSError):
+                    return False
+            return self._timed_threads(request, total, concurrency)
+        return name, run
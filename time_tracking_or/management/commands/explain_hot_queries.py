@@ -0,0 +1,110 @@
+"""Run EXPLAIN over the interval queries issued by the hottest views.
+
+The command renders the dashboard, the counter history and the summary page
+for a real user, captures every SQL statement that touches the interval table
+and prints the execution plan reported by the database. Plans containing a
+full table scan of the interval table make the command fail, so it can be used
+as a regression check against a production-sized copy of the data.
+"""
+
+from importlib import import_module
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from time_tracking_or.management.helpers import busiest_user, resolve_user
+from time_tracking_or.models import TimeCounter, TimeInterval
+from time_tracking_or.views import (
+    CounterHistoryView,
+    CounterSummaryView,
+    TimeCounterListView,
+)
+
+
+def is_sequential_scan(line, table):
+    """Return True if an EXPLAIN line describes a full scan of ``table``."""
+    if connection.vendor == 'postgresql':
+        return 'Seq Scan on' in line and table in line
+    # SQLite: "SCAN <table>" без индекса — полный перебор строк
+    text = line.strip()
+    if not text.startswith('SCAN') or table not in text:
+        return False
+    return 'USING INDEX' not in text and 'USING COVERING INDEX' not in text
+
+
+def explain(sql):
+    """Return EXPLAIN output for ``sql`` as a list of text lines."""
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}')
+        return [str(row[-1]) for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+    help = 'Показывает планы запросов к интервалам для дашборда, истории и сводки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='username или id пользователя (по умолчанию — самый активный)')
+        parser.add_argument('--date', help='день дашборда в формате YYYY-MM-DD (по умолчанию — сегодня)')
+        parser.add_argument(
+            '--allow-seq-scan',
+            action='store_true',
+            help='не завершаться ошибкой при полном сканировании таблицы интервалов',
+        )
+
+    def handle(self, *args, **options):
+        user = resolve_user(options['user']) if options.get('user') else busiest_user(
+            'В базе нет интервалов — нечего проверять.'
+        )
+        counter = TimeCounter.objects.filter(user=user).order_by('pk').first()
+        if counter is None:
+            raise CommandError('У пользователя нет счетчиков — нечего проверять.')
+
+        factory = RequestFactory()
+        dashboard_query = {'date': options['date']} if options.get('date') else {}
+        pages = [
+            ('TimeCounterListView', TimeCounterListView, factory.get('/', dashboard_query), {}),
+            ('CounterHistoryView', CounterHistoryView, factory.get('/history/'), {'pk': counter.pk}),
+            ('CounterSummaryView', CounterSummaryView, factory.get('/summary/', {'period': 'month'}), {}),
+        ]
+
+        table = TimeInterval._meta.db_table
+        offenders = []
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        for name, view_class, request, kwargs in pages:
+            request.user = user
+            request.auser = self._auser(user)
+            request.session = session_store()
+            view = view_class.as_view()
+            if view_class.view_is_async:
+                view = async_to_sync(view)
+            # Параллельные запросы async-вью шли бы через другие соединения и не попали бы в захват
+            with override_settings(ASYNC_PARALLEL_QUERIES=False), CaptureQueriesContext(connection) as ctx:
+                response = view(request, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+            statements = [q['sql'] for q in ctx.captured_queries if table in q['sql']]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: {len(statements)} запрос(ов)'))
+            for sql in statements:
+                plan = explain(sql)
+                self.stdout.write(sql)
+                for line in plan:
+                    self.stdout.write(f'    {line}')
+                if any(is_sequential_scan(line, table) for line in plan):
+                    offenders.append(name)
+
+        if offenders and not options['allow_seq_scan']:
+            raise CommandError(
+                'Полное сканирование таблицы интервалов в: ' + ', '.join(sorted(set(offenders)))
+            )
+        self.stdout.write(self.style.SUCCESS('Полных сканирований таблицы интервалов нет.'))
+
+    @staticmethod
+    def _auser(user):
+        async def auser():
+            return user
+        return auser
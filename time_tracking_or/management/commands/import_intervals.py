@@ -0,0 +1,59 @@
+"""Import intervals for a user from a CSV or JSON file.
+
+Uses the same pipeline as the upload form: rows are validated while reading,
+written with ``bulk_create`` in batches and the summaries of every touched day
+are rebuilt once at the end.
+"""
+
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from time_tracking_or.imports import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    import_intervals,
+    read_rows,
+)
+from time_tracking_or.management.helpers import resolve_user
+from time_tracking_or.models import TimeCounter
+
+
+class Command(BaseCommand):
+    help = 'Импортирует интервалы пользователя из CSV или JSON файла.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='путь к файлу с интервалами')
+        parser.add_argument('--user', required=True, help='username или id пользователя')
+        parser.add_argument('--counter', type=int, help='id счетчика, в который записать все строки')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='формат файла (по умолчанию — по расширению)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='размер пачки bulk_create')
+
+    def handle(self, *args, **options):
+        user = resolve_user(options['user'])
+        counter = None
+        if options.get('counter'):
+            counter = TimeCounter.objects.filter(pk=options['counter'], user=user).first()
+            if counter is None:
+                raise CommandError(f'Счетчик {options["counter"]} не найден у пользователя.')
+        path = options['path']
+        import_format = options.get('format') or path.rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError('Не удалось определить формат файла, укажите --format.')
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                result = import_intervals(
+                    user,
+                    read_rows(stream, import_format),
+                    counter=counter,
+                    batch_size=options['batch_size'],
+                )
+        except OSError as exc:
+            raise CommandError(f'Не удалось открыть файл: {exc}') from exc
+        except (ValueError, csv.Error) as exc:
+            raise CommandError(f'Не удалось прочитать файл: {exc}') from exc
+
+        for number, error in result.errors:
+            self.stdout.write(self.style.WARNING(f'Строка {number}: {error}'))
+        self.stdout.write(self.style.SUCCESS(f'Импортировано интервалов: {result.created}'))
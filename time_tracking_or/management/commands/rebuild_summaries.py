@@ -0,0 +1,81 @@
+"""Rebuild the summary rollups in bulk from the intervals.
+
+Recomputes ``DailySummary``, ``CounterDailySummary`` and the weekly/monthly
+rollups for a date range and/or a set of users with one GROUP BY per chunk of
+users (see ``time_tracking_or.rebuild``), printing progress after each chunk.
+``--async`` queues the same work as a Celery task instead.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from time_tracking_or.management.helpers import parse_date, user_lookup
+from time_tracking_or.rebuild import REBUILD_CHUNK_SIZE, rebuild_summaries
+from time_tracking_or.tasks import rebuild_summaries_task
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает суточные, недельные и месячные итоги пачками по пользователям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='первый день в формате YYYY-MM-DD (по умолчанию — без ограничения)')
+        parser.add_argument('--end', help='последний день в формате YYYY-MM-DD (по умолчанию — без ограничения)')
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='users',
+            help='username или id пользователя (можно несколько раз; по умолчанию — все)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=REBUILD_CHUNK_SIZE, help='пользователей в одной пачке')
+        parser.add_argument('--async', action='store_true', dest='run_async', help='поставить задачу в очередь Celery')
+
+    def handle(self, *args, **options):
+        start = parse_date(options.get('start'), '--start')
+        end = parse_date(options.get('end'), '--end')
+        if start and end and start > end:
+            raise CommandError('--start не может быть позже --end.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        user_ids = self._resolve_users(options.get('users'))
+
+        if options['run_async']:
+            result = rebuild_summaries_task.delay(
+                start.isoformat() if start else None,
+                end.isoformat() if end else None,
+                user_ids,
+            )
+            self.stdout.write(self.style.SUCCESS(f'Задача поставлена в очередь: {result.id}'))
+            return
+
+        stats = rebuild_summaries(
+            start=start,
+            end=end,
+            user_ids=user_ids,
+            chunk_size=options['chunk_size'],
+            progress=self._report,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: пользователей {stats["users_done"]}, строк дня {stats["daily_rows"]}, '
+            f'строк счетчиков {stats["counter_rows"]}, периодов {stats["period_rows"]}, '
+            f'удалено {stats["deleted_rows"]}'
+        ))
+
+    def _report(self, stats):
+        self.stdout.write(
+            f'Пользователей {stats["users_done"]}/{stats["users_total"]}: '
+            f'строк дня {stats["daily_rows"]}, удалено {stats["deleted_rows"]}'
+        )
+
+    @staticmethod
+    def _resolve_users(values):
+        """Turn usernames/ids into user ids; ``None`` means every user."""
+        if not values:
+            return None
+        user_model = get_user_model()
+        user_ids = []
+        for value in values:
+            user_id = user_model.objects.filter(**user_lookup(value)).values_list('pk', flat=True).first()
+            if user_id is None:
+                raise CommandError(f'Пользователь {value} не найден.')
+            user_ids.append(user_id)
+        return user_ids
@@ -0,0 +1,55 @@
+"""Bring TimeCounter.active_interval back in line with open intervals.
+
+The running state of a counter is denormalized into ``active_interval`` and
+maintained by the start/pause/stop views. Writes that bypass them (admin,
+shell, imports) can leave the pointer stale; this command detects and, unless
+``--dry-run`` is given, repairs such drift.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from time_tracking_or.cache import bump_data_version
+from time_tracking_or.models import TimeCounter, TimeInterval
+
+
+def find_running_state_drift():
+    """Return ``{counter_id: (stored_interval_id, expected_interval_id)}`` for drifted counters."""
+    expected = {}
+    open_intervals = TimeInterval.objects.filter(end_time__isnull=True, counter__isnull=False)
+    for interval_id, counter_id in open_intervals.order_by('date_create', 'id').values_list('id', 'counter_id'):
+        expected[counter_id] = interval_id
+
+    stored = dict(
+        TimeCounter.objects.filter(active_interval__isnull=False).values_list('id', 'active_interval_id')
+    )
+    drift = {}
+    for counter_id in stored.keys() | expected.keys():
+        if stored.get(counter_id) != expected.get(counter_id):
+            drift[counter_id] = (stored.get(counter_id), expected.get(counter_id))
+    return drift
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и исправляет денормализованное состояние запущенных счетчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='только показать расхождения')
+
+    def handle(self, *args, **options):
+        drift = find_running_state_drift()
+        for counter_id, (stored, expected) in sorted(drift.items()):
+            self.stdout.write(f'Счетчик {counter_id}: active_interval={stored}, ожидается {expected}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
+            return
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Найдено расхождений: {len(drift)}'))
+            return
+        with transaction.atomic():
+            for counter_id, (_stored, expected) in drift.items():
+                TimeCounter.objects.filter(pk=counter_id).update(active_interval_id=expected)
+            user_ids = TimeCounter.objects.filter(pk__in=drift).values_list('user_id', flat=True).distinct()
+            for user_id in user_ids:
+                bump_data_version(user_id)
+        self.stdout.write(self.style.SUCCESS(f'Исправлено счетчиков: {len(drift)}'))
@@ -0,0 +1,124 @@
+"""Audit DailySummary against live interval aggregates, in parallel.
+
+The user-id space is split into contiguous shards that a pool of worker
+processes checks independently (``time_tracking_or.rebuild.verify_user_range``);
+each worker opens its own database connection and only reads. Mismatches are
+printed and, with ``--fix``, repaired afterwards from the main process, so the
+workers never compete for write locks. ``--workers 1`` runs every shard in the
+current process. The command exits with an error when unrepaired mismatches
+remain, so it can run as a nightly check.
+"""
+
+import multiprocessing
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from time_tracking_or.management.helpers import parse_date
+from time_tracking_or.rebuild import (
+    repair_mismatches,
+    user_id_bounds,
+    verify_user_range,
+)
+
+SHARDS_PER_WORKER = 4
+MAX_REPORTED = 50
+
+
+def _init_worker():
+    """Prepare a pool process: Django must be set up and no parent connection reused."""
+    django.setup()
+    # Соединения, унаследованные через fork, принадлежат родителю — работаем только через свои
+    for conn in connections.all(initialized_only=True):
+        conn.connection = None
+
+
+def _verify_shard(shard):
+    low, high, start, end = shard
+    try:
+        return low, high, verify_user_range(low, high, start, end)
+    finally:
+        connections.close_all()
+
+
+def split_user_ids(low, high, shards):
+    """Split ids ``low..high`` (inclusive) into at most ``shards`` contiguous ``[lo, hi)`` ranges."""
+    total = high - low + 1
+    shards = max(min(shards, total), 1)
+    step, extra = divmod(total, shards)
+    ranges = []
+    cursor = low
+    for number in range(shards):
+        size = step + (1 if number < extra else 0)
+        ranges.append((cursor, cursor + size))
+        cursor += size
+    return ranges
+
+
+class Command(BaseCommand):
+    help = 'Сверяет суточные итоги с интервалами параллельно по диапазонам пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=multiprocessing.cpu_count(),
+            help='число процессов (1 — проверка в текущем процессе)',
+        )
+        parser.add_argument('--start', help='первый день в формате YYYY-MM-DD (по умолчанию — без ограничения)')
+        parser.add_argument('--end', help='последний день в формате YYYY-MM-DD (по умолчанию — без ограничения)')
+        parser.add_argument('--fix', action='store_true', help='исправить найденные расхождения')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers должен быть положительным.')
+        start = parse_date(options.get('start'), '--start')
+        end = parse_date(options.get('end'), '--end')
+        bounds = user_id_bounds()
+        if bounds is None:
+            self.stdout.write(self.style.SUCCESS('Нет ни интервалов, ни итогов — сверять нечего.'))
+            return
+
+        workers = options['workers']
+        shards = [
+            (low, high, start, end)
+            for low, high in split_user_ids(*bounds, workers * SHARDS_PER_WORKER)
+        ]
+        started = time.perf_counter()
+        mismatches = []
+        for low, high, found in self._run(shards, workers):
+            mismatches.extend(found)
+            if found:
+                self.stdout.write(f'Пользователи {low}–{high - 1}: расхождений {len(found)}')
+        elapsed = time.perf_counter() - started
+
+        for mismatch in sorted(mismatches)[:MAX_REPORTED]:
+            self.stdout.write(
+                f'  user={mismatch.user_id} {mismatch.day:%Y-%m-%d}: '
+                f'сохранено {mismatch.stored}, ожидается {mismatch.expected}'
+            )
+        if len(mismatches) > MAX_REPORTED:
+            self.stdout.write(f'  … и еще {len(mismatches) - MAX_REPORTED}')
+
+        summary = f'Диапазонов: {len(shards)}, процессов: {workers}, время: {elapsed:.1f} с.'
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS(f'Расхождений нет. {summary}'))
+        elif options['fix']:
+            repair_mismatches(mismatches)
+            self.stdout.write(self.style.SUCCESS(f'Исправлено расхождений: {len(mismatches)}. {summary}'))
+        else:
+            raise CommandError(f'Найдено расхождений: {len(mismatches)}. {summary}')
+
+    @staticmethod
+    def _run(shards, workers):
+        """Yield ``(low, high, mismatches)`` per shard, from a process pool unless ``workers == 1``."""
+        if workers == 1:
+            for low, high, start, end in shards:
+                yield low, high, verify_user_range(low, high, start, end)
+            return
+        # Дочерние процессы не должны делить сокет БД с родителем
+        connections.close_all()
+        with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+            yield from pool.imap_unordered(_verify_shard, shards)
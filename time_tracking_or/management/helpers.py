@@ -0,0 +1,47 @@
+"""Argument helpers shared by the ``time_tracking_or`` management commands."""
+
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db.models import Count
+
+from time_tracking_or.models import TimeInterval
+
+
+def user_lookup(value):
+    """Return ORM lookups matching a user given by id or username."""
+    return {'pk': value} if str(value).isdigit() else {'username': value}
+
+
+def resolve_user(value):
+    """Find the user given by id or username or fail the command."""
+    user_model = get_user_model()
+    try:
+        return user_model.objects.get(**user_lookup(value))
+    except user_model.DoesNotExist:
+        raise CommandError(f'Пользователь {value} не найден.') from None
+
+
+def busiest_user(empty_message):
+    """Return the user with the most intervals; fail with ``empty_message`` if there are none."""
+    top = (
+        TimeInterval.objects.values('user_id')
+        .order_by()
+        .annotate(total=Count('id'))
+        .order_by('-total')
+        .first()
+    )
+    if not top:
+        raise CommandError(empty_message)
+    return get_user_model().objects.get(pk=top['user_id'])
+
+
+def parse_date(value, option):
+    """Parse an optional YYYY-MM-DD option value; empty means no bound."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'{option}: ожидается дата YYYY-MM-DD, получено {value}') from None
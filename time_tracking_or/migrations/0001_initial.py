@@ -0,0 +1,91 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:33
+
+import datetime
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.CharField(choices=[('like', '👍 Нравится'), ('dislike', '👎 Не нравится')], max_length=10, verbose_name='Оценка')),
+                ('comment', models.TextField(blank=True, verbose_name='Комментарий о желаемом функционале')),
+                ('email_sent', models.BooleanField(default=False, verbose_name='Комментарий отправлен на почту')),
+                ('email_sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата отправки на почту')),
+                ('celery_task_id', models.CharField(blank=True, max_length=255, verbose_name='ID задачи Celery')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='project_rating', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Оценка проекта',
+                'verbose_name_plural': 'Оценки проекта',
+            },
+        ),
+        migrations.CreateModel(
+            name='TimeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Название')),
+                ('slug', models.SlugField(blank=True, max_length=255, verbose_name='URL')),
+                ('color', models.CharField(default='#4e79a7', max_length=7, verbose_name='Цвет')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Счетчик',
+                'verbose_name_plural': 'Счетчики',
+                'ordering': ('name',),
+                'unique_together': {('user', 'slug')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TimeInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(default=django.utils.timezone.localdate, verbose_name='День')),
+                ('start_time', models.TimeField(blank=True, null=True, verbose_name='старт')),
+                ('end_time', models.TimeField(blank=True, null=True, verbose_name='стоп')),
+                ('duration', models.DurationField(blank=True, null=True, verbose_name='Длительность')),
+                ('break_duration', models.DurationField(blank=True, null=True, verbose_name='Перерыв')),
+                ('date_create', models.DateTimeField(auto_now_add=True, null=True)),
+                ('counter', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='intervals', to='time_tracking_or.timecounter')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='time_intervals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Интервал',
+                'verbose_name_plural': 'Интервалы',
+                'ordering': ('-day', '-date_create'),
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('interval_count', models.PositiveIntegerField(default=0, verbose_name='Количество интервалов')),
+                ('total_time', models.DurationField(default=datetime.timedelta, verbose_name='Общее время')),
+                ('date_create', models.DateTimeField(auto_now_add=True, null=True)),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Суточный итог',
+                'verbose_name_plural': 'Суточные итоги',
+                'ordering': ('-date',),
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking_or', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeinterval',
+            index=models.Index(fields=['user', 'day'], name='interval_user_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeinterval',
+            index=models.Index(fields=['counter', '-day', '-date_create'], name='interval_counter_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeinterval',
+            index=models.Index(condition=models.Q(('end_time__isnull', True)), fields=['counter'], name='interval_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeinterval',
+            index=models.Index(condition=models.Q(('end_time__isnull', True)), fields=['user'], name='interval_user_open_idx'),
+        ),
+    ]
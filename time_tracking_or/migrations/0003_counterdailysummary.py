@@ -0,0 +1,65 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:37
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+BATCH_SIZE = 1000
+
+
+def backfill_counter_summaries(apps, schema_editor):
+    """Build per-counter rollups from already recorded intervals."""
+    TimeInterval = apps.get_model('time_tracking_or', 'TimeInterval')
+    CounterDailySummary = apps.get_model('time_tracking_or', 'CounterDailySummary')
+    rows = (
+        TimeInterval.objects.filter(end_time__isnull=False, counter__isnull=False)
+        .values('counter_id', 'counter__user_id', 'day')
+        .order_by()
+        .annotate(total=Sum('duration'), interval_count=Count('id'))
+    )
+    batch = []
+    for row in rows.iterator():
+        batch.append(CounterDailySummary(
+            counter_id=row['counter_id'],
+            user_id=row['counter__user_id'],
+            date=row['day'],
+            total_time=row['total'] or datetime.timedelta(),
+            interval_count=row['interval_count'],
+        ))
+        if len(batch) >= BATCH_SIZE:
+            CounterDailySummary.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        CounterDailySummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking_or', '0002_timeinterval_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('interval_count', models.PositiveIntegerField(default=0, verbose_name='Количество интервалов')),
+                ('total_time', models.DurationField(default=datetime.timedelta, verbose_name='Общее время')),
+                ('counter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to='time_tracking_or.timecounter')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_daily_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Суточный итог счетчика',
+                'verbose_name_plural': 'Суточные итоги счетчиков',
+                'ordering': ('-date',),
+                'indexes': [models.Index(fields=['user', 'date'], name='counter_summary_user_date_idx')],
+                'unique_together': {('counter', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_counter_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_active_interval(apps, schema_editor):
+    """Point running counters at their latest open interval."""
+    TimeCounter = apps.get_model('time_tracking_or', 'TimeCounter')
+    TimeInterval = apps.get_model('time_tracking_or', 'TimeInterval')
+    latest = {}
+    open_intervals = TimeInterval.objects.filter(end_time__isnull=True, counter__isnull=False)
+    for interval_id, counter_id in open_intervals.order_by('date_create', 'id').values_list('id', 'counter_id'):
+        latest[counter_id] = interval_id
+    for counter_id, interval_id in latest.items():
+        TimeCounter.objects.filter(pk=counter_id).update(active_interval_id=interval_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking_or', '0003_counterdailysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timecounter',
+            name='active_interval',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='time_tracking_or.timeinterval', verbose_name='Активный интервал'),
+        ),
+        migrations.RunPython(backfill_active_interval, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:39
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
+
+
+def close_duplicate_open_intervals(apps, schema_editor):
+    """Leave only the newest open interval per user so the constraint can be created.
+
+    Older duplicates (possible only after a start race) are closed as
+    zero-length intervals and unlinked from their counters.
+    """
+    TimeInterval = apps.get_model('time_tracking_or', 'TimeInterval')
+    TimeCounter = apps.get_model('time_tracking_or', 'TimeCounter')
+    users = (
+        TimeInterval.objects.filter(end_time__isnull=True)
+        .values('user_id')
+        .order_by()
+        .annotate(open_count=Count('id'))
+        .filter(open_count__gt=1)
+        .values_list('user_id', flat=True)
+    )
+    for user_id in list(users):
+        open_ids = list(
+            TimeInterval.objects.filter(user_id=user_id, end_time__isnull=True)
+            .order_by('-date_create', '-id')
+            .values_list('id', flat=True)
+        )
+        stale_ids = open_ids[1:]
+        TimeCounter.objects.filter(active_interval_id__in=stale_ids).update(active_interval=None)
+        TimeInterval.objects.filter(id__in=stale_ids).update(
+            end_time=Coalesce('start_time', Value(datetime.time())),
+            duration=datetime.timedelta(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking_or', '0004_timecounter_active_interval'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_intervals, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='timeinterval',
+            name='interval_user_open_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='timeinterval',
+            constraint=models.UniqueConstraint(condition=models.Q(('end_time__isnull', True)), fields=('user',), name='one_open_interval_per_user'),
+        ),
+    ]
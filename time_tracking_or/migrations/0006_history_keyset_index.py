@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking_or', '0005_one_open_interval_per_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeinterval',
+            index=models.Index(fields=['counter', '-day', '-date_create', '-id'], name='interval_counter_keyset_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='timeinterval',
+            name='interval_counter_recent_idx',
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:48
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def seed_rating_stats(apps, schema_editor):
+    """Store the current like/dislike totals in the single stats row."""
+    ProjectRating = apps.get_model('time_tracking_or', 'ProjectRating')
+    ProjectRatingStats = apps.get_model('time_tracking_or', 'ProjectRatingStats')
+    counts = ProjectRating.objects.aggregate(
+        likes=Count('id', filter=Q(rating='like')),
+        dislikes=Count('id', filter=Q(rating='dislike')),
+    )
+    ProjectRatingStats.objects.update_or_create(pk=1, defaults=counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking_or', '0006_history_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectRatingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('likes', models.IntegerField(default=0, verbose_name='Нравится')),
+                ('dislikes', models.IntegerField(default=0, verbose_name='Не нравится')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Статистика оценок проекта',
+                'verbose_name_plural': 'Статистика оценок проекта',
+            },
+        ),
+        migrations.RunPython(seed_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking_or', '0007_projectratingstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timecounter',
+            name='is_paused',
+            field=models.BooleanField(default=False, verbose_name='На паузе'),
+        ),
+    ]
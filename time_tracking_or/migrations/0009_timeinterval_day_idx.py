@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking_or', '0008_timecounter_is_paused'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeinterval',
+            index=models.Index(fields=['day', 'id'], name='interval_day_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:11
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+BATCH_SIZE = 1000
+
+
+def backfill_period_summaries(apps, schema_editor):
+    """Build weekly and monthly rollups from the existing daily per-counter rollups."""
+    CounterDailySummary = apps.get_model('time_tracking_or', 'CounterDailySummary')
+    for model_name, trunc in (('CounterWeeklySummary', TruncWeek), ('CounterMonthlySummary', TruncMonth)):
+        model = apps.get_model('time_tracking_or', model_name)
+        rows = (
+            CounterDailySummary.objects.values('counter_id', 'user_id', period=trunc('date'))
+            .order_by()
+            .annotate(total=Sum('total_time'), interval_count=Sum('interval_count'))
+        )
+        batch = []
+        for row in rows.iterator():
+            batch.append(model(
+                counter_id=row['counter_id'],
+                user_id=row['user_id'],
+                period_start=row['period'],
+                total_time=row['total'] or datetime.timedelta(),
+                interval_count=row['interval_count'],
+            ))
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking_or', '0009_timeinterval_day_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(verbose_name='Начало периода')),
+                ('interval_count', models.PositiveIntegerField(default=0, verbose_name='Количество интервалов')),
+                ('total_time', models.DurationField(default=datetime.timedelta, verbose_name='Общее время')),
+                ('counter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='time_tracking_or.timecounter')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Месячный итог счетчика',
+                'verbose_name_plural': 'Месячные итоги счетчиков',
+                'ordering': ('-period_start',),
+                'abstract': False,
+                'indexes': [models.Index(fields=['user', 'period_start'], name='counter_month_user_start_idx')],
+                'unique_together': {('counter', 'period_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CounterWeeklySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(verbose_name='Начало периода')),
+                ('interval_count', models.PositiveIntegerField(default=0, verbose_name='Количество интервалов')),
+                ('total_time', models.DurationField(default=datetime.timedelta, verbose_name='Общее время')),
+                ('counter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='time_tracking_or.timecounter')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Недельный итог счетчика',
+                'verbose_name_plural': 'Недельные итоги счетчиков',
+                'ordering': ('-period_start',),
+                'abstract': False,
+                'indexes': [models.Index(fields=['user', 'period_start'], name='counter_week_user_start_idx')],
+                'unique_together': {('counter', 'period_start')},
+            },
+        ),
+        migrations.RunPython(backfill_period_summaries, migrations.RunPython.noop),
+    ]
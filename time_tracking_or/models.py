@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 
 class TimeCounter(models.Model):
@@ -12,6 +13,17 @@ class TimeCounter(models.Model):
     name = models.CharField(max_length=255, verbose_name='Название')
     slug = models.SlugField(max_length=255, blank=True, verbose_name='URL')
     color = models.CharField(max_length=7, default='#4e79a7', verbose_name='Цвет')
+    # Денормализованное состояние таймера: открытый интервал этого счетчика (если запущен)
+    active_interval = models.ForeignKey(
+        'TimeInterval',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Активный интервал',
+    )
+    # Пауза хранится на счетчике, а не в сессии: видна со всех устройств и не пишет сессию
+    is_paused = models.BooleanField(default=False, verbose_name='На паузе')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -35,7 +47,16 @@ class TimeCounter(models.Model):
     @property
     def is_running(self):
         """Return whether the counter currently has an open interval."""
-        return self.intervals.filter(end_time__isnull=True).exists()
+        return self.active_interval_id is not None
+
+
+def interval_duration(start_time, end_time):
+    """Return the length of a start/end pair, wrapping past midnight."""
+    start_dt = datetime.combine(datetime.min, start_time)
+    end_dt = datetime.combine(datetime.min, end_time)
+    if end_dt < start_dt:
+        end_dt += timedelta(days=1)
+    return end_dt - start_dt
 
 
 class TimeInterval(models.Model):
@@ -53,6 +74,33 @@ class TimeInterval(models.Model):
         ordering = ('-day', '-date_create')
         verbose_name = 'Интервал'
         verbose_name_plural = 'Интервалы'
+        indexes = [
+            # Дашборд и сводки: интервалы пользователя за день / период
+            models.Index(fields=['user', 'day'], name='interval_user_day_idx'),
+            # Разделы sitemap по месяцам и границы диапазона дат
+            models.Index(fields=['day', 'id'], name='interval_day_idx'),
+            # История счетчика в порядке вывода (ключ курсорной пагинации);
+            # префикс (counter, day) покрывает итоги счетчика за день
+            models.Index(
+                fields=['counter', '-day', '-date_create', '-id'],
+                name='interval_counter_keyset_idx',
+            ),
+            # Активные (незавершенные) интервалы — их единицы на всю таблицу
+            models.Index(
+                fields=['counter'],
+                condition=Q(end_time__isnull=True),
+                name='interval_open_idx',
+            ),
+        ]
+        constraints = [
+            # Нельзя вести два дела одновременно: не больше одного открытого интервала на пользователя.
+            # Частичный уникальный индекс заодно обслуживает поиск активного интервала пользователя.
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=Q(end_time__isnull=True),
+                name='one_open_interval_per_user',
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         """Normalize ownership data and recalculate duration before saving."""
@@ -63,11 +111,7 @@ class TimeInterval(models.Model):
         if not self.day:
             self.day = timezone.localdate()
         if self.start_time and self.end_time:
-            start_dt = datetime.combine(datetime.min, self.start_time)
-            end_dt = datetime.combine(datetime.min, self.end_time)
-            if end_dt < start_dt:
-                end_dt += timedelta(days=1)
-            self.duration = end_dt - start_dt
+            self.duration = interval_duration(self.start_time, self.end_time)
         super().save(*args, **kwargs)
 
     @property
@@ -98,6 +142,84 @@ class DailySummary(models.Model):
         return f"{self.date} - {self.user.username}"
 
 
+class CounterDailySummary(models.Model):
+    """Per-counter daily totals that feed the dashboard cards and chart."""
+    counter = models.ForeignKey(TimeCounter, on_delete=models.CASCADE, related_name='daily_summaries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='counter_daily_summaries')
+    date = models.DateField()
+    interval_count = models.PositiveIntegerField(default=0, verbose_name='Количество интервалов')
+    total_time = models.DurationField(default=timedelta, verbose_name='Общее время')
+
+    class Meta:
+        unique_together = ('counter', 'date')
+        ordering = ('-date',)
+        indexes = [
+            models.Index(fields=['user', 'date'], name='counter_summary_user_date_idx'),
+        ]
+        verbose_name = 'Суточный итог счетчика'
+        verbose_name_plural = 'Суточные итоги счетчиков'
+
+    def __str__(self):
+        """Display the day and counter name for admin lists."""
+        return f"{self.date} - {self.counter.name}"
+
+
+class DirtySummaryDay(models.Model):
+    """A (user, day) whose rollups are queued for a debounced recomputation."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+    date_create = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'date')
+        verbose_name = 'День на пересчет итогов'
+        verbose_name_plural = 'Дни на пересчет итогов'
+
+    def __str__(self):
+        """Display the day and user id for admin lists."""
+        return f"{self.date} - {self.user_id}"
+
+
+class CounterPeriodSummary(models.Model):
+    """Per-counter totals of a calendar period, summed from the daily rollups."""
+    counter = models.ForeignKey(TimeCounter, on_delete=models.CASCADE, related_name='+')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    period_start = models.DateField(verbose_name='Начало периода')
+    interval_count = models.PositiveIntegerField(default=0, verbose_name='Количество интервалов')
+    total_time = models.DurationField(default=timedelta, verbose_name='Общее время')
+
+    class Meta:
+        abstract = True
+        unique_together = ('counter', 'period_start')
+        ordering = ('-period_start',)
+
+    def __str__(self):
+        """Display the period start and counter name for admin lists."""
+        return f"{self.period_start} - {self.counter.name}"
+
+
+class CounterWeeklySummary(CounterPeriodSummary):
+    """Per-counter totals of an ISO week; ``period_start`` is its Monday."""
+
+    class Meta(CounterPeriodSummary.Meta):
+        indexes = [
+            models.Index(fields=['user', 'period_start'], name='counter_week_user_start_idx'),
+        ]
+        verbose_name = 'Недельный итог счетчика'
+        verbose_name_plural = 'Недельные итоги счетчиков'
+
+
+class CounterMonthlySummary(CounterPeriodSummary):
+    """Per-counter totals of a calendar month; ``period_start`` is its first day."""
+
+    class Meta(CounterPeriodSummary.Meta):
+        indexes = [
+            models.Index(fields=['user', 'period_start'], name='counter_month_user_start_idx'),
+        ]
+        verbose_name = 'Месячный итог счетчика'
+        verbose_name_plural = 'Месячные итоги счетчиков'
+
+
 class ProjectRating(models.Model):
     """User rating for the project - like or dislike."""
     
@@ -121,3 +243,17 @@ class ProjectRating(models.Model):
         
     def __str__(self):
         return f"{self.user.username} - {self.get_rating_display()}"
+
+
+class ProjectRatingStats(models.Model):
+    """Single-row running totals of project likes and dislikes."""
+    likes = models.IntegerField(default=0, verbose_name='Нравится')
+    dislikes = models.IntegerField(default=0, verbose_name='Не нравится')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Статистика оценок проекта'
+        verbose_name_plural = 'Статистика оценок проекта'
+
+    def __str__(self):
+        return f"👍 {self.likes} / 👎 {self.dislikes}"
@@ -0,0 +1,87 @@
+"""Keyset (cursor) pagination for the counter history.
+
+History is ordered by ``(-day, -date_create, -id)``; a cursor remembers the
+last row shown and the next page is fetched with a range condition on that
+key. Every page therefore costs one indexed LIMIT query, no matter how deep
+the user scrolls, and no ``COUNT(*)`` is needed.
+"""
+
+from datetime import date, datetime
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+
+HISTORY_ORDERING = ('-day', '-date_create', '-id')
+
+
+def encode_cursor(interval, shown):
+    """Build a cursor pointing right after ``interval``; ``shown`` rows precede it."""
+    created = interval.date_create.isoformat() if interval.date_create else ''
+    return f'{interval.day.isoformat()}_{created}_{interval.pk}_{shown}'
+
+
+def decode_cursor(token):
+    """Parse a cursor into ``(day, date_create, pk, shown)`` or ``None`` if malformed."""
+    try:
+        day_str, created_str, pk_str, shown_str = token.split('_')
+        day = date.fromisoformat(day_str)
+        created = datetime.fromisoformat(created_str) if created_str else None
+        return day, created, int(pk_str), int(shown_str)
+    except (AttributeError, ValueError):
+        return None
+
+
+def rows_after(queryset, day, created, pk):
+    """Filter ``queryset`` to rows that come after the given key in history order."""
+    # NULL в date_create: в PostgreSQL при DESC идут первыми, в SQLite — последними
+    nulls_first = connection.features.nulls_order_largest
+    condition = Q(day__lt=day)
+    if created is None:
+        if nulls_first:
+            condition |= Q(day=day, date_create__isnull=False)
+        condition |= Q(day=day, date_create__isnull=True, pk__lt=pk)
+    else:
+        condition |= Q(day=day, date_create__lt=created)
+        condition |= Q(day=day, date_create=created, pk__lt=pk)
+        if not nulls_first:
+            condition |= Q(day=day, date_create__isnull=True)
+    return queryset.filter(condition)
+
+
+def paginate_history(queryset, params, page_size):
+    """Return template context for one page of history.
+
+    ``?page=N`` keeps classic numbered pagination (with an exact count) for
+    callers that ask for it explicitly; otherwise the page is cut with a
+    cursor from ``?cursor=``.
+    """
+    queryset = queryset.order_by(*HISTORY_ORDERING)
+    if params.get('page'):
+        paginator = Paginator(queryset, page_size)
+        page_obj = paginator.get_page(params.get('page'))
+        return {
+            'intervals': page_obj.object_list,
+            'page_obj': page_obj,
+            'paginator': paginator,
+            'is_paginated': page_obj.has_other_pages(),
+            'start_number': page_obj.start_index(),
+            'next_cursor': None,
+        }
+
+    shown = 0
+    cursor = decode_cursor(params.get('cursor'))
+    if cursor:
+        day, created, pk, shown = cursor
+        queryset = rows_after(queryset, day, created, pk)
+    rows = list(queryset[:page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    return {
+        'intervals': rows,
+        'page_obj': None,
+        'paginator': None,
+        'is_paginated': False,
+        'start_number': shown + 1,
+        'next_cursor': encode_cursor(rows[-1], shown + len(rows)) if has_next else None,
+    }
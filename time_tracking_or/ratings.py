@@ -0,0 +1,66 @@
+"""Running like/dislike totals for the project rating block.
+
+The totals live in a single ``ProjectRatingStats`` row that is shifted with an
+``F()`` update whenever a rating is created, flipped or deleted, so rendering
+the rating block costs one primary-key lookup instead of an aggregate over the
+whole ``ProjectRating`` table. ``reconcile_rating_stats`` recounts the table
+and is run periodically to correct any drift.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import ProjectRating, ProjectRatingStats
+
+RATING_STATS_PK = 1
+_RATING_FIELDS = {'like': 'likes', 'dislike': 'dislikes'}
+
+
+def _as_stats(likes, dislikes):
+    return {
+        'total_likes': likes,
+        'total_dislikes': dislikes,
+        'total_ratings': likes + dislikes,
+    }
+
+
+def reconcile_rating_stats():
+    """Recount ratings from scratch, store the totals and return them."""
+    with transaction.atomic():
+        # Строка итогов блокируется до подсчета: голос, пришедший между подсчетом и записью,
+        # дождется коммита и применит свою дельту поверх, а не потеряется
+        stats, _created = ProjectRatingStats.objects.select_for_update().get_or_create(pk=RATING_STATS_PK)
+        counts = ProjectRating.objects.aggregate(
+            likes=Count('id', filter=Q(rating='like')),
+            dislikes=Count('id', filter=Q(rating='dislike')),
+        )
+        stats.likes = counts['likes']
+        stats.dislikes = counts['dislikes']
+        stats.save(update_fields=['likes', 'dislikes', 'updated_at'])
+    return _as_stats(counts['likes'], counts['dislikes'])
+
+
+def get_rating_stats():
+    """Return the stored totals, seeding the row on first use."""
+    row = ProjectRatingStats.objects.filter(pk=RATING_STATS_PK).values('likes', 'dislikes').first()
+    if row is None:
+        return reconcile_rating_stats()
+    return _as_stats(row['likes'], row['dislikes'])
+
+
+def apply_rating_change(previous, current):
+    """Move one vote from ``previous`` to ``current`` (either may be ``None``)."""
+    if previous == current:
+        return
+    updates = {}
+    if previous in _RATING_FIELDS:
+        field = _RATING_FIELDS[previous]
+        updates[field] = F(field) - 1
+    if current in _RATING_FIELDS:
+        field = _RATING_FIELDS[current]
+        updates[field] = F(field) + 1
+    if not updates:
+        return
+    if not ProjectRatingStats.objects.filter(pk=RATING_STATS_PK).update(**updates):
+        # Строки еще нет — пересчет уже учтет сохраненную оценку
+        reconcile_rating_stats()
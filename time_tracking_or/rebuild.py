@@ -0,0 +1,266 @@
+"""Bulk rebuild of the summary rollups straight from the intervals.
+
+``recalculate_*`` in ``summaries`` repair one (user, day) at a time, which is
+too slow after a bug or a large import. Here users are processed in chunks of
+ids: each chunk runs one GROUP BY (user, day) and one GROUP BY (counter, day)
+over its finished intervals, writes the results with
+``bulk_create(update_conflicts=True)`` and deletes rollup rows that no longer
+have intervals in bulk. Weekly and monthly rollups are then re-derived from
+the rebuilt daily rows the same way. Every chunk is its own transaction, so a
+long rebuild never holds locks on more than one chunk of users.
+
+``verify_user_range`` is the read-only counterpart used by the
+``verify_summaries`` command: it compares stored ``DailySummary`` rows of a
+range of user ids with live interval aggregates; ``repair_mismatches`` fixes
+what it found.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .cache import bump_data_version
+from .models import (
+    CounterDailySummary,
+    CounterMonthlySummary,
+    CounterWeeklySummary,
+    DailySummary,
+    TimeInterval,
+)
+from .summaries import PERIOD_ROLLUPS, recalculate_daily_summary
+
+REBUILD_CHUNK_SIZE = 200
+REBUILD_BATCH_SIZE = 1000
+
+_PERIOD_TRUNCS = {CounterWeeklySummary: TruncWeek, CounterMonthlySummary: TruncMonth}
+
+# Расхождение итога дня: stored/expected — (interval_count, total_time) или None, если строки быть не должно
+Mismatch = namedtuple('Mismatch', 'user_id day stored expected')
+
+
+def _span(field, start, end):
+    """Return lookups limiting ``field`` to ``[start, end]``; open bounds are skipped."""
+    lookups = {}
+    if start is not None:
+        lookups[f'{field}__gte'] = start
+    if end is not None:
+        lookups[f'{field}__lte'] = end
+    return lookups
+
+
+def _as_date(value):
+    # TruncWeek/TruncMonth на части бэкендов возвращают datetime
+    return value.date() if isinstance(value, datetime) else value
+
+
+def rebuild_user_ids(user_ids=None):
+    """Return the sorted ids of users whose rollups a rebuild has to visit."""
+    if user_ids is not None:
+        return sorted({int(user_id) for user_id in user_ids})
+    # И пользователи с интервалами, и те, у кого остались только устаревшие итоги
+    ids = set(TimeInterval.objects.order_by().values_list('user_id', flat=True).distinct())
+    ids.update(DailySummary.objects.order_by().values_list('user_id', flat=True).distinct())
+    ids.update(CounterDailySummary.objects.order_by().values_list('user_id', flat=True).distinct())
+    ids.discard(None)
+    return sorted(ids)
+
+
+def _rebuild_daily(chunk, start, end):
+    """Rebuild ``DailySummary`` rows of ``chunk``; return ``(written, deleted)``."""
+    finished = TimeInterval.objects.filter(user_id__in=chunk, end_time__isnull=False, **_span('day', start, end))
+    rows = [
+        DailySummary(
+            user_id=row['user_id'],
+            date=row['day'],
+            total_time=row['total'] or timedelta(),
+            interval_count=row['interval_count'],
+        )
+        for row in finished.values('user_id', 'day').order_by().annotate(
+            total=Sum('duration'),
+            interval_count=Count('id'),
+        )
+    ]
+    DailySummary.objects.bulk_create(
+        rows,
+        batch_size=REBUILD_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=['total_time', 'interval_count'],
+    )
+    has_intervals = TimeInterval.objects.filter(
+        user_id=OuterRef('user_id'),
+        day=OuterRef('date'),
+        end_time__isnull=False,
+    )
+    deleted, _by_model = DailySummary.objects.filter(
+        ~Exists(has_intervals),
+        user_id__in=chunk,
+        **_span('date', start, end),
+    ).delete()
+    return len(rows), deleted
+
+
+def _rebuild_counter_daily(chunk, start, end):
+    """Rebuild ``CounterDailySummary`` rows of ``chunk``; return ``(written, deleted)``."""
+    finished = TimeInterval.objects.filter(
+        user_id__in=chunk,
+        end_time__isnull=False,
+        counter__isnull=False,
+        **_span('day', start, end),
+    )
+    rows = [
+        CounterDailySummary(
+            counter_id=row['counter_id'],
+            user_id=row['counter__user_id'],
+            date=row['day'],
+            total_time=row['total'] or timedelta(),
+            interval_count=row['interval_count'],
+        )
+        for row in finished.values('counter_id', 'counter__user_id', 'day').order_by().annotate(
+            total=Sum('duration'),
+            interval_count=Count('id'),
+        )
+    ]
+    CounterDailySummary.objects.bulk_create(
+        rows,
+        batch_size=REBUILD_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['counter', 'date'],
+        update_fields=['user', 'total_time', 'interval_count'],
+    )
+    has_intervals = TimeInterval.objects.filter(
+        counter_id=OuterRef('counter_id'),
+        day=OuterRef('date'),
+        end_time__isnull=False,
+    )
+    deleted, _by_model = CounterDailySummary.objects.filter(
+        ~Exists(has_intervals),
+        user_id__in=chunk,
+        **_span('date', start, end),
+    ).delete()
+    return len(rows), deleted
+
+
+def _rebuild_periods(chunk, start, end):
+    """Re-derive weekly and monthly rollups of ``chunk``; return ``(written, deleted)``."""
+    written = deleted = 0
+    for model, period_start, period_end in PERIOD_ROLLUPS:
+        # Периоды на краях диапазона пересчитываются целиком по суточным строкам
+        first = period_start(start) if start is not None else None
+        last = period_end(end) if end is not None else None
+        rows = [
+            model(
+                counter_id=row['counter_id'],
+                user_id=row['user_id'],
+                period_start=_as_date(row['period']),
+                total_time=row['total'] or timedelta(),
+                interval_count=row['interval_count'],
+            )
+            for row in CounterDailySummary.objects.filter(user_id__in=chunk, **_span('date', first, last))
+            .values('counter_id', 'user_id', period=_PERIOD_TRUNCS[model]('date'))
+            .order_by()
+            .annotate(total=Sum('total_time'), interval_count=Sum('interval_count'))
+            if row['interval_count']
+        ]
+        model.objects.bulk_create(
+            rows,
+            batch_size=REBUILD_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['counter', 'period_start'],
+            update_fields=['user', 'total_time', 'interval_count'],
+        )
+        fresh = {(row.counter_id, row.period_start) for row in rows}
+        stale = [
+            pk
+            for pk, counter_id, started in model.objects.filter(
+                user_id__in=chunk,
+                **_span('period_start', first, last),
+            ).values_list('pk', 'counter_id', 'period_start')
+            if (counter_id, started) not in fresh
+        ]
+        if stale:
+            deleted += model.objects.filter(pk__in=stale).delete()[0]
+        written += len(rows)
+    return written, deleted
+
+
+def rebuild_summaries(start=None, end=None, user_ids=None, chunk_size=REBUILD_CHUNK_SIZE, progress=None):
+    """Rebuild every rollup of ``[start, end]`` (all dates if omitted) for ``user_ids`` (all users if omitted).
+
+    ``progress`` is called with a copy of the running stats after each chunk.
+    Returns the final stats dict.
+    """
+    ids = rebuild_user_ids(user_ids)
+    stats = {
+        'users_total': len(ids),
+        'users_done': 0,
+        'daily_rows': 0,
+        'counter_rows': 0,
+        'period_rows': 0,
+        'deleted_rows': 0,
+    }
+    for offset in range(0, len(ids), chunk_size):
+        chunk = ids[offset:offset + chunk_size]
+        with transaction.atomic():
+            daily, daily_deleted = _rebuild_daily(chunk, start, end)
+            counter, counter_deleted = _rebuild_counter_daily(chunk, start, end)
+            periods, periods_deleted = _rebuild_periods(chunk, start, end)
+        stats['users_done'] += len(chunk)
+        stats['daily_rows'] += daily
+        stats['counter_rows'] += counter
+        stats['period_rows'] += periods
+        stats['deleted_rows'] += daily_deleted + counter_deleted + periods_deleted
+        # Дашборды этих пользователей закешированы со старыми итогами
+        for user_id in chunk:
+            bump_data_version(user_id)
+        if progress is not None:
+            progress(dict(stats))
+    return stats
+
+
+def user_id_bounds():
+    """Return ``(min_id, max_id)`` over users with intervals or summaries, or None."""
+    bounds = [
+        model.objects.aggregate(low=Min('user_id'), high=Max('user_id'))
+        for model in (TimeInterval, DailySummary)
+    ]
+    lows = [item['low'] for item in bounds if item['low'] is not None]
+    if not lows:
+        return None
+    return min(lows), max(item['high'] for item in bounds if item['high'] is not None)
+
+
+def verify_user_range(low, high, start=None, end=None):
+    """Compare ``DailySummary`` of users ``low <= id < high`` with their intervals; return the ``Mismatch`` list."""
+    users = {'user_id__gte': low, 'user_id__lt': high}
+    expected = {
+        (row['user_id'], row['day']): (row['interval_count'], row['total'] or timedelta())
+        for row in TimeInterval.objects.filter(end_time__isnull=False, **users, **_span('day', start, end))
+        .values('user_id', 'day')
+        .order_by()
+        .annotate(total=Sum('duration'), interval_count=Count('id'))
+    }
+    stored = {
+        (user_id, day): (interval_count, total_time)
+        for user_id, day, interval_count, total_time in DailySummary.objects.filter(
+            **users,
+            **_span('date', start, end),
+        ).values_list('user_id', 'date', 'interval_count', 'total_time')
+    }
+    mismatches = [
+        Mismatch(user_id, day, stored.get((user_id, day)), expected.get((user_id, day)))
+        for user_id, day in sorted(expected.keys() | stored.keys())
+        if stored.get((user_id, day)) != expected.get((user_id, day))
+    ]
+    return mismatches
+
+
+def repair_mismatches(mismatches):
+    """Recompute every mismatched (user, day) summary and drop the owners' cached pages."""
+    for mismatch in mismatches:
+        recalculate_daily_summary(mismatch.user_id, mismatch.day)
+    for user_id in {mismatch.user_id for mismatch in mismatches}:
+        bump_data_version(user_id)
@@ -0,0 +1,30 @@
+"""Signal handlers that keep cached and denormalized data in step."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_data_version, bump_sitemap_version
+from .models import ProjectRating, TimeCounter, TimeInterval
+from .ratings import apply_rating_change
+
+
+@receiver(post_save, sender=TimeCounter)
+@receiver(post_delete, sender=TimeCounter)
+@receiver(post_save, sender=TimeInterval)
+@receiver(post_delete, sender=TimeInterval)
+def invalidate_user_data(sender, instance, **kwargs):
+    """Bump the owner's data version after any counter or interval change."""
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=TimeInterval)
+@receiver(post_delete, sender=TimeInterval)
+def invalidate_interval_sitemap(sender, instance, **kwargs):
+    """Drop the cached sitemap month of a changed interval."""
+    bump_sitemap_version(instance.day)
+
+
+@receiver(post_delete, sender=ProjectRating)
+def release_project_rating(sender, instance, **kwargs):
+    """Take a deleted rating (e.g. of a removed guest) out of the totals."""
+    apply_rating_change(instance.rating, None)
@@ -1,18 +1,108 @@
-"""Sitemap exposing time intervals for SEO crawlers."""
+"""Sitemap exposing time intervals for SEO crawlers.
 
-from django.contrib.sitemaps import Sitemap
+``/sitemap.xml`` is an index with one section per month (``sitemap-YYYY-MM.xml``);
+a section lists only that month's intervals, reading just the columns needed
+for ``<loc>`` and ``<lastmod>``, and is split into pages of ``limit`` URLs.
+Rendered pages are cached under the month's version, which interval writes
+bump, so the table is only read again for months that actually changed.
+"""
+
+from collections.abc import Mapping
+from datetime import date
+
+from django.contrib.sitemaps import Sitemap, views as sitemap_views
+from django.core.cache import cache
+from django.db.models import Max
+from django.db.models.functions import TruncMonth
+from django.http import HttpResponse
+
+from .cache import SITEMAP_CACHE_TIMEOUT, get_sitemap_version
 from .models import TimeInterval
 
 
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
 class TimeIntervalSitemap(Sitemap):
-    """List time intervals for discovery by search engines."""
+    """List time intervals of one month for discovery by search engines."""
     changefreq = 'weekly'
     priority = 0.9
+    limit = 10000
+
+    def __init__(self, month):
+        self.month = month
 
     def items(self):
-        return TimeInterval.objects.all()
+        return (
+            TimeInterval.objects.filter(day__gte=self.month, day__lt=_next_month(self.month))
+            .only('pk', 'date_create')
+            .order_by('day', 'pk')
+        )
 
     def lastmod(self, obj):
         return obj.updated
 
-# нужно добавить в модели get_absolute_url().
+    def get_latest_lastmod(self):
+        # Базовая реализация перебрала бы все интервалы месяца — берем агрегат
+        return self.items().order_by().aggregate(latest=Max('date_create'))['latest']
+
+
+class IntervalSitemaps(Mapping):
+    """Sitemap sections ``YYYY-MM`` for every month that has intervals."""
+
+    def __getitem__(self, section):
+        try:
+            year, month = (int(part) for part in section.split('-'))
+            return TimeIntervalSitemap(date(year, month, 1))
+        except (AttributeError, ValueError):
+            raise KeyError(section) from None
+
+    def __iter__(self):
+        months = (
+            TimeInterval.objects.annotate(month=TruncMonth('day'))
+            .values_list('month', flat=True)
+            .distinct()
+            .order_by('month')
+        )
+        for month in months:
+            yield f'{month:%Y-%m}'
+
+    def __len__(self):
+        return sum(1 for _section in self)
+
+
+sitemaps = IntervalSitemaps()
+
+
+def _cached_response(cache_key, build):
+    """Return a cached copy of the rendered sitemap response, building it on a miss."""
+    cached = cache.get(cache_key)
+    if cached is None:
+        response = build()
+        response.render()
+        cached = (response.content, list(response.items()))
+        cache.set(cache_key, cached, SITEMAP_CACHE_TIMEOUT)
+    content, headers = cached
+    response = HttpResponse(content)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def sitemap_index(request):
+    """Serve the sitemap index with one entry per month."""
+    cache_key = f'tt:sitemap:index:{request.scheme}:{request.get_host()}:{get_sitemap_version("index")}'
+    return _cached_response(
+        cache_key,
+        lambda: sitemap_views.index(request, sitemaps, sitemap_url_name='sitemap_section'),
+    )
+
+
+def sitemap_section(request, section):
+    """Serve one page of the intervals of a month."""
+    page = request.GET.get('p', '1')
+    cache_key = (
+        f'tt:sitemap:{section}:{page}:{request.scheme}:{request.get_host()}:{get_sitemap_version(section)}'
+    )
+    return _cached_response(cache_key, lambda: sitemap_views.sitemap(request, sitemaps, section=section))
@@ -0,0 +1,421 @@
+"""Maintenance of denormalized daily summaries.
+
+Write endpoints apply signed deltas for the one interval that changed, so the
+cost of a stop or an edit does not depend on how many intervals the user logged
+that day. The rollups kept in step are ``DailySummary`` per (user, day),
+``CounterDailySummary`` per (counter, day) and, derived from the latter,
+``CounterWeeklySummary``/``CounterMonthlySummary`` per (counter, period). The
+``recalculate_*`` functions re-aggregate from scratch and are the repair path;
+requests never run them directly but queue the (user, day) with
+``mark_summaries_dirty`` and a debounced Celery task drains the queue, so a
+burst of writes to one day costs a single recomputation off the request path.
+
+``plan_range`` splits any date range into whole months, whole weeks and
+leftover days, so range totals are read from a bounded number of rollup rows
+instead of every interval in the range.
+"""
+
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .cache import bump_data_version
+from .models import (
+    CounterDailySummary,
+    CounterMonthlySummary,
+    CounterWeeklySummary,
+    DailySummary,
+    DirtySummaryDay,
+    TimeCounter,
+    TimeInterval,
+)
+
+logger = logging.getLogger(__name__)
+
+RECOMPUTE_BATCH_SIZE = 500
+# Пока ключ жив, задача разбора очереди уже запланирована — новые отметки ждут ее
+RECOMPUTE_SCHEDULED_KEY = 'tt:summary:recompute-scheduled'
+# Блокировка разбора очереди; срок страхует от упавшего воркера
+RECOMPUTE_LOCK_KEY = 'tt:summary:recompute-lock'
+RECOMPUTE_LOCK_TIMEOUT = 15 * 60
+
+# Вклад одного завершенного интервала в суточные итоги
+Contribution = namedtuple('Contribution', 'user_id counter_id day duration')
+
+# Разбиение диапазона: первые дни целых месяцев, понедельники целых недель, отрезки (start, end) дней
+RangePlan = namedtuple('RangePlan', 'months weeks days')
+
+
+def week_start(day):
+    """Return the Monday of the week containing ``day``."""
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day):
+    """Return the first day of the month containing ``day``."""
+    return day.replace(day=1)
+
+
+def _month_end(day):
+    return month_start(month_start(day) + timedelta(days=32)) - timedelta(days=1)
+
+
+PERIOD_ROLLUPS = (
+    (CounterWeeklySummary, week_start, lambda day: week_start(day) + timedelta(days=6)),
+    (CounterMonthlySummary, month_start, _month_end),
+)
+
+
+def recalculate_daily_summary(user, day):
+    """Recompute cached day summary for a specific user and date."""
+    user_id = getattr(user, 'pk', user)
+    aggregate = TimeInterval.objects.filter(
+        user_id=user_id,
+        day=day,
+        end_time__isnull=False,
+    ).aggregate(total=Sum('duration'), interval_count=Count('id'))
+
+    total = aggregate['total'] or timedelta()
+    interval_count = aggregate['interval_count'] or 0
+
+    if interval_count == 0 and total == timedelta():
+        DailySummary.objects.filter(user_id=user_id, date=day).delete()
+        return
+
+    DailySummary.objects.update_or_create(
+        user_id=user_id,
+        date=day,
+        defaults={
+            'total_time': total,
+            'interval_count': interval_count,
+        },
+    )
+
+
+def recalculate_counter_summary(counter_id, day):
+    """Recompute the per-counter rollup for a single day."""
+    aggregate = TimeInterval.objects.filter(
+        counter_id=counter_id,
+        day=day,
+        end_time__isnull=False,
+    ).aggregate(total=Sum('duration'), interval_count=Count('id'))
+
+    if not aggregate['interval_count']:
+        CounterDailySummary.objects.filter(counter_id=counter_id, date=day).delete()
+        recalculate_counter_period_summaries(counter_id, day)
+        return
+
+    user_id = TimeCounter.objects.filter(pk=counter_id).values_list('user_id', flat=True).first()
+    if user_id is None:
+        return
+    CounterDailySummary.objects.update_or_create(
+        counter_id=counter_id,
+        date=day,
+        defaults={
+            'user_id': user_id,
+            'total_time': aggregate['total'] or timedelta(),
+            'interval_count': aggregate['interval_count'],
+        },
+    )
+    recalculate_counter_period_summaries(counter_id, day)
+
+
+def recalculate_counter_period_summaries(counter_id, day):
+    """Re-derive the week and month rollups containing ``day`` from the daily rows."""
+    for model, period_start, period_end in PERIOD_ROLLUPS:
+        first = period_start(day)
+        daily = CounterDailySummary.objects.filter(counter_id=counter_id, date__range=(first, period_end(day)))
+        aggregate = daily.aggregate(total=Sum('total_time'), interval_count=Sum('interval_count'))
+        if not aggregate['interval_count']:
+            model.objects.filter(counter_id=counter_id, period_start=first).delete()
+            continue
+        model.objects.update_or_create(
+            counter_id=counter_id,
+            period_start=first,
+            defaults={
+                'user_id': daily.values_list('user_id', flat=True).first(),
+                'total_time': aggregate['total'] or timedelta(),
+                'interval_count': aggregate['interval_count'],
+            },
+        )
+
+
+def recalculate_user_day(user_id, day):
+    """Recompute the user's daily summary and every per-counter rollup of ``day``."""
+    recalculate_daily_summary(user_id, day)
+    counter_ids = set(
+        TimeInterval.objects.filter(user_id=user_id, day=day, counter__isnull=False)
+        .values_list('counter_id', flat=True)
+        .distinct()
+    )
+    counter_ids.update(
+        CounterDailySummary.objects.filter(user_id=user_id, date=day).values_list('counter_id', flat=True)
+    )
+    for counter_id in sorted(counter_ids):
+        recalculate_counter_summary(counter_id, day)
+
+
+def mark_summaries_dirty(keys):
+    """Queue ``(user_id, day)`` pairs for recomputation after the current transaction commits."""
+    keys = {(user_id, day) for user_id, day in keys if user_id is not None}
+    if not keys:
+        return
+    # Повторная отметка того же дня (в этом или другом запросе) не создает новой строки
+    DirtySummaryDay.objects.bulk_create(
+        [DirtySummaryDay(user_id=user_id, date=day) for user_id, day in sorted(keys)],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(schedule_summary_recompute)
+
+
+def schedule_summary_recompute():
+    """Queue one delayed drain per debounce window; later marks are picked up by it."""
+    from .tasks import recompute_dirty_summaries_task
+
+    delay = settings.SUMMARY_RECOMPUTE_DELAY
+    if not cache.add(RECOMPUTE_SCHEDULED_KEY, True, delay):
+        return
+    try:
+        recompute_dirty_summaries_task.apply_async(countdown=delay)
+    except Exception as exc:  # брокер недоступен — очередь разберет периодическая задача
+        cache.delete(RECOMPUTE_SCHEDULED_KEY)
+        logger.warning('Summary recompute not scheduled: %s', exc)
+
+
+def recompute_dirty_summaries(batch_size=RECOMPUTE_BATCH_SIZE):
+    """Recompute every queued (user, day) and return how many were processed."""
+    # Периодический и отложенный разборы не должны идти одновременно
+    if not cache.add(RECOMPUTE_LOCK_KEY, True, RECOMPUTE_LOCK_TIMEOUT):
+        return 0
+    try:
+        # Отметки, пришедшие после этой точки, запланируют следующий разбор
+        cache.delete(RECOMPUTE_SCHEDULED_KEY)
+        processed = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                DirtySummaryDay.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                return processed
+            last_pk = pks[-1]
+            user_ids = set()
+            for pk in pks:
+                try:
+                    user_id = _recompute_dirty_day(pk)
+                except Exception:  # отметка остается в очереди до следующего разбора
+                    logger.exception('Summary recompute failed for dirty day %s', pk)
+                    continue
+                if user_id is not None:
+                    user_ids.add(user_id)
+                    processed += 1
+            for user_id in user_ids:
+                bump_data_version(user_id)
+    finally:
+        cache.delete(RECOMPUTE_LOCK_KEY)
+
+
+def _recompute_dirty_day(pk):
+    """Recompute one queued day and drop its mark in one transaction; return the user id or None."""
+    with transaction.atomic():
+        mark = DirtySummaryDay.objects.select_for_update(skip_locked=True).filter(pk=pk).first()
+        if mark is None:
+            # Уже разобрана или занята другим разбором
+            return None
+        # Удаление в той же транзакции: при ошибке пересчета отметка вернется откатом,
+        # а отметка, сделанная во время пересчета, дождется коммита и останется в очереди
+        mark.delete()
+        recalculate_user_day(mark.user_id, mark.date)
+        return mark.user_id
+
+
+def interval_contribution(interval):
+    """Return what ``interval`` adds to summaries, or ``None`` if it is still open."""
+    if interval is None or interval.end_time is None:
+        return None
+    return Contribution(
+        interval.user_id,
+        interval.counter_id,
+        interval.day,
+        interval.duration or timedelta(),
+    )
+
+
+def _apply_delta(model, lookup, create_kwargs, total_delta, count_delta, repair):
+    """Shift one rollup row by signed deltas with a single UPDATE.
+
+    Falls back to ``repair`` when the stored row cannot absorb the delta
+    (missing row for a negative delta, or a counter going below zero), which
+    also fixes any drift. Returns False when ``repair`` ran instead of the delta.
+    """
+    if not total_delta and not count_delta:
+        return True
+    rows = model.objects.filter(**lookup)
+    needs_repair = False
+    try:
+        with transaction.atomic():
+            updated = rows.update(
+                total_time=F('total_time') + total_delta,
+                interval_count=F('interval_count') + count_delta,
+            )
+            if not updated and count_delta > 0:
+                model.objects.create(
+                    **lookup,
+                    **create_kwargs,
+                    total_time=total_delta,
+                    interval_count=count_delta,
+                )
+            elif not updated:
+                needs_repair = True
+    except IntegrityError:
+        # Строку создал параллельный запрос или счетчик ушел бы в минус
+        needs_repair = True
+    if needs_repair:
+        repair()
+        return False
+    if count_delta < 0:
+        rows.filter(interval_count=0).delete()
+    return True
+
+
+def apply_daily_summary_delta(user_id, day, total_delta, count_delta):
+    """Shift the (user, day) summary by signed deltas."""
+    _apply_delta(
+        DailySummary,
+        {'user_id': user_id, 'date': day},
+        {},
+        total_delta,
+        count_delta,
+        lambda: mark_summaries_dirty([(user_id, day)]),
+    )
+
+
+def apply_counter_summary_delta(user_id, counter_id, day, total_delta, count_delta):
+    """Shift the (counter, day) rollup and its week and month by signed deltas."""
+    applied = _apply_delta(
+        CounterDailySummary,
+        {'counter_id': counter_id, 'date': day},
+        {'user_id': user_id},
+        total_delta,
+        count_delta,
+        lambda: mark_summaries_dirty([(user_id, day)]),
+    )
+    if not applied:
+        # Пересчет дня в очереди заново выведет и неделю, и месяц
+        return
+    for model, period_start, _period_end in PERIOD_ROLLUPS:
+        _apply_delta(
+            model,
+            {'counter_id': counter_id, 'period_start': period_start(day)},
+            {'user_id': user_id},
+            total_delta,
+            count_delta,
+            lambda: mark_summaries_dirty([(user_id, day)]),
+        )
+
+
+def update_summaries_for_interval(before, after):
+    """Apply the difference between two contributions of the same interval.
+
+    ``before``/``after`` come from ``interval_contribution`` taken prior to and
+    after the write; ``None`` means the interval did not count (open, created
+    or deleted).
+    """
+    user_deltas = {}
+    counter_deltas = {}
+    for contribution, sign in ((before, -1), (after, 1)):
+        if contribution is None:
+            continue
+        duration = contribution.duration if sign > 0 else -contribution.duration
+        user_key = (contribution.user_id, contribution.day)
+        total, count = user_deltas.get(user_key, (timedelta(), 0))
+        user_deltas[user_key] = (total + duration, count + sign)
+        counter_key = (contribution.user_id, contribution.counter_id, contribution.day)
+        total, count = counter_deltas.get(counter_key, (timedelta(), 0))
+        counter_deltas[counter_key] = (total + duration, count + sign)
+    for (user_id, day), (total, count) in user_deltas.items():
+        apply_daily_summary_delta(user_id, day, total, count)
+    for (user_id, counter_id, day), (total, count) in counter_deltas.items():
+        apply_counter_summary_delta(user_id, counter_id, day, total, count)
+
+
+def release_counter_summaries(counter):
+    """Queue the days of a counter about to be deleted for recomputation.
+
+    ``DailySummary`` has no counter key, so cascading the counter's intervals
+    would leave their time in the per-day totals. The days are recomputed by
+    the drain after the delete commits instead of being adjusted row by row on
+    the request path; the counter's own rollups go away with the cascade.
+    """
+    days = CounterDailySummary.objects.filter(counter=counter).values_list('date', flat=True)
+    mark_summaries_dirty((counter.user_id, day) for day in days)
+
+
+def plan_range(start, end):
+    """Split ``[start, end]`` into whole months, whole weeks and leftover day spans."""
+    months, weeks, days = [], [], []
+    cursor = start
+    while cursor <= end:
+        week_last = cursor + timedelta(days=6)
+        if cursor.day == 1 and _month_end(cursor) <= end:
+            months.append(cursor)
+            cursor = _month_end(cursor) + timedelta(days=1)
+        elif cursor.weekday() == 0 and week_last <= end and (
+            # Неделя через границу месяца не должна отнимать дни у целого месяца
+            week_last.month == cursor.month or _month_end(week_last) > end
+        ):
+            weeks.append(cursor)
+            cursor = week_last + timedelta(days=1)
+        else:
+            if days and days[-1][1] == cursor - timedelta(days=1):
+                days[-1] = (days[-1][0], cursor)
+            else:
+                days.append((cursor, cursor))
+            cursor += timedelta(days=1)
+    return RangePlan(months, weeks, days)
+
+
+def counter_totals_for_range(user_id, start, end):
+    """Return per-counter totals of ``[start, end]`` read from the rollups, largest first."""
+    plan = plan_range(start, end)
+    parts = []
+    if plan.months:
+        parts.append(CounterMonthlySummary.objects.filter(user_id=user_id, period_start__in=plan.months))
+    if plan.weeks:
+        parts.append(CounterWeeklySummary.objects.filter(user_id=user_id, period_start__in=plan.weeks))
+    if plan.days:
+        spans = Q()
+        for first, last in plan.days:
+            spans |= Q(date__range=(first, last))
+        parts.append(CounterDailySummary.objects.filter(spans, user_id=user_id))
+    if not parts:
+        return []
+    parts = [
+        part.order_by()
+        .values('counter_id', 'counter__name', 'counter__color')
+        .annotate(total=Sum('total_time'), interval_count=Sum('interval_count'))
+        for part in parts
+    ]
+    # Один запрос на все части плана; части складываются по счетчику
+    rows = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+    totals = {}
+    for row in rows:
+        item = totals.setdefault(row['counter_id'], {**row, 'total': timedelta(), 'interval_count': 0})
+        item['total'] += row['total'] or timedelta()
+        item['interval_count'] += row['interval_count'] or 0
+    return sorted(totals.values(), key=lambda item: item['total'], reverse=True)
+
+
+def daily_totals_for_range(user_id, start, end):
+    """Return ``{'day', 'total'}`` rows of ``[start, end]`` from ``DailySummary``."""
+    rows = DailySummary.objects.filter(
+        user_id=user_id,
+        date__range=(start, end),
+        interval_count__gt=0,
+    ).order_by('date').values_list('date', 'total_time')
+    return [{'day': day, 'total': total} for day, total in rows]
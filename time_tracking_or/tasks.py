@@ -121,3 +121,52 @@ def cleanup_old_feedback_attempts():
         'success': True,
         'message': f'Очищено {count} старых записей обратной связи'
     }
+
+
+@shared_task
+def reconcile_project_rating_stats():
+    """Recount like/dislike totals and fix drift of the maintained counter row."""
+    from .ratings import reconcile_rating_stats
+
+    stats = reconcile_rating_stats()
+    return {
+        'success': True,
+        'message': f'Итоги оценок пересчитаны: {stats["total_likes"]} / {stats["total_dislikes"]}',
+    }
+
+
+@shared_task(bind=True)
+def rebuild_summaries_task(self, start=None, end=None, user_ids=None):
+    """Rebuild summary rollups in bulk, publishing progress as the task state."""
+    from datetime import date
+
+    from .rebuild import rebuild_summaries
+
+    def report(stats):
+        # В eager-режиме (тесты, разработка) бэкенда результатов может не быть
+        if self.request.id and not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta=stats)
+
+    stats = rebuild_summaries(
+        start=date.fromisoformat(start) if start else None,
+        end=date.fromisoformat(end) if end else None,
+        user_ids=user_ids,
+        progress=report,
+    )
+    return {
+        'success': True,
+        'message': f'Итоги пересчитаны для пользователей: {stats["users_done"]}',
+        **stats,
+    }
+
+
+@shared_task
+def recompute_dirty_summaries_task():
+    """Drain the queue of (user, day) summaries marked for recomputation."""
+    from .summaries import recompute_dirty_summaries
+
+    processed = recompute_dirty_summaries()
+    return {
+        'success': True,
+        'message': f'Пересчитано дней: {processed}',
+    }
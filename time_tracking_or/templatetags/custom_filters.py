@@ -1,6 +1,6 @@
 """Custom template filters for formatting durations and helper lookups."""
 
-from datetime import timedelta
+from datetime import date, timedelta
 
 from django import template
 from django.utils import timezone
@@ -65,13 +65,22 @@ def duration_format(duration):
 
 
 
+def _summary_for(daily_summaries, selected_date):
+    """Find the summary of ``selected_date`` in a queryset of daily summaries."""
+    if isinstance(selected_date, str):
+        try:
+            selected_date = date.fromisoformat(selected_date)
+        except ValueError:
+            return None
+    if not hasattr(daily_summaries, 'filter'):  # Проверяем, поддерживает ли объект метод filter
+        return None
+    return daily_summaries.filter(date=selected_date).first()
+
+
 @register.filter
 def get_summary_interval_count(daily_summaries, selected_date):
     """Return interval count for the summary matching the selected day."""
-    if not hasattr(daily_summaries, 'filter'):  # Проверяем, поддерживает ли объект метод filter
-        return "Нет данных"
-
-    summary = daily_summaries.filter(date=selected_date).first()
+    summary = _summary_for(daily_summaries, selected_date)
     if summary:
         return summary.interval_count
 
@@ -81,7 +90,7 @@ def get_summary_interval_count(daily_summaries, selected_date):
 @register.filter
 def get_summary_total_time(daily_summaries, selected_date):
     """Return formatted total time for the provided day if present."""
-    summary = daily_summaries.filter(date=selected_date).first()
+    summary = _summary_for(daily_summaries, selected_date)
     if summary:
         return duration_format(summary.total_time)
 
@@ -4,6 +4,8 @@ from django.urls import path
 
 from .views import (
     CheckTaskStatusView,
+    CounterEventStreamView,
+    CounterHistoryExportView,
     CounterHistoryView,
     CounterIntervalDeleteView,
     CounterIntervalUpdateView,
@@ -11,9 +13,11 @@ from .views import (
     CounterPauseView,
     CounterStartView,
     CounterStopView,
+    CounterSummaryExportView,
     CounterSummaryView,
     DeleteIntervalViewHTMX,
     IntervalDetailView,
+    IntervalImportView,
     ProjectRatingView,
     SendFeedbackView,
     TimeCounterCreateView,
@@ -31,11 +35,16 @@ urlpatterns = [
     path('counters/<int:pk>/pause/', CounterPauseView.as_view(), name='counter_pause'),
     path('counters/<int:pk>/stop/', CounterStopView.as_view(), name='counter_stop'),
     path('counters/<int:pk>/history/', CounterHistoryView.as_view(), name='counter_history'),
+    path('counters/<int:pk>/history/export/', CounterHistoryExportView.as_view(), name='counter_history_export'),
     path('counters/<int:pk>/manual/', CounterManualIntervalCreateView.as_view(), name='counter_manual_interval'),
+    path('counters/<int:pk>/import/', IntervalImportView.as_view(), name='counter_import'),
+    path('events/', CounterEventStreamView.as_view(), name='counter_events'),
     path('summary/', CounterSummaryView.as_view(), name='counter_summary'),
+    path('summary/export/', CounterSummaryExportView.as_view(), name='counter_summary_export'),
     path('intervals/<int:pk>/update/', CounterIntervalUpdateView.as_view(), name='interval_update'),
     path('intervals/<int:pk>/delete/', CounterIntervalDeleteView.as_view(), name='interval_delete'),
     path('interval/<int:pk>/delete/', DeleteIntervalViewHTMX.as_view(), name='interval_delite_htmx'),
+    path('intervals/import/', IntervalImportView.as_view(), name='interval_import'),
     path('intervals/<int:pk>/', IntervalDetailView.as_view(), name='interval_detail'),
     path('project/rating/', ProjectRatingView.as_view(), name='project_rating'),
     path('project/feedback/', SendFeedbackView.as_view(), name='send_feedback'),
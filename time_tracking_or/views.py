@@ -1,13 +1,18 @@
 """Views that power counter dashboards, history pages, and HTMX endpoints."""
 
+import csv
 from datetime import timedelta
+from functools import partial
 from urllib.parse import urlencode
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
 from django.db.models import Count, Sum
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
@@ -15,35 +20,65 @@ from django.utils import timezone
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.views.generic import CreateView, DeleteView, DetailView, ListView, TemplateView, UpdateView
-
-from .forms import TimeCounterForm, TimeIntervalFormEdit
-from .models import DailySummary, ProjectRating, TimeCounter, TimeInterval
-
-
-def recalculate_daily_summary(user, day):
-    """Recompute cached day summary for a specific user and date."""
-    aggregate = TimeInterval.objects.filter(
-        user=user,
-        day=day,
-        end_time__isnull=False,
-    ).aggregate(total=Sum('duration'), interval_count=Count('id'))
-
-    total = aggregate['total'] or timedelta()
-    interval_count = aggregate['interval_count'] or 0
-
-    if interval_count == 0 and total == timedelta():
-        DailySummary.objects.filter(user=user, date=day).delete()
-        return
-
-    DailySummary.objects.update_or_create(
-        user=user,
-        date=day,
-        defaults={
-            'total_time': total,
-            'interval_count': interval_count,
-        },
+from django.views.generic import CreateView, DeleteView, DetailView, FormView, ListView, TemplateView, UpdateView
+
+from .cache import DASHBOARD_CACHE_TIMEOUT, dashboard_cache_key
+from .concurrency import gather_queries
+from .events import publish_event, sse_stream
+from .exports import export_intervals_response
+from .forms import IntervalImportForm, TimeCounterForm, TimeIntervalFormEdit
+from .imports import import_intervals, read_rows
+from .models import CounterDailySummary, ProjectRating, TimeCounter, TimeInterval
+from .pagination import HISTORY_ORDERING, paginate_history
+from .ratings import apply_rating_change, get_rating_stats
+from .summaries import (
+    counter_totals_for_range,
+    daily_totals_for_range,
+    interval_contribution,
+    release_counter_summaries,
+    update_summaries_for_interval,
+)
+
+
+def guest_counter_limit(request):
+    """Return how many counters the requester may own if it is a limited guest, else None."""
+    limit = getattr(settings, 'GUEST_COUNTER_LIMIT', 0)
+    if limit <= 0:
+        return None
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return None
+    is_guest = (
+        request.session.get('is_guest')
+        or not user.has_usable_password()
+        or user.username.startswith('guest_')
     )
+    return limit if is_guest else None
+
+
+class PendingGuestLoginRequiredMixin(LoginRequiredMixin):
+    """``LoginRequiredMixin`` that also shows the page (GET) to a guest not created yet."""
+
+    def dispatch(self, request, *args, **kwargs):
+        # Пользователь гостя появится при первом действии (см. GuestIPAuthenticationMiddleware)
+        if request.method == 'GET' and not request.user.is_authenticated and request.session.get('is_guest'):
+            return super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """``LoginRequiredMixin`` for async views: the user is resolved without blocking the loop."""
+
+    # Пускать ли гостя, для которого пользователь еще не создан
+    allow_pending_guest = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated and not (
+            self.allow_pending_guest and await request.session.aget('is_guest')
+        ):
+            return self.handle_no_permission()
+        return await super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
 
 
 class TimeCounterListView(ListView):
@@ -52,15 +87,29 @@ class TimeCounterListView(ListView):
     context_object_name = 'counters'
     paginate_by = 6
 
-    def dispatch(self, request, *args, **kwargs):
-        """Redirect anonymous users to the welcome screen."""
-        if not request.user.is_authenticated:
-            context = {
-                'login_url': reverse('login'),
-                'register_url': reverse('register'),
-            }
-            return render(request, 'time_tracking_main/welcome.html', context)
-        return super().dispatch(request, *args, **kwargs)
+    async def get(self, request, *args, **kwargs):
+        """Render the dashboard, loading its independent parts concurrently."""
+        request.user = await request.auser()
+        if not request.user.is_authenticated and not await request.session.aget('is_guest'):
+            return await sync_to_async(self.render_welcome)(request)
+        selected_date = self.get_selected_date()
+        self.object_list = self.get_queryset()
+        # Страница счетчиков, итоги дня и рейтинг не зависят друг от друга
+        page_context, stats, rating_context = await gather_queries(
+            self.get_page_context,
+            partial(self.get_cached_dashboard_stats, selected_date),
+            partial(get_project_rating_context, request.user),
+        )
+        context = self.build_dashboard_context(page_context, selected_date, stats, rating_context)
+        return self.render_to_response(context)
+
+    def render_welcome(self, request):
+        """Show the welcome screen to anonymous visitors."""
+        context = {
+            'login_url': reverse('login'),
+            'register_url': reverse('register'),
+        }
+        return render(request, 'time_tracking_main/welcome.html', context)
 
     def get_selected_date(self):
         """Return the currently selected day, guarded against bad input."""
@@ -74,32 +123,80 @@ class TimeCounterListView(ListView):
 
     def get_queryset(self):
         """Limit counters to the current user."""
+        if not self.request.user.is_authenticated:
+            # Гость еще не создан — счетчиков у него нет
+            return TimeCounter.objects.none()
         return TimeCounter.objects.filter(user=self.request.user).order_by('name')
 
+    def get_page_context(self):
+        """Paginate the counter list and load the rows of the current page."""
+        context = super().get_context_data()
+        counters = list(context['object_list'])
+        if context.get('page_obj') is not None:
+            context['page_obj'].object_list = counters
+        context['object_list'] = context[self.context_object_name] = counters
+        return context
+
     def get_context_data(self, **kwargs):
         """Collect aggregated stats, chart data, and HTMX helper context."""
         context = super().get_context_data(**kwargs)
         selected_date = self.get_selected_date()
-        user_counters = TimeCounter.objects.filter(user=self.request.user).order_by('name')
-        intervals_qs = TimeInterval.objects.filter(
-            counter__user=self.request.user,
-            day=selected_date,
+        return self.build_dashboard_context(
+            context,
+            selected_date,
+            self.get_cached_dashboard_stats(selected_date),
+            # Добавляем контекст рейтинга проекта
+            get_project_rating_context(self.request.user),
+        )
+
+    def build_dashboard_context(self, context, selected_date, stats, rating_context):
+        """Merge the separately loaded dashboard parts into one template context."""
+        context.update(
+            {
+                'selected_date': selected_date,
+                **stats,
+                'create_form': TimeCounterForm(),
+                'dashboard_page': context['page_obj'].number if context.get('page_obj') else 1,
+                **rating_context,  # Добавляем контекст рейтинга
+            }
         )
+        return context
+
+    def get_cached_dashboard_stats(self, selected_date):
+        """Return the day's stats from cache, computing them on a miss."""
+        if not self.request.user.is_authenticated:
+            return self.get_dashboard_stats(selected_date)
+        # Вычисляемая часть дашборда кешируется под версией данных пользователя
+        cache_key = dashboard_cache_key(self.request.user.pk, selected_date)
+        stats = cache.get(cache_key)
+        if stats is None:
+            stats = self.get_dashboard_stats(selected_date)
+            cache.set(cache_key, stats, DASHBOARD_CACHE_TIMEOUT)
+        return stats
 
+    def get_dashboard_stats(self, selected_date):
+        """Compute per-counter totals, running state and chart data for a day."""
+        user_counters = list(self.get_queryset().select_related('active_interval'))
+
+        # Итоги по счетчикам берем из суточного свода, а не агрегируем интервалы
         totals = {
             item['counter_id']: {
-                'total': item['total'] or timedelta(),
+                'total': item['total_time'],
                 'interval_count': item['interval_count'],
             }
-            for item in intervals_qs.filter(end_time__isnull=False)
-            .values('counter_id')
-            .annotate(total=Sum('duration'), interval_count=Count('id'))
-        }
-
-        active_map = {
-            interval.counter_id: interval
-            for interval in intervals_qs.filter(end_time__isnull=True).select_related('counter')
-        }
+            for item in CounterDailySummary.objects.filter(
+                user=self.request.user,
+                date=selected_date,
+            ).values('counter_id', 'total_time', 'interval_count')
+        } if user_counters else {}
+
+        # Запущенные счетчики читаем из денормализованного active_interval без доп. запросов
+        active_map = {}
+        for counter in user_counters:
+            interval = counter.active_interval
+            if interval is not None and interval.day == selected_date:
+                interval.counter = counter
+                active_map[counter.id] = interval
 
         counter_stats = {}
         overall_total = timedelta()
@@ -126,29 +223,20 @@ class TimeCounterListView(ListView):
                 chart_values.append(round(total_duration.total_seconds() / 3600, 2))
                 chart_colors.append(counter.color)
 
-        # Добавляем контекст рейтинга проекта
-        rating_context = get_project_rating_context(self.request.user)
-        
-        context.update(
-            {
-                'selected_date': selected_date,
-                'counter_stats': counter_stats,
-                'overall_total': overall_total,
-                'chart_labels': chart_labels,
-                'chart_values': chart_values,
-                'chart_colors': chart_colors,
-                'create_form': TimeCounterForm(),
-                'active_counter_id': active_counter_id,
-                'chart_max_value': max(chart_values) if chart_values else 0,
-                'chart_total': sum(chart_values) if chart_values else 0,
-                'counter_total': user_counters.count(),
-                'active_counter': active_interval.counter if active_interval else None,
-                'active_interval': active_interval,
-                'paused_counters': self.request.session.get('paused_counters', []),
-                **rating_context,  # Добавляем контекст рейтинга
-            }
-        )
-        return context
+        return {
+            'counter_stats': counter_stats,
+            'overall_total': overall_total,
+            'chart_labels': chart_labels,
+            'chart_values': chart_values,
+            'chart_colors': chart_colors,
+            'active_counter_id': active_counter_id,
+            'chart_max_value': max(chart_values) if chart_values else 0,
+            'chart_total': sum(chart_values) if chart_values else 0,
+            'counter_total': len(user_counters),
+            'active_counter': active_interval.counter if active_interval else None,
+            'active_interval': active_interval,
+            'paused_counters': [counter.id for counter in user_counters if counter.is_paused],
+        }
 
     def get_template_names(self):
         """Return partial template when HTMX requests the dashboard."""
@@ -157,7 +245,7 @@ class TimeCounterListView(ListView):
         return [self.template_name]
 
 
-class TimeCounterCreateView(LoginRequiredMixin, CreateView):
+class TimeCounterCreateView(PendingGuestLoginRequiredMixin, CreateView):
     """Form-based creation of a new counter."""
     model = TimeCounter
     form_class = TimeCounterForm
@@ -180,20 +268,10 @@ class TimeCounterCreateView(LoginRequiredMixin, CreateView):
 
     def _guest_limit_reached(self, request):
         """Return True if the current request comes from a limited guest."""
-        limit = getattr(settings, 'GUEST_COUNTER_LIMIT', 0)
-        if limit <= 0:
-            return False
-        user = getattr(request, 'user', None)
-        if not user or not user.is_authenticated:
+        limit = guest_counter_limit(request)
+        if limit is None:
             return False
-        is_guest = (
-            request.session.get('is_guest')
-            or not user.has_usable_password()
-            or user.username.startswith('guest_')
-        )
-        if not is_guest:
-            return False
-        counter_count = TimeCounter.objects.filter(user=user).count()
+        counter_count = TimeCounter.objects.filter(user=request.user).count()
         return counter_count >= limit
 
     def _redirect_guest_limit(self):
@@ -233,6 +311,12 @@ class TimeCounterDeleteView(LoginRequiredMixin, DeleteView):
         """Ensure users can delete only their own counters."""
         return TimeCounter.objects.filter(user=self.request.user)
 
+    def form_valid(self, form):
+        """Remove the counter's time from the daily summaries together with the counter."""
+        with transaction.atomic():
+            release_counter_summaries(self.object)
+            return super().form_valid(form)
+
     def delete(self, request, *args, **kwargs):
         """Show a success message after the counter is removed."""
         messages.success(self.request, 'Счетчик удален.')
@@ -247,7 +331,11 @@ class CounterHistoryView(LoginRequiredMixin, ListView):
 
     def dispatch(self, request, *args, **kwargs):
         """Cache the requested counter and assert ownership."""
-        self.counter = get_object_or_404(TimeCounter, pk=self.kwargs['pk'], user=request.user)
+        self.counter = get_object_or_404(
+            TimeCounter.objects.select_related('active_interval'),
+            pk=self.kwargs['pk'],
+            user=request.user,
+        )
         return super().dispatch(request, *args, **kwargs)
 
     def get_date_filters(self):
@@ -269,7 +357,7 @@ class CounterHistoryView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         """Return intervals ordered by day and creation time."""
-        qs = TimeInterval.objects.filter(counter=self.counter).order_by('-day', '-date_create')
+        qs = TimeInterval.objects.filter(counter=self.counter).order_by(*HISTORY_ORDERING)
         start, end = self.get_date_filters()
         if start:
             qs = qs.filter(day__gte=start)
@@ -277,13 +365,37 @@ class CounterHistoryView(LoginRequiredMixin, ListView):
             qs = qs.filter(day__lte=end)
         return qs
 
+    def paginate_queryset(self, queryset, page_size):
+        """Cut the page with a cursor unless numbered pages are requested explicitly."""
+        self.history_page = paginate_history(queryset, self.request.GET, page_size)
+        page = self.history_page
+        return page['paginator'], page['page_obj'], page['intervals'], page['is_paginated']
+
+    def get_template_names(self):
+        """Return only the next rows for HTMX "load more" requests."""
+        if self.request.headers.get('HX-Request') and self.request.GET.get('cursor'):
+            return ['time_tracking_main/partials/history_rows.html']
+        return [self.template_name]
+
     def get_context_data(self, **kwargs):
         """Augment context with aggregated statistics for the listing."""
         context = super().get_context_data(**kwargs)
         start, end = self.get_date_filters()
+        context.update(
+            {
+                'counter': self.counter,
+                'filter_start': start,
+                'filter_end': end,
+                'start_number': self.history_page['start_number'],
+                'next_cursor': self.history_page['next_cursor'],
+            }
+        )
+        if self.get_template_names() != [self.template_name]:
+            # «Показать еще» рендерит только строки — итоги по всему диапазону им не нужны
+            return context
         intervals = self.get_queryset().filter(end_time__isnull=False)
         aggregate = intervals.aggregate(total=Sum('duration'), count=Count('id'))
-        active_interval = self.counter.intervals.filter(end_time__isnull=True).order_by('-date_create').first()
+        active_interval = self.counter.active_interval
         active_total = 0
         if active_interval and active_interval.start_time:
             day_total = (
@@ -295,9 +407,6 @@ class CounterHistoryView(LoginRequiredMixin, ListView):
             active_total = int(day_total.total_seconds())
         context.update(
             {
-                'counter': self.counter,
-                'filter_start': start,
-                'filter_end': end,
                 'total_duration': aggregate['total'] or timedelta(),
                 'interval_count': aggregate['count'] or 0,
                 'active_interval': active_interval,
@@ -307,6 +416,15 @@ class CounterHistoryView(LoginRequiredMixin, ListView):
         return context
 
 
+class CounterHistoryExportView(CounterHistoryView):
+    """Stream the counter history as CSV or JSON, honouring the start/end filters."""
+
+    def get(self, request, *args, **kwargs):
+        """Return a streaming download instead of the HTML listing."""
+        filename = f'{self.counter.slug or self.counter.pk}-history'
+        return export_intervals_response(request, self.get_queryset(), filename)
+
+
 class CounterIntervalUpdateView(LoginRequiredMixin, UpdateView):
     """HTMX-enabled inline editor for individual intervals."""
     model = TimeInterval
@@ -364,11 +482,19 @@ class CounterIntervalUpdateView(LoginRequiredMixin, UpdateView):
 
     def form_valid(self, form):
         """Persist changes, refresh summaries, and return updated markup."""
-        original_day = self.get_object().day
+        before = interval_contribution(self.get_object())
         response = super().form_valid(form)
-        recalculate_daily_summary(self.request.user, self.object.day)
-        if original_day != self.object.day:
-            recalculate_daily_summary(self.request.user, original_day)
+        update_summaries_for_interval(before, interval_contribution(self.object))
+        if before is None and self.object.end_time is not None:
+            # Интервал закрыт вручную — счетчик больше не запущен
+            TimeCounter.objects.filter(
+                pk=self.object.counter_id,
+                active_interval=self.object,
+            ).update(active_interval=None)
+        publish_event(
+            self.request.user.pk, 'edit', self.request,
+            counter_id=self.object.counter_id, interval_id=self.object.pk,
+        )
         if self.request.headers.get('HX-Request'):
             number = self.request.POST.get('num')
             start = self.request.POST.get('start')
@@ -410,24 +536,12 @@ class CounterIntervalUpdateView(LoginRequiredMixin, UpdateView):
                     row_ctx['filter_end'] = timezone.datetime.strptime(end, '%Y-%m-%d').date()
                 except ValueError:
                     pass
-            row_html = render_to_string(
-                'time_tracking_main/partials/history_interval_row.html',
-                row_ctx,
-                request=self.request,
-            )
-            stats_html_inner = render_to_string(
-                'time_tracking_main/partials/history_stats.html',
-                stats_ctx,
-                request=self.request,
-            )
-            # Возвращаем строку + OOB обновление статистики
-            full_html = (
-                row_html
-                + "<div id='history-stats' hx-swap-oob='true'>"
-                + stats_html_inner
-                + "</div>"
+            # Строка + OOB обновление статистики одним рендером
+            return render(
+                self.request,
+                'time_tracking_main/partials/history_row_update.html',
+                {**stats_ctx, **row_ctx},
             )
-            return HttpResponse(full_html)
         return response
 
     def form_invalid(self, form):
@@ -449,9 +563,10 @@ class CounterIntervalDeleteView(LoginRequiredMixin, View):
         """Delete an interval and recalculate summaries."""
         interval = get_object_or_404(TimeInterval, pk=pk, counter__user=request.user)
         counter_id = interval.counter_id
-        day = interval.day
+        before = interval_contribution(interval)
         interval.delete()
-        recalculate_daily_summary(request.user, day)
+        update_summaries_for_interval(before, None)
+        publish_event(request.user.pk, 'delete', request, counter_id=counter_id, interval_id=pk)
         messages.success(request, 'Интервал удален.')
         return redirect('counter_history', pk=counter_id)
 
@@ -485,7 +600,11 @@ class CounterManualIntervalCreateView(LoginRequiredMixin, CreateView):
         form.instance.user = self.request.user
         messages.success(self.request, 'Интервал добавлен вручную.')
         response = super().form_valid(form)
-        recalculate_daily_summary(self.request.user, form.instance.day)
+        update_summaries_for_interval(None, interval_contribution(form.instance))
+        publish_event(
+            self.request.user.pk, 'edit', self.request,
+            counter_id=self.counter.pk, interval_id=form.instance.pk,
+        )
         return response
 
     def get_success_url(self):
@@ -493,19 +612,91 @@ class CounterManualIntervalCreateView(LoginRequiredMixin, CreateView):
         return reverse('counter_history', kwargs={'pk': self.counter.pk})
 
 
+class IntervalImportView(PendingGuestLoginRequiredMixin, FormView):
+    """Bulk upload of intervals from a CSV/JSON file, optionally into one counter."""
+    form_class = IntervalImportForm
+    template_name = 'time_tracking_main/interval_import.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        """Resolve the optional target counter and enforce ownership."""
+        self.counter = None
+        if 'pk' in self.kwargs and request.user.is_authenticated:
+            self.counter = get_object_or_404(TimeCounter, pk=self.kwargs['pk'], user=request.user)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        """Add the target counter to the template context."""
+        context = super().get_context_data(**kwargs)
+        context['counter'] = self.counter
+        return context
+
+    def form_valid(self, form):
+        """Import the uploaded rows and report how many were written."""
+        rows = read_rows(form.cleaned_data['file'], form.import_format)
+        try:
+            result = import_intervals(
+                self.request.user,
+                rows,
+                counter=self.counter,
+                counter_limit=guest_counter_limit(self.request),
+            )
+        except (ValueError, csv.Error) as exc:
+            form.add_error('file', f'Не удалось прочитать файл: {exc}')
+            return self.form_invalid(form)
+        messages.success(self.request, f'Импортировано интервалов: {result.created}.')
+        if result.errors:
+            details = '; '.join(f'строка {number}: {error}' for number, error in result.errors[:5])
+            messages.warning(self.request, f'Пропущено строк: {len(result.errors)} ({details}).')
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        """Return to the counter history or the dashboard."""
+        if self.counter:
+            return reverse('counter_history', kwargs={'pk': self.counter.pk})
+        return reverse('home')
+
+
 class CounterBaseActionView(LoginRequiredMixin, View):
     """Base class for start/pause/stop counter actions."""
     action_message = ''
+    event_type = ''
 
     def post(self, request, pk):
         """Resolve the counter and delegate to subclass handlers."""
-        counter = get_object_or_404(TimeCounter, pk=pk, user=request.user)
+        counter = get_object_or_404(
+            TimeCounter.objects.select_related('active_interval'),
+            pk=pk,
+            user=request.user,
+        )
         return self.handle(request, counter)
 
     def handle(self, request, counter):  # pragma: no cover - override required
         """Subclasses must implement specific business logic."""
         raise NotImplementedError
 
+    def get_open_interval(self, counter):
+        """Return the counter's open interval, trusting the denormalized pointer first."""
+        interval = counter.active_interval
+        if interval is not None and interval.end_time is None:
+            return interval
+        return counter.intervals.filter(end_time__isnull=True).order_by('-date_create').first()
+
+    def close_interval(self, counter, interval, paused=False):
+        """Finish ``interval`` now and clear the counter's running state atomically."""
+        local_time = timezone.localtime()
+        interval.end_time = local_time.time()
+        interval.day = timezone.localdate()
+        with transaction.atomic():
+            interval.save(update_fields=['end_time', 'day', 'duration'])
+            TimeCounter.objects.filter(pk=counter.pk).update(active_interval=None, is_paused=paused)
+            update_summaries_for_interval(None, interval_contribution(interval))
+            publish_event(
+                counter.user_id, self.event_type, self.request,
+                counter_id=counter.pk, interval_id=interval.pk,
+            )
+        counter.active_interval = None
+        counter.is_paused = paused
+
     def get_redirect(self, request):
         """Return a redirect to `next` or the dashboard."""
         next_url = request.POST.get('next') or request.GET.get('next')
@@ -515,19 +706,11 @@ class CounterBaseActionView(LoginRequiredMixin, View):
         """Return HTMX fragments for dashboard or history contexts."""
         # Если это действия со страницы истории (есть флаг history и counter передан)
         if (request.POST.get('history') or request.GET.get('history')) and counter:
-            qs = TimeInterval.objects.filter(counter=counter).order_by('-day', '-date_create')
-            from django.core.paginator import Paginator
-            paginator = Paginator(qs, 10)
-            page_number = 1
-            try:
-                if request.POST.get('page'):
-                    page_number = int(request.POST.get('page'))
-            except ValueError:
-                page_number = 1
-            page_obj = paginator.get_page(page_number)
+            qs = TimeInterval.objects.filter(counter=counter)
+            page = paginate_history(qs, request.POST, CounterHistoryView.paginate_by)
             finished = qs.filter(end_time__isnull=False)
             aggregate = finished.aggregate(total=Sum('duration'), count=Count('id'))
-            active_interval = qs.filter(end_time__isnull=True).first()
+            active_interval = counter.active_interval
             active_total = 0
             if active_interval and active_interval.start_time:
                 day_total = qs.filter(day=active_interval.day, end_time__isnull=False).aggregate(
@@ -536,10 +719,7 @@ class CounterBaseActionView(LoginRequiredMixin, View):
                 active_total = int(day_total.total_seconds())
             ctx = {
                 'counter': counter,
-                'intervals': page_obj.object_list,
-                'page_obj': page_obj,
-                'paginator': paginator,
-                'is_paginated': page_obj.has_other_pages(),
+                **page,
                 'interval_count': aggregate.get('count') or 0,
                 'total_duration': aggregate.get('total') or timedelta(),
                 'active_interval': active_interval,
@@ -550,45 +730,22 @@ class CounterBaseActionView(LoginRequiredMixin, View):
                 ctx,
                 request=request,
             )
-            stats_html = render_to_string(
-                'time_tracking_main/partials/history_stats.html',
-                ctx,
+            # Таблица целиком (а не <tbody>) одним рендером: замена <tbody> дублируется в некоторых браузерах
+            table_html = render_to_string(
+                'time_tracking_main/partials/history_table.html',
+                {**ctx, 'oob': True},
                 request=request,
             )
-            # Формируем полный контейнер таблицы, чтобы избежать проблем с заменой <tbody> (дублирование в некоторых браузерах)
-            start_index = page_obj.start_index()
-            rows_html = []
-            for offset, interval in enumerate(page_obj.object_list):
-                rows_html.append(
-                    render_to_string(
-                        'time_tracking_main/partials/history_interval_row.html',
-                        {
-                            'interval': interval,
-                            'number': start_index + offset,  # начинается с 1
-                        },
-                        request=request,
-                    )
-                )
-            table_container = (
-                "<div id='history-intervals' hx-swap-oob='true'>"
-                "<table class='table table-modern align-middle history-table'>"
-                "<thead><tr>"
-                "<th scope='col' style='width:72px;'>№</th>"
-                "<th scope='col'>Дата</th>"
-                "<th scope='col'>Старт</th>"
-                "<th scope='col'>Стоп</th>"
-                "<th scope='col'>Длительность</th>"
-                "<th scope='col' class='text-end'>Действия</th>"
-                "</tr></thead>"
-                "<tbody id='history-intervals-body'>"
-                + ''.join(rows_html)
-                + "</tbody></table>"
-                "</div>"
-            )
-            stats_oob = (
-                "<div id='history-stats' hx-swap-oob='true'>" + stats_html + "</div>"
+            stats_oob = render_to_string(
+                'time_tracking_main/partials/history_stats_oob.html',
+                ctx,
+                request=request,
             )
-            return HttpResponse(controls_html + stats_oob + table_container)
+            return HttpResponse(controls_html + stats_oob + table_html)
+
+        # Кнопки дашборда просят только измененную карточку и OOB-фрагменты итогов
+        if request.POST.get('fragment') == 'card' and counter:
+            return self.hx_card_response(request, counter)
 
         # Иначе возвращаем дашборд (главная панель)
         view = TimeCounterListView()
@@ -598,33 +755,122 @@ class CounterBaseActionView(LoginRequiredMixin, View):
         context = view.get_context_data()
         return render(request, 'time_tracking_main/_counter_dashboard_content.html', context)
 
+    def hx_card_response(self, request, counter):
+        """Return the pressed counter card plus out-of-band totals and chart."""
+        try:
+            selected_date = timezone.datetime.strptime(request.POST.get('date', ''), '%Y-%m-%d').date()
+        except ValueError:
+            selected_date = timezone.localdate()
+        try:
+            page_number = max(int(request.POST.get('page') or 1), 1)
+        except ValueError:
+            page_number = 1
+
+        # Один запрос по суточному своду дает и карточку, и общий итог, и диаграмму
+        day_rows = list(
+            CounterDailySummary.objects.filter(user=request.user, date=selected_date)
+            .select_related('counter')
+            .order_by('counter__name')
+        )
+        user_counters = list(
+            TimeCounter.objects.filter(user=request.user).order_by('name').values_list('id', 'active_interval_id')
+        )
+        running_id = next((pk for pk, interval_id in user_counters if interval_id), None)
+        if running_id == counter.id:
+            active_counter = counter
+        elif running_id:
+            active_counter = TimeCounter.objects.select_related('active_interval').get(pk=running_id)
+        else:
+            active_counter = None
+        active_interval = active_counter.active_interval if active_counter else None
+        if active_interval is not None and active_interval.day != selected_date:
+            active_counter = active_interval = None
+
+        card_row = next((row for row in day_rows if row.counter_id == counter.id), None)
+        chart_rows = [row for row in day_rows if row.total_time > timedelta()]
+        chart_values = [round(row.total_time.total_seconds() / 3600, 2) for row in chart_rows]
+        ctx = {
+            'counter': counter,
+            'stats': {
+                'total_duration': card_row.total_time if card_row else timedelta(),
+                'interval_count': card_row.interval_count if card_row else 0,
+                'active_interval': active_interval if active_counter is counter else None,
+            },
+            'selected_date': selected_date,
+            'overall_total': sum((row.total_time for row in day_rows), timedelta()),
+            'chart_labels': [row.counter.name for row in chart_rows],
+            'chart_values': chart_values,
+            'chart_colors': [row.counter.color for row in chart_rows],
+            'chart_total': sum(chart_values),
+            'counter_total': len(user_counters),
+            'active_counter_id': active_counter.id if active_counter else None,
+            'active_counter': active_counter,
+            'active_interval': active_interval,
+            'next_url': request.POST.get('next', ''),
+            'dashboard_page': page_number,
+        }
+        parts = [
+            render_to_string('time_tracking_main/partials/dashboard_counter_card.html', ctx, request=request),
+        ]
+        oob_ctx = {**ctx, 'oob': True}
+        for template in ('dashboard_total.html', 'dashboard_day_stats.html', 'dashboard_chart.html'):
+            parts.append(render_to_string(f'time_tracking_main/partials/{template}', oob_ctx, request=request))
+        # Доступность «Старт» у соседних карточек текущей страницы зависит от активного счетчика
+        page_size = TimeCounterListView.paginate_by
+        page_ids = [pk for pk, _interval_id in user_counters][(page_number - 1) * page_size:page_number * page_size]
+        for pk in page_ids:
+            if pk != counter.id:
+                parts.append(render_to_string(
+                    'time_tracking_main/partials/dashboard_start_button.html',
+                    {**oob_ctx, 'counter': {'id': pk}},
+                ))
+        return HttpResponse(''.join(parts))
+
 
 class CounterStartView(CounterBaseActionView):
     """Start (or resume) timer for the selected counter."""
+    event_type = 'start'
+
     def handle(self, request, counter):
-        """Validate exclusivity and create a new active interval."""
-        active_interval = TimeInterval.objects.filter(counter__user=request.user, end_time__isnull=True).exclude(counter=counter).first()
-        if active_interval:
-            messages.warning(request, 'Невозможно делать два дела одновременно. Завершите текущий счетчик.')
-            if request.headers.get('HX-Request'):
-                return self.hx_response(request, counter=counter)
-            return self.get_redirect(request)
+        """Open a new active interval; the database rejects a second open one."""
         if counter.is_running:
-            messages.info(request, 'Счетчик уже запущен.')
-            if request.headers.get('HX-Request'):
-                return self.hx_response(request, counter=counter)
-            return self.get_redirect(request)
+            return self.reject_start(request, counter, counter.id)
         local_time = timezone.localtime()
-        TimeInterval.objects.create(
-            counter=counter,
-            user=request.user,
-            day=timezone.localdate(),
-            start_time=local_time.time(),
-        )
-        paused = request.session.get('paused_counters', [])
-        if counter.id in paused:
-            paused.remove(counter.id)
-            request.session['paused_counters'] = paused
+        try:
+            with transaction.atomic():
+                interval = TimeInterval.objects.create(
+                    counter=counter,
+                    user=request.user,
+                    day=timezone.localdate(),
+                    start_time=local_time.time(),
+                )
+                TimeCounter.objects.filter(pk=counter.pk).update(active_interval=interval, is_paused=False)
+                publish_event(
+                    request.user.pk, self.event_type, request,
+                    counter_id=counter.pk,
+                    interval_id=interval.pk,
+                    started_at=f'{interval.day.isoformat()}T{interval.start_time.isoformat(timespec="seconds")}',
+                )
+        except IntegrityError:
+            # Сработало ограничение one_open_interval_per_user: у пользователя уже идет интервал
+            running_counter_id = (
+                TimeInterval.objects.filter(user=request.user, end_time__isnull=True)
+                .values_list('counter_id', flat=True)
+                .first()
+            )
+            return self.reject_start(request, counter, running_counter_id)
+        counter.active_interval = interval
+        counter.is_paused = False
+        if request.headers.get('HX-Request'):
+            return self.hx_response(request, counter=counter)
+        return self.get_redirect(request)
+
+    def reject_start(self, request, counter, running_counter_id):
+        """Explain why the timer was not started and return the usual response."""
+        if running_counter_id == counter.id:
+            messages.info(request, 'Счетчик уже запущен.')
+        else:
+            messages.warning(request, 'Невозможно делать два дела одновременно. Завершите текущий счетчик.')
         if request.headers.get('HX-Request'):
             return self.hx_response(request, counter=counter)
         return self.get_redirect(request)
@@ -633,24 +879,17 @@ class CounterStartView(CounterBaseActionView):
 class CounterPauseView(CounterBaseActionView):
     """Pause a running counter without closing the day summary."""
     action_message = 'Счетчик поставлен на паузу.'
+    event_type = 'pause'
 
     def handle(self, request, counter):
-        """Finalize the current interval but keep session marked as paused."""
-        interval = counter.intervals.filter(end_time__isnull=True).order_by('-date_create').first()
+        """Finalize the current interval and mark the counter as paused."""
+        interval = self.get_open_interval(counter)
         if not interval:
             messages.info(request, 'Нет активного интервала для паузы.')
             if request.headers.get('HX-Request'):
                 return self.hx_response(request, counter=counter)
             return self.get_redirect(request)
-        local_time = timezone.localtime()
-        interval.end_time = local_time.time()
-        interval.day = timezone.localdate()
-        interval.save(update_fields=['end_time', 'day', 'duration'])
-        recalculate_daily_summary(request.user, interval.day)
-        paused = request.session.get('paused_counters', [])
-        if counter.id not in paused:
-            paused.append(counter.id)
-            request.session['paused_counters'] = paused
+        self.close_interval(counter, interval, paused=True)
         if request.headers.get('HX-Request'):
             return self.hx_response(request, counter=counter)
         return self.get_redirect(request)
@@ -658,31 +897,42 @@ class CounterPauseView(CounterBaseActionView):
 
 class CounterStopView(CounterBaseActionView):
     """Stop the currently running interval and clear paused state."""
+    event_type = 'stop'
+
     def handle(self, request, counter):
         """Close the open interval and refresh day summaries."""
-        interval = counter.intervals.filter(end_time__isnull=True).order_by('-date_create').first()
+        interval = self.get_open_interval(counter)
         if not interval:
             messages.info(request, 'Нет активного интервала для остановки.')
             if request.headers.get('HX-Request'):
                 return self.hx_response(request, counter=counter)
             return self.get_redirect(request)
-        local_time = timezone.localtime()
-        interval.end_time = local_time.time()
-        interval.day = timezone.localdate()
-        interval.save(update_fields=['end_time', 'day', 'duration'])
-        recalculate_daily_summary(request.user, interval.day)
-        paused = request.session.get('paused_counters', [])
-        if counter.id in paused:
-            paused.remove(counter.id)
-            request.session['paused_counters'] = paused
+        self.close_interval(counter, interval)
         if request.headers.get('HX-Request'):
             return self.hx_response(request, counter=counter)
         return self.get_redirect(request)
 
 
-class CounterSummaryView(LoginRequiredMixin, TemplateView):
-    """Aggregated summary across periods (week/month/custom)."""
-    template_name = 'time_tracking_main/counter_summary.html'
+class CounterEventStreamView(View):
+    """Server-Sent Events stream of the user's counter events (needs an ASGI server)."""
+
+    async def get(self, request):
+        """Keep the connection open and forward bus events as they arrive."""
+        if not settings.REALTIME_EVENTS_ENABLED:
+            # Без ASGI поток занял бы воркер; EventSource не переподключается после 404
+            raise Http404
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+        response = StreamingHttpResponse(sse_stream(user.pk), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # nginx не должен буферизовать поток событий
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class CounterSummaryMixin:
+    """Period selection shared by the summary page and its export."""
 
     PERIODS = {
         'week': 'Неделя',
@@ -690,11 +940,6 @@ class CounterSummaryView(LoginRequiredMixin, TemplateView):
         'custom': 'Произвольный период',
     }
 
-    def dispatch(self, request, *args, **kwargs):
-        """Allow access but mark guest sessions for overlay."""
-        self.guest_mode = bool(request.session.get('is_guest'))
-        return super().dispatch(request, *args, **kwargs)
-
     def get_period_range(self):
         """Resolve selected period into a concrete (start, end) tuple."""
         period = self.request.GET.get('period', 'week')
@@ -719,6 +964,31 @@ class CounterSummaryView(LoginRequiredMixin, TemplateView):
             start = today - timedelta(days=6)
         return period, start, today
 
+
+class CounterSummaryView(AsyncLoginRequiredMixin, CounterSummaryMixin, TemplateView):
+    """Aggregated summary across periods (week/month/custom)."""
+    template_name = 'time_tracking_main/counter_summary.html'
+    allow_pending_guest = True
+
+    async def get(self, request, *args, **kwargs):
+        """Render the summary, loading per-counter and per-day totals concurrently."""
+        # Гостям доступна страница, но с оверлеем и без данных
+        self.guest_mode = bool(await request.session.aget('is_guest'))
+        if not self.guest_mode:
+            _period, start, end = self.get_period_range()
+            per_counter, per_day = await gather_queries(*self.get_summary_loaders(start, end))
+            kwargs.update(per_counter=per_counter, per_day=per_day)
+        return self.render_to_response(self.get_context_data(**kwargs))
+
+    def get_summary_loaders(self, start, end):
+        """Return callables loading per-counter and per-day totals of the range from the rollups."""
+        # Недельные/месячные итоги вместо интервалов: цена не зависит от числа интервалов в периоде
+        user_id = self.request.user.pk
+        return (
+            partial(counter_totals_for_range, user_id, start, end),
+            partial(daily_totals_for_range, user_id, start, end),
+        )
+
     def get_context_data(self, **kwargs):
         """Populate template context with per-counter/day aggregates."""
         context = super().get_context_data(**kwargs)
@@ -739,27 +1009,29 @@ class CounterSummaryView(LoginRequiredMixin, TemplateView):
             context.setdefault('summary_total', timedelta())
             return context
 
-        intervals = TimeInterval.objects.filter(
-            user=self.request.user,
-            day__range=(start, end),
-            end_time__isnull=False,
+        if 'per_counter' not in context:
+            context['per_counter'], context['per_day'] = [load() for load in self.get_summary_loaders(start, end)]
+        context['summary_total'] = sum(
+            (item['total'] or timedelta() for item in context['per_counter']),
+            timedelta(),
         )
-        per_counter = intervals.values('counter__name', 'counter__color').annotate(
-            total=Sum('duration'),
-            interval_count=Count('id'),
-        ).order_by('-total')
-        per_day = intervals.values('day').annotate(total=Sum('duration')).order_by('day')
+        return context
 
-        summary_total = sum((item['total'] or timedelta() for item in per_counter), timedelta())
 
-        context.update(
-            {
-                'per_counter': per_counter,
-                'per_day': per_day,
-                'summary_total': summary_total,
-            }
-        )
-        return context
+class CounterSummaryExportView(LoginRequiredMixin, CounterSummaryMixin, View):
+    """Stream every interval of the selected summary period as CSV or JSON."""
+
+    def get(self, request, *args, **kwargs):
+        """Return a streaming download for the same period as the summary page."""
+        if request.session.get('is_guest'):
+            return redirect('counter_summary')
+        _period, start, end = self.get_period_range()
+        intervals = TimeInterval.objects.filter(
+            user=request.user,
+            day__range=(start, end),
+        ).order_by('day', 'date_create', 'id')
+        filename = f'summary-{start:%Y-%m-%d}-{end:%Y-%m-%d}'
+        return export_intervals_response(request, intervals, filename)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -781,9 +1053,10 @@ class DeleteIntervalViewHTMX(CounterIntervalDeleteView):
             counter__user=request.user,
         )
         counter_id = interval.counter_id
-        day = interval.day
+        before = interval_contribution(interval)
         interval.delete()
-        recalculate_daily_summary(request.user, day)
+        update_summaries_for_interval(before, None)
+        publish_event(request.user.pk, 'delete', request, counter_id=counter_id, interval_id=pk)
         # Подсчёт обновленной статистики (учёт фильтров даты)
         start = request.POST.get('start') or request.GET.get('start')
         end = request.POST.get('end') or request.GET.get('end')
@@ -814,17 +1087,13 @@ class DeleteIntervalViewHTMX(CounterIntervalDeleteView):
             'total_duration': aggregate.get('total') or timedelta(),
         }
         if request.headers.get('HX-Request'):
-            stats_inner = render_to_string(
-                'time_tracking_main/partials/history_stats.html',
+            # OOB обновление статистики + удаление строки
+            stats_oob = render_to_string(
+                'time_tracking_main/partials/history_stats_oob.html',
                 ctx,
                 request=request,
             )
-            # OOB обновление статистики + удаление строки
-            html = (
-                "<!--deleted--><div id='history-stats' "
-                "hx-swap-oob='true'>" + stats_inner + "</div>"
-            )
-            return HttpResponse(html)
+            return HttpResponse('<!--deleted-->' + stats_oob)
         messages.success(request, 'Интервал удален.')
         return redirect('counter_history', pk=counter_id)
 
@@ -854,17 +1123,20 @@ class ProjectRatingView(LoginRequiredMixin, View):
         if rating_type not in ['like', 'dislike']:
             return HttpResponse('Неверный тип оценки', status=400)
         
-        # Получаем или создаем оценку пользователя
-        project_rating, created = ProjectRating.objects.get_or_create(
-            user=request.user,
-            defaults={'rating': rating_type, 'comment': comment}
-        )
-        
-        # Обновляем существующую оценку
-        if not created:
-            project_rating.rating = rating_type
-            project_rating.comment = comment
-            project_rating.save()
+        # Получаем или создаем оценку пользователя; строка блокируется до пересчета итогов
+        with transaction.atomic():
+            project_rating, created = ProjectRating.objects.select_for_update().get_or_create(
+                user=request.user,
+                defaults={'rating': rating_type, 'comment': comment}
+            )
+            previous = None if created else project_rating.rating
+
+            # Обновляем существующую оценку
+            if not created:
+                project_rating.rating = rating_type
+                project_rating.comment = comment
+                project_rating.save()
+            apply_rating_change(previous, rating_type)
         
         # Возвращаем обновленную статистику
         stats = self.get_rating_stats()
@@ -880,13 +1152,7 @@ class ProjectRatingView(LoginRequiredMixin, View):
     
     def get_rating_stats(self):
         """Get current project rating statistics."""
-        from django.db.models import Count, Q
-        stats = ProjectRating.objects.aggregate(
-            total_likes=Count('id', filter=Q(rating='like')),
-            total_dislikes=Count('id', filter=Q(rating='dislike')),
-            total_ratings=Count('id')
-        )
-        return stats
+        return get_rating_stats()
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -902,10 +1168,13 @@ class SendFeedbackView(LoginRequiredMixin, View):
         
         try:
             # Получаем или создаем рейтинг пользователя
-            project_rating, created = ProjectRating.objects.get_or_create(
-                user=request.user,
-                defaults={'rating': 'like', 'comment': comment}
-            )
+            with transaction.atomic():
+                project_rating, created = ProjectRating.objects.get_or_create(
+                    user=request.user,
+                    defaults={'rating': 'like', 'comment': comment}
+                )
+                if created:
+                    apply_rating_change(None, project_rating.rating)
             
             # Обновляем комментарий если рейтинг уже существует
             if not created:
@@ -945,22 +1214,30 @@ class SendFeedbackView(LoginRequiredMixin, View):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class CheckTaskStatusView(LoginRequiredMixin, View):
+class CheckTaskStatusView(AsyncLoginRequiredMixin, View):
     """Check Celery task status."""
-    
-    def get(self, request, task_id):
+
+    async def get(self, request, task_id):
         """Check task status and return result."""
+        # Опрос бэкенда результатов Celery не занимает общий sync-поток
+        response_data, status = await sync_to_async(self.get_status_data, thread_sensitive=False)(task_id)
+        if request.headers.get('HX-Request'):
+            return await sync_to_async(render)(request, 'time_tracking_main/partials/task_status.html', response_data)
+        return JsonResponse(response_data, status=status)
+
+    def get_status_data(self, task_id):
+        """Return ``(response_data, http_status)`` describing the task."""
         from celery.result import AsyncResult
-        
+
         try:
             result = AsyncResult(task_id)
-            
+
             response_data = {
                 'task_id': task_id,
                 'status': result.status,
                 'ready': result.ready(),
             }
-            
+
             if result.ready():
                 if result.successful():
                     response_data.update({
@@ -979,26 +1256,15 @@ class CheckTaskStatusView(LoginRequiredMixin, View):
                     'success': None,
                     'message': 'Ваши пожелания обрабатываются...',
                 })
-            
-            if request.headers.get('HX-Request'):
-                return render(request, 'time_tracking_main/partials/task_status.html', response_data)
-            
-            from django.http import JsonResponse
-            return JsonResponse(response_data)
-            
+            return response_data, 200
+
         except Exception as e:
-            error_data = {
+            return {
                 'task_id': task_id,
                 'success': False,
                 'message': 'Ошибка при проверке статуса отправки.',
                 'error': str(e)
-            }
-            
-            if request.headers.get('HX-Request'):
-                return render(request, 'time_tracking_main/partials/task_status.html', error_data)
-            
-            from django.http import JsonResponse
-            return JsonResponse(error_data, status=500)
+            }, 500
 
 
 def get_project_rating_context(user):
@@ -1010,13 +1276,8 @@ def get_project_rating_context(user):
         except ProjectRating.DoesNotExist:
             user_rating = None
     
-    # Статистика оценок
-    from django.db.models import Q, Count
-    stats = ProjectRating.objects.aggregate(
-        total_likes=Count('id', filter=Q(rating='like')),
-        total_dislikes=Count('id', filter=Q(rating='dislike')),
-        total_ratings=Count('id')
-    )
+    # Статистика оценок из поддерживаемых итогов, без агрегата по всей таблице
+    stats = get_rating_stats()
     
     return {
         'user_rating': user_rating,